@@ -1,13 +1,12 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_security import Security, SQLAlchemyUserDatastore
+from flask_security import Security
 from flask_bcrypt import Bcrypt
 from config import Config
+import logging
 import os
 
 db = SQLAlchemy()
-migrate = Migrate()
 bcrypt = Bcrypt()
 security = Security()
 
@@ -23,19 +22,34 @@ def create_app(config_class=Config):
                 )
     app.config.from_object(config_class)
 
+    # Nivel de log de la app y de los módulos de SGPA (los mensajes DEBUG no cuestan nada si no se emiten)
+    nivel_log = app.config.get('LOG_LEVEL') or ('DEBUG' if app.debug else 'INFO')
+    app.logger.setLevel(nivel_log)
+    logging.getLogger('app').setLevel(nivel_log)
+
     # Asegurarse de que la carpeta 'instance' exista
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
 
+    # Plantillas compiladas en disco: los workers nuevos no vuelven a compilarlas
+    if app.config.get('PLANTILLAS_CACHE_BYTECODE'):
+        from jinja2 import FileSystemBytecodeCache
+        carpeta = app.config.get('PLANTILLAS_CACHE_DIR') or os.path.join(app.instance_path, 'cache_plantillas')
+        os.makedirs(carpeta, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(carpeta)
+
+    # Perfil de SQLite (pool, WAL y demás PRAGMA por conexión)
+    from app.utils.basedatos import configurar_motor, init_basedatos
+    configurar_motor(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_basedatos(app, db)
     bcrypt.init_app(app)
 
     # Configuración de Flask-Security
-    from app.models.user import User, Role
-    user_datastore = SQLAlchemyUserDatastore(db, User, Role)
+    from app.models.user import User, Role, UserDatastoreSGPA
+    user_datastore = UserDatastoreSGPA(db, User, Role)
     security.init_app(app, user_datastore)
 
     # Registrar Blueprints (módulos de la aplicación)
@@ -52,5 +66,32 @@ def create_app(config_class=Config):
     from app.routes.desmotado import bp as desmotado_bp
     app.register_blueprint(desmotado_bp)
 
+    # Recepción de los cambios de las plantas y bandeja de salida de la planta local
+    from app.routes.sincronizacion import bp as sincronizacion_bp
+    app.register_blueprint(sincronizacion_bp)
+    from app.utils.sincronizacion import init_sincronizacion
+    init_sincronizacion(app)
+
+    # Cola persistente de trabajos en segundo plano y su estado en /trabajos
+    from app.routes.trabajos import bp as trabajos_bp
+    app.register_blueprint(trabajos_bp)
+    from app.utils.trabajos import init_trabajos
+    init_trabajos(app, config_class)
+
+    # Versión de los datos por planta: ETag y caché de fragmentos de listados y dashboards
+    from app.utils.cache_vistas import init_cache_vistas
+    init_cache_vistas(app)
+
+    # Contador de consultas SQL por petición (detecta N+1 en los listados)
+    from app.utils.consultas import init_contador_consultas
+    init_contador_consultas(app)
+
+    # Métricas de rendimiento por endpoint en /metrics
+    from app.utils.metricas import init_metricas
+    init_metricas(app)
+
+    # Comandos de consola (flask resumenes ...); 'flask db' carga Flask-Migrate al usarse
+    from app.commands import registrar_comandos
+    registrar_comandos(app)
 
     return app
@@ -0,0 +1,369 @@
+# C:/SGPA/app/commands.py
+import click
+from flask.cli import AppGroup
+
+class GrupoDiferido(click.Group):
+    """
+    Grupo de comandos que importa su implementación recién al usarse, para no
+    cargar en cada worker web dependencias que solo usa la consola.
+    'cargar' se llama con el contexto de la app activo y retorna el grupo real.
+    """
+
+    def __init__(self, name, cargar, **kwargs):
+        super().__init__(name, **kwargs)
+        self._cargar = cargar
+        self._grupo = None
+
+    def _real(self):
+        if self._grupo is None:
+            self._grupo = self._cargar()
+        return self._grupo
+
+    def list_commands(self, ctx):
+        return self._real().list_commands(ctx)
+
+    def get_command(self, ctx, cmd_name):
+        return self._real().get_command(ctx, cmd_name)
+
+def _cargar_migraciones():
+    """Inicializa Flask-Migrate (importa alembic) y retorna su grupo 'flask db'."""
+    from flask import current_app
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as migraciones
+    from app import db
+    Migrate(current_app._get_current_object(), db)
+    return migraciones
+
+db_cli = GrupoDiferido('db', _cargar_migraciones, help='Migraciones de la base de datos (Flask-Migrate).')
+
+resumenes_cli = AppGroup('resumenes', help='Resúmenes diarios por planta del dashboard.')
+
+@resumenes_cli.command('reconstruir')
+def reconstruir_resumenes_cmd():
+    """Recalcula los resúmenes diarios y el cubo del reporte comparativo desde todo el historial."""
+    from app.utils.cubo import reconstruir_cubo
+    from app.utils.resumenes import reconstruir_resumenes
+    filas = reconstruir_resumenes()
+    click.echo(f'Resúmenes reconstruidos: {filas} filas (planta, día).')
+    filas = reconstruir_cubo()
+    click.echo(f'Cubo del reporte comparativo reconstruido: {filas} filas.')
+
+qr_cli = AppGroup('qr', help='Códigos QR de los lotes.')
+
+@qr_cli.command('dia')
+@click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Día de ingreso de los lotes (AAAA-MM-DD); por defecto hoy.')
+@click.option('--planta', 'planta_id', type=int, default=None, help='ID de la planta.')
+@click.option('--procesos', type=int, default=None, help='Procesos a utilizar (por defecto QR_PROCESOS).')
+def qr_dia_cmd(fecha, planta_id, procesos):
+    """Genera de una vez los QR de todos los lotes ingresados en un día."""
+    from datetime import date
+    from flask import current_app
+    from app.utils.helpers import generar_qr_del_dia
+    rutas = generar_qr_del_dia(
+        fecha.date() if fecha else date.today(), planta_id,
+        procesos=procesos or current_app.config.get('QR_PROCESOS'),
+    )
+    click.echo(f'Códigos QR disponibles: {len(rutas)} lotes.')
+
+romaneos_cli = AppGroup('romaneos', help='Romaneos (tickets de pesaje) en PDF.')
+
+@romaneos_cli.command('rango')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), required=True, help='Primer día (AAAA-MM-DD).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Último día; por defecto igual a --desde.')
+@click.option('--planta', 'planta_id', type=int, default=None, help='ID de la planta.')
+@click.option('--salida', type=click.Path(dir_okay=False, writable=True), required=True, help='Archivo PDF a generar.')
+def romaneos_rango_cmd(desde, hasta, planta_id, salida):
+    """Genera un único PDF con los romaneos de las cargas ingresadas en un rango de días."""
+    from datetime import timedelta
+    from app.utils.romaneos import romaneos_por_fecha
+    try:
+        pdf, cantidad = romaneos_por_fecha(desde, (hasta or desde) + timedelta(days=1), planta_id)
+    except ValueError as error:
+        raise click.UsageError(str(error))
+    if not cantidad:
+        click.echo('No hay cargas en el rango de fechas indicado.')
+        return
+    with open(salida, 'wb') as archivo:
+        archivo.write(pdf)
+    click.echo(f'Romaneos generados: {cantidad} páginas en {salida}.')
+
+exportar_cli = AppGroup('exportar', help='Exportación del historial de cargas.')
+
+@exportar_cli.command('cargas')
+@click.option('--formato', type=click.Choice(['csv', 'xlsx']), default='csv', show_default=True)
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Primer día de entrada (AAAA-MM-DD).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Último día de entrada (AAAA-MM-DD).')
+@click.option('--estado', default=None, help='Estado de la carga (ej. Completado, Procesado).')
+@click.option('--planta', 'planta_id', type=int, default=None, help='ID de la planta.')
+@click.option('--salida', type=click.Path(dir_okay=False, writable=True), required=True, help='Archivo a generar.')
+def exportar_cargas_cmd(formato, desde, hasta, estado, planta_id, salida):
+    """Exporta el historial de cargas y procesos a CSV o XLSX."""
+    from datetime import timedelta
+    from app.utils.exportacion import FORMATOS, filas_exportacion
+    generar, _ = FORMATOS[formato]
+    filas = filas_exportacion(planta_id, desde, hasta + timedelta(days=1) if hasta else None, estado)
+    with open(salida, 'wb') as archivo:
+        for bloque in generar(filas):
+            archivo.write(bloque.encode('utf-8') if isinstance(bloque, str) else bloque)
+    click.echo(f'Exportación generada en {salida}.')
+
+productores_cli = AppGroup('productores', help='Padrón de productores.')
+
+@productores_cli.command('importar')
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--sin-actualizar', is_flag=True, help='No modificar los productores que ya existen.')
+def importar_productores_cmd(archivo, sin_actualizar):
+    """Importa productores desde un CSV o XLSX."""
+    from app.utils.importacion import importar_productores
+    with open(archivo, 'rb') as f:
+        resultado = importar_productores(f, archivo, actualizar=not sin_actualizar)
+    for fila, cuit, motivo in resultado.errores:
+        click.echo(f'Fila {fila} ({cuit or "sin CUIT"}): {motivo}', err=True)
+    click.echo(
+        f'Creados: {resultado.creados}, actualizados: {resultado.actualizados}, '
+        f'sin cambios: {resultado.sin_cambios}, con errores: {len(resultado.errores)}.'
+    )
+
+trabajos_cli = AppGroup('trabajos', help='Cola de trabajos en segundo plano.')
+
+@trabajos_cli.command('procesar')
+@click.option('--hilos', type=int, default=None, help='Trabajadores (por defecto TRABAJOS_HILOS).')
+@click.option('--modo', type=click.Choice(['hilos', 'procesos']), default=None, help='Por defecto TRABAJOS_MODO.')
+def trabajos_procesar_cmd(hilos, modo):
+    """Atiende la cola hasta Ctrl+C (para TRABAJOS_EN_PROCESO_WEB=0 o para sumar trabajadores)."""
+    import time
+    from flask import current_app
+    from app.utils.trabajos import iniciar_cola
+    cola = iniciar_cola(current_app._get_current_object(), hilos, modo)
+    click.echo(f'Atendiendo la cola con {cola.hilos} {cola.modo}. Ctrl+C para terminar.')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo('Terminando los trabajos en curso...')
+        cola.detener()
+    click.echo(f'Trabajos ejecutados: {cola.ejecutados:,}.')
+
+@trabajos_cli.command('estado')
+def trabajos_estado_cmd():
+    """Cantidad de trabajos por tipo y estado."""
+    from sqlalchemy import func
+    from app import db
+    from app.models.operaciones import Trabajo
+    filas = db.session.query(Trabajo.tipo, Trabajo.estado, func.count()).group_by(Trabajo.tipo, Trabajo.estado).all()
+    if not filas:
+        click.echo('No hay trabajos.')
+    for tipo, estado, cantidad in filas:
+        click.echo(f'{tipo:<25} {estado:<10} {cantidad:,}')
+
+@trabajos_cli.command('reintentar')
+@click.argument('trabajo_id', type=int)
+def trabajos_reintentar_cmd(trabajo_id):
+    """Vuelve a encolar un trabajo fallido."""
+    from app import db
+    from app.models.operaciones import Trabajo
+    from app.utils.trabajos import reintentar
+    trabajo = db.session.get(Trabajo, trabajo_id)
+    if trabajo is None:
+        raise click.ClickException(f'No existe el trabajo {trabajo_id}.')
+    if not reintentar(trabajo):
+        raise click.ClickException(f'El trabajo {trabajo_id} no falló (estado: {trabajo.estado}).')
+    click.echo(f'Trabajo {trabajo_id} encolado de nuevo.')
+
+@trabajos_cli.command('purgar')
+@click.option('--dias', type=int, default=30, show_default=True, help='Antigüedad mínima de los trabajos a borrar.')
+def trabajos_purgar_cmd(dias):
+    """Borra los trabajos terminados o fallidos antiguos."""
+    from app.utils.trabajos import purgar_trabajos
+    click.echo(f'Trabajos borrados: {purgar_trabajos(dias):,}.')
+
+@click.command('seed')
+@click.option('--cargas', type=int, default=1000000, show_default=True, help='Cargas a generar.')
+@click.option('--productores', type=int, default=20000, show_default=True, help='Productores a generar.')
+@click.option('--choferes', type=int, default=None, help='Choferes a generar (por defecto la mitad de los productores).')
+@click.option('--vehiculos', type=int, default=None, help='Vehículos a generar (por defecto uno por chofer).')
+@click.option('--planta', 'plantas', multiple=True, help='Código de planta (repetible); por defecto todas.')
+@click.option('--campanias', type=int, default=3, show_default=True, help='Campañas (años) a cubrir.')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%d %H:%M']), default=None,
+              help='Fin del período generado; por defecto ahora.')
+@click.option('--semilla', type=int, default=1, show_default=True, help='Semilla aleatoria (misma semilla, mismos datos).')
+@click.option('--transaccion', 'tamano_transaccion', type=int, default=250000, show_default=True,
+              help='Cargas por transacción.')
+@click.option('--sin-resumenes', is_flag=True, help='No reconstruir los resúmenes diarios ni el cubo al terminar.')
+def seed_cmd(cargas, productores, choferes, vehiculos, plantas, campanias, hasta, semilla, tamano_transaccion, sin_resumenes):
+    """Llena la base con datos sintéticos realistas para pruebas de carga."""
+    import time
+    from app.utils.semillas import sembrar
+    inicio = time.perf_counter()
+
+    def progreso(insertadas, total):
+        segundos = time.perf_counter() - inicio
+        click.echo(f'  {insertadas:,}/{total:,} cargas ({insertadas / segundos:,.0f} cargas/s)')
+
+    try:
+        totales = sembrar(
+            cargas, productores, choferes, vehiculos, list(plantas) or None, campanias, hasta, semilla,
+            tamano_transaccion, resumenes=not sin_resumenes, progreso=progreso,
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    segundos = time.perf_counter() - inicio
+    filas = sum(v for k, v in totales.items() if k not in ('resumenes', 'cubo'))
+    click.echo(', '.join(f'{k}: {v:,}' for k, v in totales.items()) + '.')
+    click.echo(f'{filas:,} filas en {segundos:.1f} s ({filas / segundos:,.0f} filas/s).')
+
+campanias_cli = AppGroup('campanias', help='Campañas de cosecha y su archivo.')
+
+@campanias_cli.command('listar')
+def campanias_listar_cmd():
+    """Muestra las campañas en las tablas vivas y las ya archivadas."""
+    from app.models.operaciones import CampaniaArchivada
+    from app.utils.campanias import campanias_vivas
+    for anio, cargas, pendientes in campanias_vivas():
+        click.echo(f'{anio}  viva       {cargas:>10,} cargas ({pendientes:,} sin procesar)')
+    for campania in CampaniaArchivada.query.order_by(CampaniaArchivada.anio):
+        click.echo(f'{campania.anio}  archivada  {campania.cargas:>10,} cargas, {campania.procesos:,} procesos '
+                   f'(cerrada el {campania.fecha_cierre:%d/%m/%Y})')
+
+@campanias_cli.command('cerrar')
+@click.option('--anio', type=int, multiple=True, help='Año a cerrar (repetible); por defecto todos los anteriores al actual.')
+@click.option('--lote', 'tamano_lote', type=int, default=5000, show_default=True, help='Cargas movidas por transacción.')
+@click.option('--compactar', is_flag=True, help='Ejecutar VACUUM al terminar (bloquea la base mientras dura).')
+def campanias_cerrar_cmd(anio, tamano_lote, compactar):
+    """Mueve las campañas terminadas a las tablas de archivo."""
+    from datetime import datetime
+    from app.utils.campanias import campanias_vivas, cerrar_campania, compactar_base
+    anios = anio or [a for a, _, _ in campanias_vivas() if a < datetime.now().year]
+    for a in anios:
+        try:
+            cargas, procesos = cerrar_campania(a, tamano_lote, progreso=lambda n: click.echo(f'  {a}: {n:,} cargas movidas'))
+        except ValueError as error:
+            raise click.ClickException(str(error))
+        click.echo(f'Campaña {a} archivada: {cargas:,} cargas y {procesos:,} procesos.')
+    if compactar:
+        compactar_base()
+        click.echo('Base compactada.')
+
+liquidaciones_cli = AppGroup('liquidaciones', help='Liquidaciones a productores.')
+
+def _periodo(campania, desde, hasta):
+    from app.utils.liquidaciones import periodo_campania
+    if campania:
+        return periodo_campania(campania)
+    if not (desde and hasta):
+        raise click.UsageError('Indique --campania o bien --desde y --hasta.')
+    return desde.date(), hasta.date()
+
+@liquidaciones_cli.command('calcular')
+@click.option('--campania', type=int, default=None, help='Año de la campaña (lotes ingresados en ese año).')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Primer día de entrada (AAAA-MM-DD).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Último día de entrada (AAAA-MM-DD).')
+@click.option('--completa', is_flag=True, help='Recalcular todos los productores, no solo los que tienen novedades.')
+def liquidaciones_calcular_cmd(campania, desde, hasta, completa):
+    """Calcula las liquidaciones de los productores para un período."""
+    from app.utils.liquidaciones import liquidar
+    desde, hasta = _periodo(campania, desde, hasta)
+    corrida = liquidar(desde, hasta, completa)
+    click.echo(
+        f'Corrida {"completa" if corrida.completa else "incremental"} del {desde:%d/%m/%Y} al {hasta:%d/%m/%Y}: '
+        f'{corrida.liquidaciones:,} liquidaciones nuevas o modificadas en {corrida.segundos:.1f} s.'
+    )
+
+@liquidaciones_cli.command('listar')
+@click.option('--campania', type=int, default=None, help='Año de la campaña.')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Primer día de entrada (AAAA-MM-DD).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Último día de entrada (AAAA-MM-DD).')
+@click.option('--limite', type=int, default=20, show_default=True, help='Liquidaciones a mostrar (0 = todas).')
+def liquidaciones_listar_cmd(campania, desde, hasta, limite):
+    """Muestra las liquidaciones de un período, de mayor a menor kilos liquidables."""
+    from app.utils.liquidaciones import liquidaciones_del_periodo
+    consulta = liquidaciones_del_periodo(*_periodo(campania, desde, hasta))
+    for liquidacion in consulta.limit(limite or None):
+        click.echo(
+            f'{liquidacion.productor.cuit}  {liquidacion.productor.nombre_completo[:40]:<40} '
+            f'{liquidacion.lotes:>6,} lotes  {liquidacion.kilos_netos:>14,.1f} kg netos  '
+            f'-{liquidacion.descuento_humedad:>11,.1f} kg humedad  {liquidacion.kilos_liquidables:>14,.1f} kg liquidables  '
+            f'fibra {liquidacion.rendimiento_fibra:.1f} %  (v{liquidacion.version})'
+        )
+
+sincronizacion_cli = AppGroup('sincronizacion', help='Envío de los cambios de la planta a casa central.')
+
+@sincronizacion_cli.command('enviar')
+@click.option('--destino', default=None,
+              help='URL de casa central (por defecto SINCRONIZACION_URL) o URL de una base, ej. sqlite:////ruta/central.db.')
+@click.option('--lote', 'tamano_lote', type=int, default=None, help='Cambios por lote (por defecto SINCRONIZACION_LOTE).')
+def sincronizacion_enviar_cmd(destino, tamano_lote):
+    """Envía los cambios pendientes de la bandeja de salida."""
+    from flask import current_app
+    from app.utils.sincronizacion import enviar_cambios, transporte_http, transporte_local
+    destino = destino or current_app.config.get('SINCRONIZACION_URL')
+    if not destino:
+        raise click.UsageError('Indique --destino o configure SINCRONIZACION_URL.')
+    if destino.startswith('sqlite:'):
+        transporte = transporte_local(destino)
+    else:
+        transporte = transporte_http(destino, current_app.config.get('SINCRONIZACION_TOKEN'))
+
+    def progreso(respuesta):
+        click.echo(f"  hasta {respuesta['hasta']:,}: {respuesta['aplicados']:,} aplicados, "
+                   f"{respuesta['descartados']:,} descartados, {respuesta['repetidos']:,} repetidos")
+
+    try:
+        enviados = enviar_cambios(transporte, destino, tamano_lote or current_app.config['SINCRONIZACION_LOTE'], progreso)
+    except (ValueError, OSError) as error:
+        raise click.ClickException(str(error))
+    click.echo(f'Cambios enviados: {enviados:,}.')
+
+@sincronizacion_cli.command('estado')
+@click.option('--destino', default=None, help='Destino (por defecto SINCRONIZACION_URL).')
+def sincronizacion_estado_cmd(destino):
+    """Muestra los cambios de la bandeja que el destino todavía no confirmó."""
+    from flask import current_app
+    from app.utils.sincronizacion import cambios_pendientes
+    destino = destino or current_app.config.get('SINCRONIZACION_URL')
+    if not destino:
+        raise click.UsageError('Indique --destino o configure SINCRONIZACION_URL.')
+    click.echo(f'Cambios pendientes para {destino}: {cambios_pendientes(destino):,}.')
+
+@sincronizacion_cli.command('registrar-existentes')
+def sincronizacion_registrar_existentes_cmd():
+    """Anota en la bandeja todo lo ya cargado en la planta (antes del primer envío)."""
+    from app.utils.sincronizacion import registrar_existentes
+    totales = registrar_existentes()
+    click.echo(', '.join(f'{tabla}: {filas:,}' for tabla, filas in totales.items()) + '.')
+
+busqueda_cli = AppGroup('busqueda', help='Índices de búsqueda de cargas, productores, choferes y vehículos.')
+
+@busqueda_cli.command('reconstruir')
+def busqueda_reconstruir_cmd():
+    """Vuelve a llenar los índices de búsqueda desde las tablas (tras cargas masivas o restauraciones)."""
+    from app.utils.busqueda import reconstruir_indices_busqueda
+    totales = reconstruir_indices_busqueda()
+    click.echo(', '.join(f'{indice}: {filas:,}' for indice, filas in totales.items()) + '.')
+
+@busqueda_cli.command('cargas')
+@click.argument('texto')
+@click.option('--planta', 'planta_id', type=int, default=None, help='ID de la planta.')
+@click.option('--limite', type=int, default=20, show_default=True, help='Cargas a mostrar.')
+def busqueda_cargas_cmd(texto, planta_id, limite):
+    """Busca cargas por fragmentos de lote, DTV, placas, chofer o productor."""
+    from app.utils.busqueda import buscar_cargas
+    for carga, motivo in buscar_cargas(texto, planta_id=planta_id, limite=limite):
+        click.echo(f'{carga.lote_id}  {carga.fecha_entrada:%d/%m/%Y %H:%M}  {motivo:<9} '
+                   f'{carga.productor.nombre_completo} / {carga.chofer.nombre_completo} / {carga.vehiculo.placa}')
+
+def registrar_comandos(app):
+    """Registra los comandos de consola propios de SGPA (`flask <grupo> <comando>`) y `flask db`."""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(resumenes_cli)
+    app.cli.add_command(qr_cli)
+    app.cli.add_command(romaneos_cli)
+    app.cli.add_command(exportar_cli)
+    app.cli.add_command(productores_cli)
+    app.cli.add_command(campanias_cli)
+    app.cli.add_command(liquidaciones_cli)
+    app.cli.add_command(sincronizacion_cli)
+    app.cli.add_command(busqueda_cli)
+    app.cli.add_command(trabajos_cli)
+    app.cli.add_command(seed_cmd)
@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, SelectField, TextAreaField, FloatField, IntegerField
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import StringField, SubmitField, SelectField, TextAreaField, FloatField, IntegerField, BooleanField, DateField
 from wtforms.validators import DataRequired, Length, Email, Optional, NumberRange
 from wtforms import ValidationError
 
@@ -41,6 +42,26 @@ class ProductorForm(FlaskForm):
     email = StringField('Email', validators=[Optional(), Email(message="Email inválido."), Length(max=120)])
     submit = SubmitField('Guardar')
 
+class ImportarProductoresForm(FlaskForm):
+    """Formulario para la carga masiva de productores desde el padrón de la cooperativa."""
+    archivo = FileField('Archivo (CSV o XLSX)', validators=[
+        FileRequired(message="Seleccione un archivo."),
+        FileAllowed(['csv', 'xlsx'], message="Solo se aceptan archivos CSV o XLSX.")
+    ])
+    actualizar = BooleanField('Actualizar los productores que ya existen (mismo CUIT)', default=True)
+    submit = SubmitField('Importar')
+
+class GenerarQrDiaForm(FlaskForm):
+    """Encola la generación de los QR de los lotes ingresados en un día (por defecto hoy)."""
+    fecha = DateField('Día de ingreso', validators=[Optional()])
+    submit = SubmitField('Generar QR')
+
+class RomaneosRangoForm(FlaskForm):
+    """Encola un único PDF con los romaneos de un rango de días de ingreso ('hasta' por defecto igual a 'desde')."""
+    desde = DateField('Desde', validators=[DataRequired("Este campo es obligatorio.")])
+    hasta = DateField('Hasta', validators=[Optional()])
+    submit = SubmitField('Generar romaneos')
+
 class DesmotadoForm(FlaskForm):
     """Formulario para registrar los resultados del proceso de desmotado."""
     kilos_fibra = FloatField('Kilos de Fibra Producidos', validators=[DataRequired("Este campo es obligatorio."), NumberRange(min=0)])
@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
-from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import DDL, MetaData, Table, event
+from sqlalchemy.orm import validates
 
 # Importamos los modelos de usuario necesarios para las relaciones
 from .user import User
@@ -28,11 +29,27 @@ class Vehiculo(db.Model):
 
 class Carga(db.Model):
     """Modelo principal para registrar las cargas de algodón."""
+    # Índices compuestos para la paginación por cursor (fecha, id) de los listados
+    __table_args__ = (
+        db.Index('ix_carga_planta_fecha_entrada', 'planta_id', 'fecha_entrada', 'id'),
+        db.Index('ix_carga_estado_fecha_salida', 'estado', 'fecha_salida', 'id'),
+        db.Index('ix_carga_planta_estado_fecha_salida', 'planta_id', 'estado', 'fecha_salida', 'id'),
+        # Cubre SUM(peso_neto) por planta y productor sin leer la tabla
+        db.Index('ix_carga_planta_productor_peso_neto', 'planta_id', 'productor_id', 'peso_neto'),
+        # Últimas cargas de un productor, chofer o vehículo encontrado por la búsqueda
+        db.Index('ix_carga_productor_id', 'productor_id'),
+        db.Index('ix_carga_chofer_id', 'chofer_id'),
+        db.Index('ix_carga_vehiculo_id', 'vehiculo_id'),
+        # Sin reusar ids: los de las cargas archivadas siguen en carga_archivo
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     lote_id = db.Column(db.String(20), unique=True, nullable=False)
     fecha_entrada = db.Column(db.DateTime, default=datetime.utcnow)
     peso_bruto = db.Column(db.Float, nullable=False)
     peso_tara = db.Column(db.Float)
+    # Guardado (no calculado al vuelo) para poder sumarlo en SQL; 0 hasta registrar la tara
+    peso_neto = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
     fecha_salida = db.Column(db.DateTime)
     estado = db.Column(db.String(50), default='Pendiente Salida')
     numero_bascula = db.Column(db.Integer)
@@ -50,6 +67,7 @@ class Carga(db.Model):
     usuario_balancero_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     usuario_salida_id = db.Column(db.Integer, db.ForeignKey('user.id'))
 
+    planta = db.relationship('Planta')
     productor = db.relationship('Productor')
     chofer = db.relationship('Chofer')
     vehiculo = db.relationship('Vehiculo')
@@ -57,19 +75,376 @@ class Carga(db.Model):
     usuario_salida = db.relationship('User', foreign_keys=[usuario_salida_id])
     proceso_desmotado = db.relationship('ProcesoDesmotado', backref='carga', uselist=False)
 
-    @hybrid_property
-    def peso_neto(self):
-        if self.peso_bruto and self.peso_tara:
-            return self.peso_bruto - self.peso_tara
-        return 0.0
+    @validates('peso_bruto', 'peso_tara')
+    def _actualizar_peso_neto(self, key, valor):
+        """Mantiene peso_neto al día cada vez que se asigna el bruto o la tara."""
+        bruto = valor if key == 'peso_bruto' else self.peso_bruto
+        tara = valor if key == 'peso_tara' else self.peso_tara
+        self.peso_neto = bruto - tara if bruto and tara else 0.0
+        return valor
+
+class SecuenciaLote(db.Model):
+    """Contador de números de lote por planta y año (reemplaza el MAX(lote_id))."""
+    __tablename__ = 'secuencia_lote'
+    planta_codigo = db.Column(db.String(3), primary_key=True)
+    anio = db.Column(db.Integer, primary_key=True)
+    ultimo_numero = db.Column(db.Integer, nullable=False, default=0)
 
 class ProcesoDesmotado(db.Model):
     """Modelo para registrar los resultados del desmotado."""
+    __table_args__ = {'sqlite_autoincrement': True}
     id = db.Column(db.Integer, primary_key=True)
     carga_id = db.Column(db.Integer, db.ForeignKey('carga.id'), nullable=False, unique=True)
     fecha_proceso = db.Column(db.DateTime, default=datetime.utcnow)
     kilos_fibra = db.Column(db.Float, nullable=False)
     kilos_semilla = db.Column(db.Float, nullable=False)
+    observaciones = db.Column(db.Text)
     usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     usuario = db.relationship('User')
 
+class ResumenDiarioPlanta(db.Model):
+    """
+    Acumulados diarios por planta para los KPIs del dashboard.
+    Se actualizan en la misma transacción que registrar_salida y registrar_proceso.
+    """
+    __tablename__ = 'resumen_diario_planta'
+    planta_id = db.Column(db.Integer, db.ForeignKey('planta.id'), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True)
+    kilos_netos = db.Column(db.Float, nullable=False, default=0)
+    lotes = db.Column(db.Integer, nullable=False, default=0)
+    productores = db.Column(db.Integer, nullable=False, default=0)
+    kilos_fibra = db.Column(db.Float, nullable=False, default=0)
+    kilos_semilla = db.Column(db.Float, nullable=False, default=0)
+    # Peso neto de los lotes desmotados ese día (base del rendimiento)
+    kilos_netos_procesados = db.Column(db.Float, nullable=False, default=0)
+    lotes_procesados = db.Column(db.Integer, nullable=False, default=0)
+
+class ProductorActivoDiario(db.Model):
+    """Productores que entregaron algodón en una planta en un día dado."""
+    __tablename__ = 'productor_activo_diario'
+    planta_id = db.Column(db.Integer, db.ForeignKey('planta.id'), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True)
+    productor_id = db.Column(db.Integer, db.ForeignKey('productor.id'), primary_key=True)
+
+class ResumenProductores(db.Model):
+    """
+    Cantidad de productores activos para el dashboard (una sola fila, id 1).
+    En SQLite la mantienen los disparadores de SQL_RESUMEN_PRODUCTORES, así
+    cuentan también las altas masivas (importación, semillas, sincronización).
+    """
+    __tablename__ = 'resumen_productores'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    activos = db.Column(db.Integer, nullable=False, default=0)
+
+_SUMAR_ACTIVOS = "UPDATE resumen_productores SET activos = activos + ({}) WHERE id = 1;"
+SQL_RESUMEN_PRODUCTORES = [
+    "CREATE TRIGGER IF NOT EXISTS resumen_productores_alta AFTER INSERT ON productor "
+    f"WHEN new.activo BEGIN {_SUMAR_ACTIVOS.format(1)} END",
+    "CREATE TRIGGER IF NOT EXISTS resumen_productores_baja AFTER DELETE ON productor "
+    f"WHEN old.activo BEGIN {_SUMAR_ACTIVOS.format(-1)} END",
+    "CREATE TRIGGER IF NOT EXISTS resumen_productores_cambio AFTER UPDATE OF activo ON productor "
+    f"WHEN old.activo IS NOT new.activo BEGIN {_SUMAR_ACTIVOS.format('CASE WHEN new.activo THEN 1 ELSE -1 END')} END",
+]
+for _sentencia in SQL_RESUMEN_PRODUCTORES:
+    event.listen(db.metadata, 'after_create', DDL(_sentencia).execute_if(dialect='sqlite'))
+
+class CuboPlantas(db.Model):
+    """
+    Cubo del Reporte Comparativo de Plantas: lotes desmotados y kilos por planta,
+    semana de proceso (lunes) y banda de humedad (-1 = sin dato).
+    Se actualiza en la misma transacción que registrar_proceso.
+    """
+    __tablename__ = 'cubo_plantas'
+    planta_id = db.Column(db.Integer, db.ForeignKey('planta.id'), primary_key=True)
+    semana = db.Column(db.Date, primary_key=True)
+    banda_humedad = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    lotes = db.Column(db.Integer, nullable=False, default=0)
+    kilos_netos = db.Column(db.Float, nullable=False, default=0)
+    kilos_fibra = db.Column(db.Float, nullable=False, default=0)
+    kilos_semilla = db.Column(db.Float, nullable=False, default=0)
+
+class CuboProductores(db.Model):
+    """Mismo cubo abierto por productor, para los recortes y agrupaciones por productor."""
+    __tablename__ = 'cubo_productores'
+    __table_args__ = (
+        db.Index('ix_cubo_productores_productor_semana', 'productor_id', 'semana'),
+    )
+    planta_id = db.Column(db.Integer, db.ForeignKey('planta.id'), primary_key=True)
+    semana = db.Column(db.Date, primary_key=True)
+    productor_id = db.Column(db.Integer, db.ForeignKey('productor.id'), primary_key=True)
+    banda_humedad = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    lotes = db.Column(db.Integer, nullable=False, default=0)
+    kilos_netos = db.Column(db.Float, nullable=False, default=0)
+    kilos_fibra = db.Column(db.Float, nullable=False, default=0)
+    kilos_semilla = db.Column(db.Float, nullable=False, default=0)
+
+class CuboRendimiento(db.Model):
+    """
+    Histograma de rendimientos por lote ('fibra' o 'semilla' sobre el neto, en
+    intervalos de 0,5 %) por planta, semana y banda de humedad: base de los
+    percentiles del reporte comparativo.
+    """
+    __tablename__ = 'cubo_rendimiento'
+    planta_id = db.Column(db.Integer, db.ForeignKey('planta.id'), primary_key=True)
+    semana = db.Column(db.Date, primary_key=True)
+    banda_humedad = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    medida = db.Column(db.String(10), primary_key=True)
+    intervalo = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    lotes = db.Column(db.Integer, nullable=False, default=0)
+
+# --- Liquidaciones a productores ---
+
+class Liquidacion(db.Model):
+    """
+    Liquidación de un productor para un período (por fecha de entrada de los
+    lotes): kilos netos de los lotes desmotados, descuento por humedad y
+    kilos de fibra y semilla obtenidos. 'version' aumenta cada vez que un
+    recálculo cambia las cifras.
+    """
+    __tablename__ = 'liquidacion'
+    __table_args__ = (
+        db.UniqueConstraint('desde', 'hasta', 'productor_id', name='uq_liquidacion_periodo_productor'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    productor_id = db.Column(db.Integer, db.ForeignKey('productor.id'), nullable=False)
+    desde = db.Column(db.Date, nullable=False)
+    hasta = db.Column(db.Date, nullable=False)
+    fecha_calculo = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    lotes = db.Column(db.Integer, nullable=False, default=0)
+    kilos_netos = db.Column(db.Float, nullable=False, default=0)
+    descuento_humedad = db.Column(db.Float, nullable=False, default=0)
+    kilos_liquidables = db.Column(db.Float, nullable=False, default=0)
+    kilos_fibra = db.Column(db.Float, nullable=False, default=0)
+    kilos_semilla = db.Column(db.Float, nullable=False, default=0)
+
+    productor = db.relationship('Productor')
+
+    @property
+    def rendimiento_fibra(self):
+        return self.kilos_fibra / self.kilos_netos * 100 if self.kilos_netos else None
+
+    @property
+    def rendimiento_semilla(self):
+        return self.kilos_semilla / self.kilos_netos * 100 if self.kilos_netos else None
+
+class LiquidacionCorrida(db.Model):
+    """Cada ejecución del motor de liquidaciones para un período ("liquidaciones": filas creadas o modificadas)."""
+    __tablename__ = 'liquidacion_corrida'
+    __table_args__ = (
+        db.Index('ix_liquidacion_corrida_periodo', 'desde', 'hasta', 'fecha'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    desde = db.Column(db.Date, nullable=False)
+    hasta = db.Column(db.Date, nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    completa = db.Column(db.Boolean, nullable=False, default=True)
+    liquidaciones = db.Column(db.Integer, nullable=False, default=0)
+    segundos = db.Column(db.Float)
+
+class NovedadLiquidacion(db.Model):
+    """
+    Último cambio en los lotes de cada productor (un desmotado registrado):
+    las corridas incrementales recalculan solo los productores con novedades
+    posteriores a la corrida anterior del mismo período.
+    """
+    __tablename__ = 'novedad_liquidacion'
+    productor_id = db.Column(db.Integer, db.ForeignKey('productor.id'), primary_key=True, autoincrement=False)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# --- Sincronización planta -> casa central ---
+
+class RegistroCambio(db.Model):
+    """
+    Bandeja de salida de una planta: cada alta o modificación de productores,
+    choferes, vehículos, cargas y procesos, en orden ('id' es la secuencia).
+    Solo se agregan filas. 'clave' es la clave natural de la fila (CUIT, DNI,
+    placa, número de lote) y 'datos' su estado completo en JSON, con las
+    referencias también por clave natural.
+    """
+    __tablename__ = 'registro_cambio'
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    tabla = db.Column(db.String(30), nullable=False)
+    clave = db.Column(db.String(50), nullable=False)
+    operacion = db.Column(db.String(10), nullable=False)
+    datos = db.Column(db.Text, nullable=False)
+
+class EnvioSincronizacion(db.Model):
+    """En la planta: último cambio de la bandeja confirmado por cada destino."""
+    __tablename__ = 'sincronizacion_envio'
+    destino = db.Column(db.String(255), primary_key=True)
+    ultima_secuencia = db.Column(db.Integer, nullable=False, default=0)
+    fecha = db.Column(db.DateTime)
+
+class OrigenSincronizacion(db.Model):
+    """En casa central: último cambio recibido de cada planta (los reenvíos se ignoran)."""
+    __tablename__ = 'sincronizacion_origen'
+    origen = db.Column(db.String(20), primary_key=True)
+    ultima_secuencia = db.Column(db.Integer, nullable=False, default=0)
+    fecha = db.Column(db.DateTime)
+
+class VersionSincronizada(db.Model):
+    """En casa central: sello (fecha, origen, secuencia) del último cambio aplicado a cada fila."""
+    __tablename__ = 'sincronizacion_version'
+    tabla = db.Column(db.String(30), primary_key=True)
+    clave = db.Column(db.String(50), primary_key=True)
+    fecha = db.Column(db.DateTime, nullable=False)
+    origen = db.Column(db.String(20), nullable=False)
+    secuencia = db.Column(db.Integer, nullable=False)
+
+# --- Versión de los datos (respuestas condicionales y caché de vistas) ---
+
+class VersionDatos(db.Model):
+    """
+    Versión de los datos de cada planta que muestran los listados y dashboards.
+    planta_id 0 es la de productores, choferes y vehículos, comunes a todas.
+    Sube en la misma transacción que cada escritura (app/utils/cache_vistas.py).
+    """
+    __tablename__ = 'version_datos'
+    planta_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    fecha = db.Column(db.DateTime)
+
+# --- Trabajos en segundo plano ---
+
+class Trabajo(db.Model):
+    """
+    Cola persistente de trabajos pesados (app/utils/trabajos.py). 'tipo' es
+    el nombre de la tarea registrada y 'argumentos' / 'resultado' van en
+    JSON. Un trabajador lo toma poniéndolo 'En curso' con un plazo ('vence'):
+    si el proceso termina sin completarlo, al vencer el plazo otro lo retoma.
+    """
+    __tablename__ = 'trabajo'
+    __table_args__ = (
+        db.Index('ix_trabajo_estado_disponible', 'estado', 'disponible_desde'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    argumentos = db.Column(db.Text, nullable=False, default='{}')
+    # Pendiente, En curso, Terminado, Fallido
+    estado = db.Column(db.String(20), nullable=False, default='Pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    max_intentos = db.Column(db.Integer, nullable=False, default=3)
+    fecha_creacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    disponible_desde = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    fecha_inicio = db.Column(db.DateTime)
+    fecha_fin = db.Column(db.DateTime)
+    trabajador = db.Column(db.String(100))
+    vence = db.Column(db.DateTime)
+    resultado = db.Column(db.Text)
+    error = db.Column(db.Text)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    planta_id = db.Column(db.Integer, db.ForeignKey('planta.id'))
+
+# --- Campañas archivadas ---
+
+def _tabla_archivo(nombre, tabla, *extras):
+    """Tabla con las mismas columnas que 'tabla' pero sin claves foráneas, para las campañas cerradas."""
+    return db.Table(nombre, *(
+        db.Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in tabla.columns
+    ), *extras)
+
+carga_archivo = _tabla_archivo(
+    'carga_archivo', Carga.__table__,
+    db.Index('ix_carga_archivo_lote_id', 'lote_id', unique=True),
+    db.Index('ix_carga_archivo_planta_fecha_entrada', 'planta_id', 'fecha_entrada', 'id'),
+)
+proceso_desmotado_archivo = _tabla_archivo(
+    'proceso_desmotado_archivo', ProcesoDesmotado.__table__,
+    db.Index('ix_proceso_desmotado_archivo_carga_id', 'carga_id', unique=True),
+)
+
+class CampaniaArchivada(db.Model):
+    """Campañas (años de ingreso) cuyas cargas y procesos se movieron a las tablas de archivo."""
+    __tablename__ = 'campania_archivada'
+    anio = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    fecha_cierre = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cargas = db.Column(db.Integer, nullable=False, default=0)
+    procesos = db.Column(db.Integer, nullable=False, default=0)
+
+# Vista con todo el historial: cargas vivas y archivadas, cada una con su proceso de
+# desmotado (el join se hace dentro de cada parte). Los ids no se repiten entre ambas:
+# carga y proceso_desmotado usan AUTOINCREMENT y no reusan los ids archivados.
+_COLUMNAS_PROCESO_HISTORICO = ('fecha_proceso', 'kilos_fibra', 'kilos_semilla')
+
+def _select_historico(tabla_carga, tabla_proceso, archivada):
+    columnas = ', '.join([f'c.{c.name}' for c in Carga.__table__.columns] + [f'p.{c}' for c in _COLUMNAS_PROCESO_HISTORICO])
+    return (f'SELECT {columnas}, {archivada} AS archivada FROM {tabla_carga} c '
+            f'LEFT JOIN {tabla_proceso} p ON p.carga_id = c.id')
+
+SQL_CARGA_HISTORICA = 'CREATE VIEW IF NOT EXISTS carga_historica AS {} UNION ALL {}'.format(
+    _select_historico('carga', 'proceso_desmotado', 0),
+    _select_historico('carga_archivo', 'proceso_desmotado_archivo', 1),
+)
+event.listen(db.metadata, 'after_create', DDL(SQL_CARGA_HISTORICA))
+event.listen(db.metadata, 'before_drop', DDL('DROP VIEW IF EXISTS carga_historica'))
+
+# Definición de la vista para consultarla con Core (fuera de db.metadata: create_all no la crea como tabla)
+carga_historica = Table(
+    'carga_historica', MetaData(),
+    *(db.Column(c.name, c.type) for c in Carga.__table__.columns),
+    *(db.Column(nombre, ProcesoDesmotado.__table__.c[nombre].type) for nombre in _COLUMNAS_PROCESO_HISTORICO),
+    db.Column('archivada', db.Boolean),
+)
+
+# --- Búsqueda de texto completo ---
+
+# Índices FTS5 con trigramas (encuentran cualquier fragmento de 3 o más caracteres)
+# y sin copia del texto (content=''). Cada uno se mantiene con disparadores sobre
+# su tabla: tabla FTS -> (tabla origen, {columna FTS: (columna origen, normalización)}).
+# Las cargas archivadas no se indexan.
+_ACENTOS = (('á', 'a'), ('é', 'e'), ('í', 'i'), ('ó', 'o'), ('ú', 'u'), ('ü', 'u'), ('ñ', 'n'),
+            ('Á', 'A'), ('É', 'E'), ('Í', 'I'), ('Ó', 'O'), ('Ú', 'U'), ('Ü', 'U'), ('Ñ', 'N'))
+
+def _sin_acentos(expresion):
+    """Nombres: sin acentos (el tokenizador ya ignora mayúsculas), como _normalizar() de la búsqueda."""
+    for acentuada, simple in _ACENTOS:
+        expresion = f"replace({expresion}, '{acentuada}', '{simple}')"
+    return expresion
+
+def _compacto(expresion):
+    """Códigos (lote, DTV, placas, DNI, CUIT): sin guiones, espacios ni puntos."""
+    return f"replace(replace(replace({expresion}, '-', ''), ' ', ''), '.', '')"
+
+INDICES_BUSQUEDA = {
+    'busqueda_carga': ('carga', {
+        'lote': ('lote_id', _compacto), 'dtv': ('dtv', _compacto), 'acoplado': ('placa_acoplado', _compacto),
+    }),
+    'busqueda_productor': ('productor', {'nombre': ('nombre_completo', _sin_acentos), 'cuit': ('cuit', _compacto)}),
+    'busqueda_chofer': ('chofer', {'nombre': ('nombre_completo', _sin_acentos), 'dni': ('dni', _compacto)}),
+    'busqueda_vehiculo': ('vehiculo', {'placa': ('placa', _compacto)}),
+}
+
+def _valores_busqueda(columnas, fila):
+    return ', '.join(normalizar(f'{fila}.{origen}') for origen, normalizar in columnas.values())
+
+def sql_indice_busqueda(indice):
+    """Sentencias que crean el índice FTS5 'indice' y sus disparadores."""
+    tabla, columnas = INDICES_BUSQUEDA[indice]
+    nombres = ', '.join(columnas)
+    origenes = [origen for origen, _ in columnas.values()]
+    alta = f"INSERT INTO {indice}(rowid, {nombres}) VALUES (new.id, {_valores_busqueda(columnas, 'new')});"
+    # En una tabla sin contenido, la baja se pide con los mismos valores con que se indexó
+    baja = f"INSERT INTO {indice}({indice}, rowid, {nombres}) VALUES ('delete', old.id, {_valores_busqueda(columnas, 'old')});"
+    cambio = ' OR '.join(f'old.{origen} IS NOT new.{origen}' for origen in origenes)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5({nombres}, content='', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_alta AFTER INSERT ON {tabla} BEGIN {alta} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_baja AFTER DELETE ON {tabla} BEGIN {baja} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_cambio AFTER UPDATE OF {', '.join(origenes)} ON {tabla} "
+        f"WHEN {cambio} BEGIN {baja} {alta} END",
+    ]
+
+def sql_reconstruir_indice_busqueda(indice):
+    """Sentencias que vacían el índice y lo vuelven a llenar desde su tabla."""
+    tabla, columnas = INDICES_BUSQUEDA[indice]
+    return [
+        f"INSERT INTO {indice}({indice}) VALUES ('delete-all')",
+        f"INSERT INTO {indice}(rowid, {', '.join(columnas)}) SELECT id, {_valores_busqueda(columnas, tabla)} FROM {tabla}",
+    ]
+
+for _indice in INDICES_BUSQUEDA:
+    for _sentencia in sql_indice_busqueda(_indice):
+        event.listen(db.metadata, 'after_create', DDL(_sentencia).execute_if(dialect='sqlite'))
+    event.listen(db.metadata, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_indice}').execute_if(dialect='sqlite'))
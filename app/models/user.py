@@ -1,6 +1,8 @@
 # C:/SGPA/app/models/user.py
 from app import db
-from flask_security import UserMixin, RoleMixin
+from flask_security import UserMixin, RoleMixin, SQLAlchemyUserDatastore
+from functools import cached_property
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash
 import uuid
 
@@ -60,6 +62,34 @@ class User(db.Model, UserMixin):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
 
+    # El usuario de la sesión se carga una vez por petición; los nombres de sus
+    # roles se calculan una sola vez para todos los has_role de vistas y plantillas.
+    @cached_property
+    def nombres_roles(self):
+        return frozenset(role.name for role in self.roles)
+
+    def has_role(self, role):
+        if isinstance(role, str):
+            return role in self.nombres_roles
+        return super().has_role(role)
+
+    @property
+    def planta_codigo(self):
+        return self.planta.codigo if self.planta else None
+
+class UserDatastoreSGPA(SQLAlchemyUserDatastore):
+    """
+    Datastore de Flask-Security que carga el usuario de la sesión junto con sus
+    roles y su planta en una sola consulta.
+    """
+
+    def find_user(self, case_insensitive=False, **kwargs):
+        if not case_insensitive and len(kwargs) == 1 and 'fs_uniquifier' in kwargs:
+            return self.user_model.query.options(
+                joinedload(self.user_model.roles), joinedload(self.user_model.planta)
+            ).filter_by(fs_uniquifier=kwargs['fs_uniquifier']).first()
+        return super().find_user(case_insensitive, **kwargs)
+
 class Planta(db.Model):
     """Modelo para las plantas desmotadoras."""
     __tablename__ = 'planta'
@@ -1,8 +1,12 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from flask_security import login_required, roles_accepted, current_user
 from app import db
-from app.forms import ProductorForm
+from app.forms import ProductorForm, ImportarProductoresForm
 from app.models.operaciones import Productor
+from app.utils.cache_vistas import fragmento, respuesta_condicional
+from app.utils.directorio import directorio_productores
+from app.utils import importacion
+from app.utils.trabajos import encolar, guardar_archivo
 
 # Usamos un prefijo de URL para todas las rutas de este blueprint
 bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -10,13 +14,18 @@ bp = Blueprint('admin', __name__, url_prefix='/admin')
 @bp.route('/productores')
 @login_required
 @roles_accepted('Administrativo', 'AdminPlanta', 'CasaCentral')
+@respuesta_condicional('comunes')
 def listar_productores():
     """Muestra una lista paginada de productores."""
-    page = request.args.get('page', 1, type=int)
-    productores = Productor.query.order_by(Productor.nombre_completo).paginate(
-        page=page, per_page=10
-    )
-    return render_template('admin/lista_productores.html', title='Gestión de Productores', productores=productores)
+    def contexto():
+        page = request.args.get('page', 1, type=int)
+        productores = Productor.query.order_by(Productor.nombre_completo).paginate(
+            page=page, per_page=10
+        )
+        return {'productores': productores}
+
+    return render_template('admin/lista_productores.html', title='Gestión de Productores',
+                           tabla=fragmento('admin/_tabla_productores.html', contexto))
 
 @bp.route('/productor/nuevo', methods=['GET', 'POST'])
 @login_required
@@ -35,6 +44,7 @@ def nuevo_productor():
         )
         db.session.add(nuevo)
         db.session.commit()
+        directorio_productores.invalidar()
         flash('Productor creado exitosamente.', 'success')
         return redirect(url_for('admin.listar_productores'))
     return render_template('admin/form_productor.html', title='Nuevo Productor', form=form)
@@ -54,6 +64,38 @@ def editar_productor(id):
         productor.telefono = form.telefono.data
         productor.email = form.email.data
         db.session.commit()
+        directorio_productores.invalidar()
         flash('Productor actualizado exitosamente.', 'success')
         return redirect(url_for('admin.listar_productores'))
-    return render_template('admin/form_productor.html', title='Editar Productor', form=form)
\ No newline at end of file
+    return render_template('admin/form_productor.html', title='Editar Productor', form=form)
+
+@bp.route('/productores/importar', methods=['GET', 'POST'])
+@login_required
+@roles_accepted('Administrativo', 'AdminPlanta', 'CasaCentral')
+def importar_productores():
+    """Carga masiva de productores desde un CSV o XLSX, con el detalle de las filas rechazadas."""
+    form = ImportarProductoresForm()
+    resultado = None
+    if form.validate_on_submit():
+        archivo = form.archivo.data
+        if (request.content_length or 0) > current_app.config.get('TRABAJOS_IMPORTACION_BYTES', 1000000):
+            # Un padrón grande se importa en segundo plano para no retener la petición
+            trabajo = encolar('importar_productores', {
+                'ruta': guardar_archivo(archivo), 'nombre_archivo': archivo.filename, 'actualizar': form.actualizar.data,
+            }, usuario_id=current_user.id, planta_id=current_user.planta_id)
+            flash(
+                f'El archivo se importará en segundo plano (trabajo {trabajo.id}). '
+                f'El resultado se consulta en {url_for("trabajos.estado_trabajo", id=trabajo.id)}.', 'info'
+            )
+            return redirect(url_for('admin.listar_productores'))
+        try:
+            resultado = importacion.importar_productores(archivo.stream, archivo.filename, actualizar=form.actualizar.data)
+        except ValueError as e:
+            flash(str(e), 'danger')
+        else:
+            flash(
+                f'Importación finalizada: {resultado.creados} creados, {resultado.actualizados} actualizados, '
+                f'{resultado.sin_cambios} sin cambios y {len(resultado.errores)} filas con errores.',
+                'warning' if resultado.errores else 'success'
+            )
+    return render_template('admin/importar_productores.html', title='Importar Productores', form=form, resultado=resultado)
@@ -1,8 +1,12 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_security import login_required, roles_accepted, current_user
+from sqlalchemy.orm import joinedload
 from app import db
 from app.forms import DesmotadoForm
 from app.models.operaciones import Carga, ProcesoDesmotado
+from app.utils.resumenes import acumular_proceso
+from app.utils.cache_vistas import fragmento, respuesta_condicional
+from app.utils.paginacion import paginar_por_clave
 
 bp = Blueprint('desmotado', __name__, url_prefix='/desmotado')
 
@@ -10,21 +14,28 @@ bp = Blueprint('desmotado', __name__, url_prefix='/desmotado')
 @bp.route('/pendientes')
 @login_required
 @roles_accepted('Administrativo', 'AdminPlanta', 'CasaCentral')
+@respuesta_condicional()
 def lotes_pendientes():  # Antes se llamaba listar_lotes_pendientes
     """Muestra los lotes que han completado el pesaje y están pendientes de desmotar."""
-    page = request.args.get('page', 1, type=int)
-    
-    query = Carga.query.filter(
-        Carga.estado == 'Completado',
-        Carga.proceso_desmotado == None
-    )
+    def contexto():
+        # El productor se muestra en cada fila: se carga en la misma consulta.
+        query = Carga.query.options(joinedload(Carga.productor)).filter(
+            Carga.estado == 'Completado',
+            Carga.proceso_desmotado == None
+        )
 
-    if not current_user.has_role('CasaCentral'):
-        query = query.filter(Carga.planta_id == current_user.planta_id)
+        if not current_user.has_role('CasaCentral'):
+            query = query.filter(Carga.planta_id == current_user.planta_id)
 
-    lotes = query.order_by(Carga.fecha_salida.asc()).paginate(page=page, per_page=10)
-    
-    return render_template('desmotado/lista_lotes_pendientes.html', title='Lotes Pendientes de Desmotar', lotes=lotes)
+        lotes = paginar_por_clave(
+            query, Carga.fecha_salida, Carga.id,
+            despues=request.args.get('despues'), antes=request.args.get('antes'),
+            per_page=10, descendente=False
+        )
+        return {'lotes': lotes}
+
+    return render_template('desmotado/lista_lotes_pendientes.html', title='Lotes Pendientes de Desmotar',
+                           tabla=fragmento('desmotado/_tabla_lotes_pendientes.html', contexto))
 
 
 # --- NOMBRE DE FUNCIÓN ACTUALIZADO ---
@@ -51,6 +62,7 @@ def registrar_proceso(carga_id):  # Antes se llamaba procesar_lote
         carga.estado = 'Procesado'
         
         db.session.add(proceso)
+        acumular_proceso(carga, proceso)
         db.session.commit()
         
         flash(f'El lote {carga.lote_id} ha sido procesado exitosamente.', 'success')
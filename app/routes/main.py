@@ -1,48 +1,82 @@
-from flask import Blueprint, render_template
-from flask_security import login_required, current_user
-from sqlalchemy import func, case
-from app import db
-from app.models.operaciones import Carga, Productor, ProcesoDesmotado
-from datetime import datetime, timedelta
+from datetime import datetime
+from flask import Blueprint, render_template, current_app, request, abort
+from flask_security import login_required, roles_accepted, current_user
+from app.models.operaciones import Productor
+from app.models.user import Planta
+from app.utils.cache_vistas import fragmento, respuesta_condicional
+from app.utils.cubo import AGRUPACIONES, BANDAS_HUMEDAD, reporte_comparativo as calcular_reporte_comparativo
+from app.utils.directorio import _solo_digitos
+from app.utils.importacion import formatear_cuit
+from app.utils.resumenes import kpis_corporativos
 
 bp = Blueprint('main', __name__)
 
 @bp.route('/')
 @login_required
+@respuesta_condicional()
 def index():
     """
     Página principal o Dashboard.
     Renderiza una plantilla diferente según el rol del usuario actual.
     """
-    # --- LÍNEA DE DEPURACIÓN AÑADIDA ---
-    # Imprime los roles del usuario actual en la terminal para verificar.
-    print(f"DEBUG: Usuario '{current_user.email}' tiene los roles: {[role.name for role in current_user.roles]}")
+    current_app.logger.debug("Usuario '%s' con roles %s", current_user.email, sorted(current_user.nombres_roles))
 
     if current_user.has_role('CasaCentral'):
-        # --- KPIs para el Dashboard Corporativo ---
-        hoy = datetime.utcnow()
-        hace_30_dias = hoy - timedelta(days=30)
-
-        # Producción total de fibra en los últimos 30 días
-        produccion_total = db.session.query(func.sum(ProcesoDesmotado.kilos_fibra)).filter(
-            ProcesoDesmotado.fecha_proceso >= hace_30_dias
-        ).scalar() or 0
-
-        # Cantidad de productores activos
-        productores_activos = Productor.query.filter_by(activo=True).count()
-
-        # Rendimiento promedio ponderado
-        total_fibra = db.session.query(func.sum(ProcesoDesmotado.kilos_fibra)).scalar() or 0
-        total_neto = db.session.query(func.sum(Carga.peso_neto)).join(ProcesoDesmotado).scalar() or 0
-        rendimiento_promedio = (total_fibra / total_neto * 100) if total_neto > 0 else 0
-
-        kpis = {
-            'produccion_total': f"{produccion_total / 1000:.2f} Ton", # Convertir a toneladas
-            'productores_activos': productores_activos,
-            'rendimiento_promedio': f"{rendimiento_promedio:.2f}%"
-        }
-        return render_template('dashboard_central.html', title='Dashboard Corporativo', kpis=kpis)
+        def contexto():
+            # --- KPIs para el Dashboard Corporativo ---
+            # Se leen los resúmenes diarios por planta, no el historial de cargas
+            resumen = kpis_corporativos(dias=30)
+            produccion_total = resumen['produccion_fibra']
+            rendimiento_promedio = resumen['rendimiento']
+            # Cantidad de productores activos (contador mantenido por disparadores)
+            productores_activos = resumen['productores_activos']
+
+            kpis = {
+                'produccion_total': f"{produccion_total / 1000:.2f} Ton", # Convertir a toneladas
+                'productores_activos': productores_activos,
+                'rendimiento_promedio': f"{rendimiento_promedio:.2f}%"
+            }
+            return {'kpis': kpis}
+
+        return render_template('dashboard_central.html', title='Dashboard Corporativo',
+                               indicadores=fragmento('_kpis_central.html', contexto))
 
     else:
         # Dashboard para Balancero y Administrativo
-        return render_template('dashboard_operario.html', title='Dashboard de Operaciones')
\ No newline at end of file
+        return render_template('dashboard_operario.html', title='Dashboard de Operaciones')
+
+@bp.route('/reportes/comparativo')
+@login_required
+@roles_accepted('CasaCentral')
+def reporte_comparativo():
+    """
+    Reporte Comparativo de Plantas: kilos procesados y rendimiento de fibra y
+    semilla agrupados por planta, semana, banda de humedad o productor.
+    Se calcula sobre el cubo precalculado, no sobre el historial de cargas.
+    """
+    agrupar = request.args.get('agrupar', 'planta')
+    if agrupar not in AGRUPACIONES:
+        abort(400)
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d') if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d') if request.args.get('hasta') else None
+    except ValueError:
+        abort(400)
+    banda = request.args.get('banda', type=int)
+
+    productor = None
+    cuit = _solo_digitos(request.args.get('cuit', ''))
+    if cuit:
+        productor = Productor.query.filter_by(cuit=formatear_cuit(cuit)).first() if len(cuit) == 11 else None
+        if productor is None:
+            abort(404)
+
+    filas, total = calcular_reporte_comparativo(
+        agrupar, desde, hasta, request.args.get('planta', type=int),
+        productor.id if productor else None, banda,
+    )
+    return render_template(
+        'reporte_comparativo.html', title='Reporte Comparativo de Plantas', filas=filas, total=total,
+        agrupar=agrupar, plantas=Planta.query.order_by(Planta.codigo).all(), bandas=BANDAS_HUMEDAD,
+        productor=productor,
+    )
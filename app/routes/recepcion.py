@@ -1,10 +1,22 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, Response, abort, stream_with_context
 from flask_security import login_required, roles_accepted, current_user
+from sqlalchemy.orm import joinedload
 from app import db
-from app.forms import CargaEntradaForm, CargaSalidaForm
-from app.models.operaciones import Carga, Productor, Chofer, Vehiculo
+from app.forms import CargaEntradaForm, CargaSalidaForm, GenerarQrDiaForm, RomaneosRangoForm
+from app.models.operaciones import Carga, Chofer, Vehiculo
 from app.utils.helpers import generar_numero_lote
-from datetime import datetime
+from app.utils.resumenes import acumular_salida
+from app.utils.paginacion import paginar_por_clave
+from app.utils.directorio import directorio_productores
+from app.utils.busqueda import buscar_cargas
+from app.utils.cache_vistas import fragmento, respuesta_condicional
+from app.utils.rs232 import BasculaOcupada, obtener_lector
+from app.utils.exportacion import FORMATOS, filas_exportacion
+from app.utils.romaneos import obtener_romaneo
+from app.utils.trabajos import datos_trabajo, encolar
+from datetime import date, datetime, timedelta
+import json
+import time
 
 # Definimos el Blueprint para este módulo
 bp = Blueprint('recepcion', __name__, url_prefix='/recepcion')
@@ -15,9 +27,14 @@ bp = Blueprint('recepcion', __name__, url_prefix='/recepcion')
 def nueva_carga():
     """Formulario para registrar la entrada de una nueva carga de algodón."""
     form = CargaEntradaForm()
-    form.productor.choices = [(p.id, f"{p.nombre_completo} ({p.cuit})") for p in Productor.query.filter_by(activo=True).order_by('nombre_completo')]
+    # Solo se envía el productor elegido; el resto se busca con buscar_productores.
+    elegido = directorio_productores.obtener(form.productor.data) if form.productor.data else None
+    form.productor.choices = [(elegido[0], f"{elegido[1]} ({elegido[2]})")] if elegido else []
 
     if form.validate_on_submit():
+        # El número de lote se reserva antes de cualquier otra escritura.
+        lote = generar_numero_lote(current_user.planta_codigo)
+
         chofer = Chofer.query.filter_by(dni=form.chofer_dni.data).first()
         if not chofer:
             chofer = Chofer(nombre_completo=form.chofer_nombre.data, dni=form.chofer_dni.data)
@@ -28,8 +45,6 @@ def nueva_carga():
             vehiculo = Vehiculo(placa=form.vehiculo_placa.data)
             db.session.add(vehiculo)
 
-        lote = generar_numero_lote(current_user.planta.codigo)
-
         nueva_carga = Carga(
             lote_id=lote,
             planta_id=current_user.planta_id,
@@ -53,6 +68,95 @@ def nueva_carga():
     return render_template('recepcion/form_carga.html', title='Registrar Entrada de Carga', form=form)
 
 
+@bp.route('/productores/buscar')
+@login_required
+@roles_accepted('Balancero', 'Administrativo', 'AdminPlanta', 'CasaCentral')
+def buscar_productores():
+    """Búsqueda de productores activos por nombre o CUIT para el formulario de entrada."""
+    consulta = request.args.get('q', '')
+    return jsonify([
+        {'id': id, 'texto': f"{nombre} ({cuit})"}
+        for id, nombre, cuit in directorio_productores.buscar(consulta)
+    ])
+
+
+def _lector_bascula(numero_bascula):
+    """
+    Retorna (lector, None), o (None, respuesta 409) si el puerto lo tiene otro
+    proceso del servidor: con la báscula real solo uno puede leerla.
+    """
+    try:
+        return obtener_lector(numero_bascula, current_app.config), None
+    except BasculaOcupada as e:
+        return None, (jsonify({'error': str(e)}), 409)
+
+
+@bp.route('/bascula/<int:numero_bascula>/peso')
+@login_required
+@roles_accepted('Balancero', 'Administrativo', 'AdminPlanta', 'CasaCentral')
+def peso_bascula(numero_bascula):
+    """Último peso estable de la báscula, tomado del lector en segundo plano (sin E/S)."""
+    lector, error = _lector_bascula(numero_bascula)
+    if error:
+        return error
+    if lector is None:
+        return jsonify({'error': f'La báscula {numero_bascula} no está configurada.'}), 404
+    ultima = lector.ultima_lectura
+    return jsonify({
+        'bascula': numero_bascula,
+        'peso_estable': lector.peso_estable(max_antiguedad=5),
+        'peso_actual': ultima[1] if ultima else None,
+        'estable': ultima[2] if ultima else False,
+    })
+
+
+def _eventos_bascula(lector, intervalo_minimo, duracion):
+    """
+    Genera los eventos SSE con el peso de la báscula. Envía como máximo una
+    actualización cada 'intervalo_minimo' segundos (salvo cambios de
+    estabilidad) y cierra tras 'duracion' segundos; el navegador reconecta solo.
+    """
+    yield 'retry: 2000\n\n'
+    version, enviado, ultimo_estable = -1, 0.0, None
+    fin = time.monotonic() + duracion
+    while time.monotonic() < fin:
+        version, lectura = lector.esperar_lectura(version, timeout=15)
+        if lectura is None:
+            yield ': sin lecturas\n\n'
+            continue
+        _, peso, estable = lectura
+        ahora = time.monotonic()
+        if estable == ultimo_estable and ahora - enviado < intervalo_minimo:
+            continue
+        enviado, ultimo_estable = ahora, estable
+        datos = {'peso': peso, 'estable': estable, 'peso_estable': lector.peso_estable(max_antiguedad=5)}
+        yield f"data: {json.dumps(datos)}\n\n"
+
+
+@bp.route('/bascula/<int:numero_bascula>/stream')
+@login_required
+@roles_accepted('Balancero', 'Administrativo', 'AdminPlanta', 'CasaCentral')
+def stream_bascula(numero_bascula):
+    """Transmite el peso de la báscula por Server-Sent Events a los formularios de pesaje."""
+    lector, error = _lector_bascula(numero_bascula)
+    if error:
+        return error
+    if lector is None:
+        return jsonify({'error': f'La báscula {numero_bascula} no está configurada.'}), 404
+
+    # La transmisión no usa la base: se libera la conexión antes de empezar.
+    db.session.remove()
+    eventos = _eventos_bascula(
+        lector,
+        current_app.config.get('BASCULAS_SSE_INTERVALO', 0.25),
+        current_app.config.get('BASCULAS_SSE_DURACION', 300),
+    )
+    return Response(eventos, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 @bp.route('/registrar_salida/<int:carga_id>', methods=['GET', 'POST'])
 @login_required
 @roles_accepted('Balancero', 'Administrativo', 'AdminPlanta', 'CasaCentral')
@@ -72,26 +176,152 @@ def registrar_salida(carga_id):
         carga.fecha_salida = datetime.utcnow()
         carga.usuario_salida_id = current_user.id
         carga.estado = 'Completado'
+        acumular_salida(carga)
         
         db.session.commit()
+        # El romaneo se dibuja en la cola de trabajos para que esté listo al imprimirlo;
+        # si no se puede encargar, se dibuja al pedirlo y la salida no se pierde.
+        try:
+            encolar('romaneo', {'carga_id': carga.id}, usuario_id=current_user.id, planta_id=carga.planta_id)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("No se pudo encargar el romaneo del lote %s", carga.lote_id)
         flash(f'Salida del lote {carga.lote_id} registrada. Peso neto calculado: {carga.peso_neto:.2f} kg.', 'success')
         return redirect(url_for('recepcion.listar_cargas'))
 
     return render_template('recepcion/form_salida.html', title=f'Registrar Salida Lote {carga.lote_id}', form=form, carga=carga)
 
 
+@bp.route('/romaneo/<int:carga_id>')
+@login_required
+def romaneo_pdf(carga_id):
+    """Romaneo (ticket de pesaje) de una carga en PDF."""
+    carga = Carga.query.get_or_404(carga_id)
+    if not current_user.has_role('CasaCentral') and carga.planta_id != current_user.planta_id:
+        abort(403)
+    pdf = obtener_romaneo(carga_id)
+    return Response(pdf, mimetype='application/pdf', headers={
+        'Content-Disposition': f'inline; filename=romaneo-{carga.lote_id}.pdf'
+    })
+
+@bp.route('/romaneos', methods=['POST'])
+@login_required
+@roles_accepted('Administrativo', 'AdminPlanta', 'CasaCentral')
+def romaneos_pdf():
+    """
+    Encola un único PDF con los romaneos de un rango de fechas de entrada
+    (campos 'desde' y 'hasta', a lo sumo ROMANEO_RANGO_MAXIMO_DIAS días) y
+    responde 202 con el trabajo; al terminar, el PDF se descarga de
+    /trabajos/<id>/archivo.
+    """
+    form = RomaneosRangoForm()
+    if not form.validate_on_submit():
+        return jsonify(errores=form.errors), 400
+    desde = form.desde.data
+    hasta = form.hasta.data or desde
+    maximo = current_app.config.get('ROMANEO_RANGO_MAXIMO_DIAS', 31)
+    if hasta < desde or (hasta - desde).days >= maximo:
+        return jsonify(errores={'hasta': [f'El rango debe tener entre 1 y {maximo} días.']}), 400
+    planta_id = None if current_user.has_role('CasaCentral') else current_user.planta_id
+    trabajo = encolar(
+        'romaneos_rango', {'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'planta_id': planta_id},
+        usuario_id=current_user.id, planta_id=planta_id,
+    )
+    return jsonify(datos_trabajo(trabajo)), 202, {'Location': url_for('trabajos.estado_trabajo', id=trabajo.id)}
+
+@bp.route('/qr/dia', methods=['POST'])
+@login_required
+@roles_accepted('Administrativo', 'AdminPlanta', 'CasaCentral')
+def generar_qr_dia():
+    """
+    Encola la generación de los QR de los lotes ingresados en un día (campo
+    'fecha', por defecto hoy) y responde 202 con el trabajo; su estado se
+    consulta en la URL de la cabecera Location.
+    """
+    form = GenerarQrDiaForm()
+    if not form.validate_on_submit():
+        return jsonify(errores=form.errors), 400
+    if current_user.has_role('CasaCentral'):
+        planta_id = request.form.get('planta', type=int)
+    else:
+        planta_id = current_user.planta_id
+    trabajo = encolar(
+        'qr_del_dia', {'fecha': (form.fecha.data or date.today()).isoformat(), 'planta_id': planta_id},
+        usuario_id=current_user.id, planta_id=planta_id,
+    )
+    return jsonify(datos_trabajo(trabajo)), 202, {'Location': url_for('trabajos.estado_trabajo', id=trabajo.id)}
+
+@bp.route('/exportar')
+@login_required
+@roles_accepted('Administrativo', 'AdminPlanta', 'CasaCentral')
+def exportar_cargas():
+    """
+    Exporta el historial de cargas y procesos a CSV o XLSX (?formato=csv|xlsx),
+    filtrando por fechas de entrada (desde/hasta, AAAA-MM-DD), estado y planta.
+    El archivo se envía a medida que se genera.
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS:
+        abort(400)
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d') if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('hasta') else None
+    except ValueError:
+        abort(400)
+    if current_user.has_role('CasaCentral'):
+        planta_id = request.args.get('planta', type=int)
+    else:
+        planta_id = current_user.planta_id
+
+    generar, content_type = FORMATOS[formato]
+    filas = filas_exportacion(planta_id, desde, hasta, request.args.get('estado') or None)
+    nombre = f"cargas-{datetime.now():%Y%m%d-%H%M}.{formato}"
+    return Response(stream_with_context(generar(filas)), content_type=content_type, headers={
+        'Content-Disposition': f'attachment; filename={nombre}'
+    })
+
 @bp.route('/')
 @login_required
+@respuesta_condicional()
 def listar_cargas():
-    """Muestra una lista paginada de las cargas recibidas."""
-    page = request.args.get('page', 1, type=int)
+    """Muestra una lista paginada (por cursor) de las cargas recibidas."""
+    q = request.args.get('q', '').strip()
 
-    query = Carga.query
-    if not current_user.has_role('CasaCentral'):
-        query = query.filter_by(planta_id=current_user.planta_id)
+    def contexto():
+        if q:
+            # Con texto de búsqueda se muestran las coincidencias por relevancia, sin paginar
+            planta_id = None if current_user.has_role('CasaCentral') else current_user.planta_id
+            return {'q': q, 'cargas': None, 'filas': buscar_cargas(q, planta_id=planta_id)}
 
-    cargas = query.order_by(Carga.fecha_entrada.desc()).paginate(
-        page=page, per_page=10
-    )
-    return render_template('recepcion/lista_cargas.html', title='Historial de Cargas', cargas=cargas)
+        # La plantilla muestra productor y placa en cada fila: se cargan en la misma consulta.
+        query = Carga.query.options(joinedload(Carga.productor), joinedload(Carga.vehiculo))
+        if not current_user.has_role('CasaCentral'):
+            query = query.filter_by(planta_id=current_user.planta_id)
+        cargas = paginar_por_clave(
+            query, Carga.fecha_entrada, Carga.id,
+            despues=request.args.get('despues'), antes=request.args.get('antes'), per_page=10
+        )
+        return {'q': q, 'cargas': cargas, 'filas': [(carga, None) for carga in cargas.items]}
+
+    return render_template('recepcion/lista_cargas.html', title='Historial de Cargas', q=q,
+                           tabla=fragmento('recepcion/_tabla_cargas.html', contexto))
+
+
+@bp.route('/cargas/buscar')
+@login_required
+@roles_accepted('Balancero', 'Administrativo', 'AdminPlanta', 'CasaCentral')
+def buscar_cargas_json():
+    """Búsqueda de cargas por fragmentos de lote, DTV, placas, chofer o productor, por relevancia."""
+    planta_id = None if current_user.has_role('CasaCentral') else current_user.planta_id
+    limite = min(request.args.get('limite', 20, type=int), 100)
+    return jsonify([
+        {
+            'id': carga.id, 'lote_id': carga.lote_id, 'motivo': motivo,
+            'fecha_entrada': carga.fecha_entrada.isoformat(),
+            'productor': carga.productor.nombre_completo, 'placa': carga.vehiculo.placa,
+            'placa_acoplado': carga.placa_acoplado, 'dtv': carga.dtv,
+            'chofer': carga.chofer.nombre_completo, 'estado': carga.estado,
+        }
+        for carga, motivo in buscar_cargas(request.args.get('q', ''), planta_id=planta_id, limite=limite)
+    ])
 
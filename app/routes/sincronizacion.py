@@ -0,0 +1,30 @@
+import hmac
+from flask import Blueprint, abort, current_app, jsonify, request
+from app.utils.sincronizacion import aplicar_lote
+
+# Recepción en casa central de los cambios enviados por las plantas
+bp = Blueprint('sincronizacion', __name__, url_prefix='/sincronizacion')
+
+@bp.route('/cambios', methods=['POST'])
+def recibir_cambios():
+    """
+    Aplica un lote de cambios de una planta (JSON comprimido con gzip).
+    Se autentica con "Authorization: Bearer <SINCRONIZACION_TOKEN>"; sin
+    token configurado, casa central no recibe cambios.
+    """
+    token = current_app.config.get('SINCRONIZACION_TOKEN')
+    if not token:
+        abort(404)
+    # Comparación en tiempo constante: el tiempo de respuesta no revela cuánto del token coincide
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return jsonify(error='Token de sincronización inválido.'), 401
+    try:
+        resultado = aplicar_lote(request.get_data())
+    except ValueError as error:
+        current_app.logger.warning("Lote de sincronización rechazado: %s", error)
+        return jsonify(error=str(error)), 409
+    current_app.logger.info(
+        "Lote de %s: %d aplicados, %d descartados, %d repetidos (hasta %d)",
+        resultado['origen'], resultado['aplicados'], resultado['descartados'], resultado['repetidos'], resultado['hasta']
+    )
+    return jsonify(resultado)
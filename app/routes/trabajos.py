@@ -0,0 +1,49 @@
+from flask import Blueprint, abort, jsonify, request, send_from_directory
+from flask_security import current_user, login_required
+from app import db
+from app.models.operaciones import Trabajo
+from app.utils.trabajos import TERMINADO, carpeta_trabajos, datos_trabajo
+
+# Estado de los trabajos en segundo plano encolados desde las vistas
+bp = Blueprint('trabajos', __name__, url_prefix='/trabajos')
+
+def _obtener_visible(id):
+    """El trabajo si el usuario puede verlo (lo encoló él, es de su planta y es AdminPlanta, o es Casa Central); si no, 404."""
+    trabajo = db.session.get(Trabajo, id)
+    if trabajo is None:
+        abort(404)
+    if not (
+        trabajo.usuario_id == current_user.id
+        or current_user.has_role('CasaCentral')
+        or (current_user.has_role('AdminPlanta') and trabajo.planta_id == current_user.planta_id)
+    ):
+        abort(404)
+    return trabajo
+
+@bp.route('/')
+@login_required
+def listar_trabajos():
+    """Últimos trabajos encolados por el usuario (?estado=Pendiente|En curso|Terminado|Fallido&limite=20)."""
+    query = Trabajo.query.filter_by(usuario_id=current_user.id)
+    if request.args.get('estado'):
+        query = query.filter_by(estado=request.args['estado'])
+    limite = min(request.args.get('limite', 20, type=int), 100)
+    return jsonify([datos_trabajo(t) for t in query.order_by(Trabajo.id.desc()).limit(limite)])
+
+@bp.route('/<int:id>')
+@login_required
+def estado_trabajo(id):
+    """Estado, intentos y resultado (o error) de un trabajo."""
+    return jsonify(datos_trabajo(_obtener_visible(id)))
+
+@bp.route('/<int:id>/archivo')
+@login_required
+def descargar_archivo(id):
+    """Archivo generado por un trabajo terminado (ej. el PDF de romaneos_rango); 404 si no generó ninguno."""
+    trabajo = _obtener_visible(id)
+    resultado = datos_trabajo(trabajo)['resultado'] or {}
+    if trabajo.estado != TERMINADO or not resultado.get('descarga'):
+        abort(404)
+    nombre = resultado['descarga']
+    # El prefijo uuid solo evita choques en la carpeta de trabajos
+    return send_from_directory(carpeta_trabajos(), nombre, download_name=nombre.split('-', 1)[-1])
@@ -0,0 +1,47 @@
+/* C:/SGPA/static/js/bascula.js */
+// Peso en vivo de la báscula por Server-Sent Events para los formularios de pesaje.
+// Uso: <div data-bascula-en-vivo data-url="/recepcion/bascula/0/stream"
+//           data-campo="peso_bruto" data-numero-campo="numero_bascula" ...>
+(function () {
+    function iniciar(contenedor) {
+        const campo = document.getElementById(contenedor.dataset.campo);
+        const campoNumero = contenedor.dataset.numeroCampo ? document.getElementById(contenedor.dataset.numeroCampo) : null;
+        const lectura = contenedor.querySelector('.lectura-bascula');
+        const estado = contenedor.querySelector('.estado-bascula');
+        const boton = contenedor.querySelector('.usar-peso-bascula');
+        let fuente = null;
+        let pesoEstable = null;
+
+        function numeroBascula() {
+            return (campoNumero && campoNumero.value) || contenedor.dataset.numero || '1';
+        }
+
+        function conectar() {
+            if (fuente) { fuente.close(); }
+            const url = contenedor.dataset.url.replace('/0/', '/' + encodeURIComponent(numeroBascula()) + '/');
+            fuente = new EventSource(url);
+            fuente.onmessage = function (evento) {
+                const datos = JSON.parse(evento.data);
+                pesoEstable = datos.peso_estable;
+                lectura.textContent = datos.peso.toFixed(1) + ' kg';
+                estado.textContent = datos.estable ? 'Estable' : 'Inestable';
+                estado.className = 'estado-bascula badge ' + (datos.estable ? 'bg-success' : 'bg-warning text-dark');
+                boton.disabled = pesoEstable === null;
+            };
+            fuente.onerror = function () {
+                estado.textContent = 'Sin conexión';
+                estado.className = 'estado-bascula badge bg-secondary';
+                boton.disabled = true;
+            };
+        }
+
+        boton.addEventListener('click', function () {
+            if (pesoEstable !== null) { campo.value = pesoEstable.toFixed(1); }
+        });
+        if (campoNumero) { campoNumero.addEventListener('change', conectar); }
+        window.addEventListener('beforeunload', function () { if (fuente) { fuente.close(); } });
+        conectar();
+    }
+
+    document.querySelectorAll('[data-bascula-en-vivo]').forEach(iniciar);
+})();
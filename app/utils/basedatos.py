@@ -0,0 +1,68 @@
+# C:/SGPA/app/utils/basedatos.py
+import os
+import weakref
+from sqlalchemy import event
+
+# Motores SQLite de las apps creadas en este proceso; el WeakSet no impide liberarlos
+_motores = weakref.WeakSet()
+
+def _descartar_conexiones_heredadas():
+    """Un proceso hijo (servidores con varios workers) no debe usar las conexiones del padre."""
+    for motor in list(_motores):
+        motor.dispose(close=False)
+
+if hasattr(os, 'register_at_fork'):
+    # Se registra una sola vez por proceso, no en cada create_app
+    os.register_at_fork(after_in_child=_descartar_conexiones_heredadas)
+
+def es_sqlite(url):
+    return str(url).startswith('sqlite')
+
+def _opciones_motor(config):
+    """
+    Opciones del motor para SQLite: varias conexiones por proceso (una por hilo
+    del servidor) que esperan el lock de escritura en lugar de fallar enseguida.
+    Las opciones de SQLALCHEMY_ENGINE_OPTIONS tienen prioridad.
+    """
+    pragmas = config.get('SQLITE_PRAGMAS') or {}
+    espera = int(pragmas.get('busy_timeout', 5000)) / 1000
+    opciones = {
+        'pool_size': config.get('SQLITE_POOL_TAMANO', 10),
+        'max_overflow': config.get('SQLITE_POOL_EXTRA', 20),
+        'pool_timeout': config.get('SQLITE_POOL_ESPERA', 30),
+        'connect_args': {'timeout': espera, 'check_same_thread': False},
+    }
+    opciones.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return opciones
+
+def aplicar_pragmas(motor, pragmas):
+    """Ejecuta los PRAGMA indicados en cada conexión nueva del motor (solo SQLite)."""
+    if not pragmas or not es_sqlite(motor.url):
+        return
+
+    @event.listens_for(motor, 'connect')
+    def _al_conectar(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        try:
+            for nombre, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nombre}={valor}")
+        finally:
+            cursor.close()
+
+def configurar_motor(app):
+    """
+    Completa SQLALCHEMY_ENGINE_OPTIONS con el perfil de SQLite. Se llama en
+    create_app antes de db.init_app, que es cuando se crea el motor.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if es_sqlite(uri) and ':memory:' not in uri and uri != 'sqlite://':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _opciones_motor(app.config)
+
+def init_basedatos(app, db):
+    """Aplica SQLITE_PRAGMAS a cada conexión del motor de la app (con otra base no hace nada)."""
+    with app.app_context():
+        motor = db.engine
+    if not es_sqlite(motor.url):
+        return
+    aplicar_pragmas(motor, app.config.get('SQLITE_PRAGMAS'))
+    _motores.add(motor)
@@ -0,0 +1,143 @@
+# C:/SGPA/app/utils/busqueda.py
+"""
+Búsqueda de cargas por fragmentos de lote, DTV, placa del acoplado o del
+vehículo, DNI o nombre del chofer y nombre o CUIT del productor, sobre los
+índices FTS5 de app/models/operaciones.py (INDICES_BUSQUEDA).
+
+Cada índice es chico en relación con lo que busca: las cargas indexan solo
+sus propios códigos, y productores, choferes y vehículos se buscan en su
+propio índice y luego se traen sus últimas cargas por ix_carga_<fk>. Así un
+cambio de nombre no reescribe el índice de un millón de cargas. Todas las
+palabras deben aparecer en el mismo dato (la carga, su productor, su chofer
+o su vehículo). En otros motores solo se encuentra el número de lote completo.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.operaciones import Carga, INDICES_BUSQUEDA, sql_reconstruir_indice_busqueda
+from app.utils.basedatos import es_sqlite
+from app.utils.directorio import _normalizar
+
+# Coincidencias en las cargas que se ordenan por relevancia (las más recientes)
+LIMITE_CANDIDATOS = 200
+# Productores, choferes o vehículos encontrados de los que se traen cargas
+LIMITE_ENTIDADES = 20
+# Peso de cada columna en bm25 (la coincidencia en el lote o el DTV pesa más)
+_PESOS = {
+    'busqueda_carga': (10.0, 8.0, 6.0),
+    'busqueda_productor': (2.0, 4.0),
+    'busqueda_chofer': (2.0, 4.0),
+    'busqueda_vehiculo': (6.0,),
+}
+# Índice de cada entidad -> (columna de carga que la referencia, motivo mostrado)
+_ENTIDADES = {
+    'busqueda_productor': ('productor_id', 'Productor'),
+    'busqueda_chofer': ('chofer_id', 'Chofer'),
+    'busqueda_vehiculo': ('vehiculo_id', 'Vehículo'),
+}
+_MOTIVOS_CARGA = ('Lote', 'DTV', 'Acoplado')
+
+def consulta_fts(texto):
+    """
+    Expresión MATCH para 'texto': cada palabra de 3 o más caracteres como
+    frase (el tokenizador de trigramas no encuentra fragmentos más cortos),
+    normalizada igual que el índice. None si no queda ninguna palabra.
+    """
+    normalizado = _normalizar(texto).replace('-', '').replace('.', '')
+    palabras = [p for p in normalizado.split() if len(p) >= 3]
+    if not palabras and len(normalizado.replace(' ', '')) >= 3:
+        # Un código escrito con espacios ("AB 123 CD"): se busca junto, como se indexó
+        palabras = [normalizado.replace(' ', '')]
+    if not palabras:
+        return None
+    return ' AND '.join('"{}"'.format(p.replace('"', '""')) for p in palabras)
+
+def _sql_coincidencias(filtro_planta):
+    """
+    Una sola consulta con las coincidencias de los cuatro índices como
+    (id de carga, puntaje bm25, motivo). Las cargas se recorren por rowid
+    descendente hasta LIMITE_CANDIDATOS (el costo no depende de cuántas
+    coinciden); de productores, choferes y vehículos se toman los
+    LIMITE_ENTIDADES más relevantes y sus cargas más recientes.
+    """
+    pesos = ', '.join(str(p) for p in _PESOS['busqueda_carga'])
+    partes = [f"""
+        SELECT * FROM (
+            SELECT f.rowid AS id, bm25(busqueda_carga, {pesos}) AS puntaje, 'Carga' AS motivo
+            FROM busqueda_carga f JOIN carga c ON c.id = f.rowid
+            WHERE busqueda_carga MATCH :consulta {filtro_planta}
+            ORDER BY f.rowid DESC LIMIT :candidatos
+        )"""]
+    for indice, (columna, motivo) in _ENTIDADES.items():
+        pesos = ', '.join(str(p) for p in _PESOS[indice])
+        partes.append(f"""
+        SELECT * FROM (
+            SELECT c.id, e.puntaje, '{motivo}' AS motivo
+            FROM (
+                SELECT rowid, bm25({indice}, {pesos}) AS puntaje FROM {indice}
+                WHERE {indice} MATCH :consulta ORDER BY puntaje LIMIT :entidades
+            ) e JOIN carga c ON c.{columna} = e.rowid
+            WHERE 1 = 1 {filtro_planta}
+            ORDER BY c.id DESC LIMIT :candidatos
+        )""")
+    return text(' UNION ALL '.join(partes))
+
+def buscar_cargas(texto, planta_id=None, limite=20):
+    """
+    Cargas que coinciden con 'texto', de la más relevante a la menos (a igual
+    relevancia, la más reciente primero), como [(carga, motivo)]. 'motivo'
+    dice en qué dato se encontró. Con 'planta_id' solo se buscan sus cargas.
+    """
+    candidatos = {}
+
+    def anotar(id, puntaje, motivo):
+        if id not in candidatos or puntaje < candidatos[id][0]:
+            candidatos[id] = (puntaje, motivo)
+
+    # Número de lote completo: por el índice único, sin recorrer los índices de texto
+    exacta = Carga.query.filter(Carga.lote_id == texto.strip().upper())
+    if planta_id is not None:
+        exacta = exacta.filter(Carga.planta_id == planta_id)
+    for (id,) in exacta.with_entities(Carga.id):
+        anotar(id, float('-inf'), 'Lote')
+
+    # Los índices de texto existen solo en SQLite; en otros motores se busca solo el lote exacto
+    consulta = consulta_fts(texto) if not candidatos and es_sqlite(db.engine.url) else None
+    if consulta is not None:
+        filtro_planta = 'AND c.planta_id = :planta_id' if planta_id is not None else ''
+        coincidencias = db.session.execute(_sql_coincidencias(filtro_planta), {
+            'consulta': consulta, 'planta_id': planta_id,
+            'candidatos': LIMITE_CANDIDATOS, 'entidades': LIMITE_ENTIDADES,
+        })
+        for id, puntaje, motivo in coincidencias:
+            anotar(id, puntaje, motivo)
+
+    elegidos = sorted(candidatos, key=lambda id: (candidatos[id][0], -id))[:limite]
+    if not elegidos:
+        return []
+    cargas = {c.id: c for c in Carga.query.options(
+        joinedload(Carga.productor), joinedload(Carga.vehiculo), joinedload(Carga.chofer)
+    ).filter(Carga.id.in_(elegidos))}
+    return [(cargas[id], _motivo(cargas[id], candidatos[id][1], texto)) for id in elegidos]
+
+def _motivo(carga, motivo, texto):
+    """Para las coincidencias en la propia carga, indica si fue en el lote, el DTV o el acoplado."""
+    if motivo != 'Carga':
+        return motivo
+    consulta = _normalizar(texto).replace('-', '').replace('.', '')
+    for nombre, valor in zip(_MOTIVOS_CARGA, (carga.lote_id, carga.dtv, carga.placa_acoplado)):
+        compacto = _normalizar(valor).replace('-', '').replace('.', '').replace(' ', '')
+        if any(palabra in compacto for palabra in consulta.split()):
+            return nombre
+    return 'Carga'
+
+def reconstruir_indices_busqueda():
+    """Vuelve a llenar todos los índices de búsqueda desde sus tablas. Retorna las filas indexadas por índice."""
+    totales = {}
+    for indice, (tabla, _) in INDICES_BUSQUEDA.items():
+        for sentencia in sql_reconstruir_indice_busqueda(indice):
+            db.session.execute(text(sentencia))
+        db.session.execute(text(f"INSERT INTO {indice}({indice}) VALUES ('optimize')"))
+        totales[indice] = db.session.execute(text(f'SELECT count(*) FROM {tabla}')).scalar()
+    db.session.commit()
+    return totales
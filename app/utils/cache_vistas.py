@@ -0,0 +1,208 @@
+# C:/SGPA/app/utils/cache_vistas.py
+"""
+Respuestas condicionales y caché de fragmentos para los listados y
+dashboards que la oficina refresca todo el día.
+
+Cada planta tiene una versión de sus datos en version_datos (la fila 0 es la
+de productores, choferes y vehículos, comunes a todas) que sube en la misma
+transacción que cualquier escritura: el flush del ORM la incrementa solo y
+las escrituras masivas (importación de productores, archivo de campañas,
+flask seed) llaman a incrementar_versiones(). Con las versiones que lee la
+vista, en una sola consulta:
+
+- el ETag de la respuesta (por usuario, porque la página muestra su menú)
+  permite contestar 304 sin ejecutar la vista ni renderizar nada;
+- los fragmentos renderizados (la tabla de un listado) se guardan en memoria
+  con clave (vista, planta, argumentos, versiones) y se comparten entre los
+  usuarios de la planta. Un cambio de versión los deja sin uso y salen del
+  caché por antigüedad.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import wraps
+
+from flask import current_app, g, make_response, render_template, request, session
+from flask_security import current_user
+from markupsafe import Markup
+from sqlalchemy import event, select, update
+from app import db
+from app.models.operaciones import Carga, Chofer, ProcesoDesmotado, Productor, Vehiculo, VersionDatos
+from app.models.user import Planta
+from app.utils.helpers import insertar_si_no_existe
+
+# planta_id de la versión de los datos comunes a todas las plantas
+COMUNES = 0
+_MODELOS_COMUNES = (Productor, Chofer, Vehiculo)
+
+# --- Versiones ---
+
+def incrementar_versiones(planta_ids=None, conexion=None):
+    """
+    Sube la versión de las plantas indicadas (COMUNES para productores,
+    choferes y vehículos; None para todas y las comunes). No hace commit: se
+    confirma con la escritura que la provoca. 'conexion' puede ser una
+    conexión propia (por defecto la sesión).
+    """
+    conexion = conexion if conexion is not None else db.session
+    tabla = VersionDatos.__table__
+    if planta_ids is None:
+        planta_ids = [COMUNES] + list(conexion.execute(select(Planta.id)).scalars())
+    ahora = datetime.utcnow()
+    for planta_id in sorted(set(planta_ids)):
+        subir = update(tabla).where(tabla.c.planta_id == planta_id).values(version=tabla.c.version + 1, fecha=ahora)
+        if conexion.execute(subir).rowcount == 0 and not insertar_si_no_existe(
+            conexion, tabla, planta_id=planta_id, version=1, fecha=ahora
+        ):
+            conexion.execute(subir)
+
+def _registrar_escrituras(session, contexto):
+    """after_flush: sube la versión de las plantas cuyas cargas, procesos o datos comunes cambiaron."""
+    plantas, cargas = set(), set()
+    modificados = [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+    for objeto in (*session.new, *modificados, *session.deleted):
+        if isinstance(objeto, Carga):
+            plantas.add(objeto.planta_id)
+        elif isinstance(objeto, ProcesoDesmotado):
+            cargas.add(objeto.carga_id)
+        elif isinstance(objeto, _MODELOS_COMUNES):
+            plantas.add(COMUNES)
+        elif isinstance(objeto, Planta):
+            plantas.add(objeto.id)
+    conexion = session.connection()
+    if cargas:
+        plantas.update(conexion.execute(select(Carga.planta_id).where(Carga.id.in_(cargas))).scalars())
+    plantas.discard(None)
+    if plantas:
+        incrementar_versiones(plantas, conexion)
+
+def leer_versiones(planta_ids=None):
+    """((planta_id, versión), ...) de las plantas indicadas (None: todas), en una consulta."""
+    consulta = select(VersionDatos.planta_id, VersionDatos.version).order_by(VersionDatos.planta_id)
+    if planta_ids is not None:
+        consulta = consulta.where(VersionDatos.planta_id.in_(planta_ids))
+    return tuple(db.session.execute(consulta).tuples())
+
+# --- Caché de fragmentos ---
+
+class CacheFragmentos:
+    """
+    Fragmentos HTML renderizados, en memoria del proceso, con descarte del
+    menos usado al superar CACHE_FRAGMENTOS_MAXIMO. Las claves llevan las
+    versiones de los datos, así que nunca se invalida nada: lo viejo se descarta solo.
+    """
+
+    def __init__(self):
+        self._fragmentos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            html = self._fragmentos.get(clave)
+            if html is None:
+                self.fallos += 1
+            else:
+                self._fragmentos.move_to_end(clave)
+                self.aciertos += 1
+            return html
+
+    def guardar(self, clave, html, maximo):
+        with self._lock:
+            self._fragmentos[clave] = html
+            self._fragmentos.move_to_end(clave)
+            while len(self._fragmentos) > maximo:
+                self._fragmentos.popitem(last=False)
+
+    def vaciar(self):
+        with self._lock:
+            self._fragmentos.clear()
+
+cache_fragmentos = CacheFragmentos()
+
+def fragmento(plantilla, contexto):
+    """
+    HTML de 'plantilla' renderizada con el diccionario que retorna
+    'contexto()' (donde la vista hace sus consultas), tomado del caché si ya
+    se renderizó con los mismos argumentos y versiones de datos. Solo en
+    vistas con @respuesta_condicional; el fragmento no debe depender del usuario.
+    """
+    maximo = current_app.config.get('CACHE_FRAGMENTOS_MAXIMO', 1000)
+    if 'versiones_datos' not in g or not maximo:
+        return Markup(render_template(plantilla, **contexto()))
+    plantas, versiones = g.versiones_datos
+    clave = (
+        request.endpoint, plantilla, plantas, tuple(sorted(request.args.items(multi=True))),
+        versiones, date.today(),
+    )
+    html = cache_fragmentos.obtener(clave)
+    if html is None:
+        html = Markup(render_template(plantilla, **contexto()))
+        cache_fragmentos.guardar(clave, html, maximo)
+    return html
+
+# --- Respuestas condicionales ---
+
+def _firma_plantillas(app):
+    """Resumen de las fechas y tamaños de las plantillas: al actualizarlas cambian todos los ETag."""
+    firma = hashlib.sha1()
+    for carpeta, _, archivos in sorted(os.walk(os.path.join(app.root_path, app.template_folder))):
+        for nombre in sorted(archivos):
+            estado = os.stat(os.path.join(carpeta, nombre))
+            firma.update(f'{carpeta}/{nombre}:{estado.st_mtime_ns}:{estado.st_size};'.encode())
+    return firma.hexdigest()
+
+def _plantas_del_alcance(alcance):
+    """Plantas cuyas versiones determinan la vista: las comunes y la del usuario (todas para Casa Central)."""
+    if alcance == 'comunes':
+        return (COMUNES,)
+    if current_user.has_role('CasaCentral'):
+        return None
+    return (COMUNES, current_user.planta_id)
+
+def respuesta_condicional(alcance='planta'):
+    """
+    Decorador de vistas GET que dependen solo de los datos versionados y del
+    usuario. 'alcance' es 'planta' (datos de la planta del usuario y
+    comunes; todas las plantas para Casa Central) o 'comunes' (productores,
+    choferes y vehículos). Responde 304 si el navegador ya tiene la página
+    de las mismas versiones; si no, ejecuta la vista y agrega el ETag.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if not current_app.config.get('CACHE_VISTAS_HABILITADO', True):
+                return vista(*args, **kwargs)
+            plantas = _plantas_del_alcance(alcance)
+            g.versiones_datos = (plantas, leer_versiones(plantas))
+            # Una página con mensajes flash se muestra una sola vez: ni 304 ni ETag
+            if '_flashes' in session:
+                return vista(*args, **kwargs)
+
+            etag = hashlib.sha1(repr((
+                request.full_path, current_user.id, getattr(current_user, 'fs_uniquifier', None),
+                sorted(current_user.nombres_roles), current_user.planta_id, g.versiones_datos,
+                date.today(), current_app.extensions.get('firma_plantillas'),
+            )).encode()).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                respuesta = current_app.response_class(status=304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag, weak=True)
+            # El navegador guarda la página pero la revalida en cada visita
+            respuesta.headers['Cache-Control'] = 'private, no-cache'
+            respuesta.vary.add('Cookie')
+            return respuesta
+        return envoltura
+    return decorador
+
+def init_cache_vistas(app):
+    """Conecta el incremento de versiones al flush de las sesiones y firma las plantillas."""
+    app.extensions['firma_plantillas'] = _firma_plantillas(app)
+    if not event.contains(db.session, 'after_flush', _registrar_escrituras):
+        event.listen(db.session, 'after_flush', _registrar_escrituras)
@@ -0,0 +1,104 @@
+# C:/SGPA/app/utils/campanias.py
+"""
+Cierre de campañas: las cargas y procesos de los años terminados pasan a
+carga_archivo y proceso_desmotado_archivo, así las tablas vivas (listados,
+dashboards, numeración de lotes) quedan con el tamaño de una campaña. Los
+reportes históricos leen la vista carga_historica, que une ambas partes.
+"""
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
+from app import db
+from app.models.operaciones import (
+    CampaniaArchivada, Carga, ProcesoDesmotado, carga_archivo, proceso_desmotado_archivo,
+)
+from app.models.user import Planta
+from app.utils.basedatos import es_sqlite
+from app.utils.cache_vistas import incrementar_versiones
+
+def _rango_anio(anio):
+    return datetime(anio, 1, 1), datetime(anio + 1, 1, 1)
+
+def ultima_campania_archivada():
+    """Año de la última campaña archivada (None si no hay ninguna)."""
+    return db.session.query(func.max(CampaniaArchivada.anio)).scalar()
+
+def incluye_archivo(desde):
+    """Indica si un reporte que empieza en 'desde' (None = desde el principio) alcanza campañas archivadas."""
+    ultima = ultima_campania_archivada()
+    return ultima is not None and (desde is None or desde.year <= ultima)
+
+def campanias_vivas():
+    """[(año, cargas, sin procesar)] de las campañas que siguen en las tablas vivas."""
+    anio = db.extract('year', Carga.fecha_entrada)
+    return [
+        (int(a), cargas, pendientes) for a, cargas, pendientes in db.session.query(
+            anio, func.count(Carga.id), func.sum(db.case((Carga.estado != 'Procesado', 1), else_=0))
+        ).group_by(anio).order_by(anio)
+    ]
+
+def cerrar_campania(anio, tamano_lote=5000, progreso=None):
+    """
+    Mueve al archivo las cargas ingresadas en 'anio' y sus procesos, de a
+    'tamano_lote' cargas por transacción (copia y borra en la misma
+    transacción: nunca quedan a medias ni duplicadas). La campaña debe estar
+    terminada y con todos sus lotes procesados. 'progreso' recibe la cantidad
+    de cargas movidas tras cada lote. Retorna (cargas, procesos) movidos.
+    """
+    if anio >= datetime.now().year:
+        raise ValueError(f'La campaña {anio} no terminó: solo se cierran años anteriores al actual.')
+    inicio, fin = _rango_anio(anio)
+    del_anio = and_(Carga.fecha_entrada >= inicio, Carga.fecha_entrada < fin)
+    pendientes = db.session.query(func.count(Carga.id)).filter(del_anio, Carga.estado != 'Procesado').scalar()
+    if pendientes:
+        raise ValueError(f'La campaña {anio} tiene {pendientes} cargas sin procesar.')
+
+    carga, proceso = Carga.__table__, ProcesoDesmotado.__table__
+    columnas_carga = [c.name for c in carga_archivo.columns]
+    columnas_proceso = [c.name for c in proceso_desmotado_archivo.columns]
+    total_cargas = total_procesos = 0
+    for planta_id in [id for (id,) in db.session.query(Planta.id).order_by(Planta.id)]:
+        # Recorrido por (planta, fecha de entrada, id): usa ix_carga_planta_fecha_entrada
+        cursor = (inicio, 0)
+        while True:
+            filas = db.session.execute(
+                select(carga.c.id, carga.c.fecha_entrada)
+                .where(carga.c.planta_id == planta_id, carga.c.fecha_entrada < fin,
+                       or_(carga.c.fecha_entrada > cursor[0],
+                           and_(carga.c.fecha_entrada == cursor[0], carga.c.id > cursor[1])))
+                .order_by(carga.c.fecha_entrada, carga.c.id).limit(tamano_lote)
+            ).all()
+            if not filas:
+                break
+            ids = [id for id, _ in filas]
+            db.session.execute(carga_archivo.insert().from_select(
+                columnas_carga, select(*(carga.c[c] for c in columnas_carga)).where(carga.c.id.in_(ids))
+            ))
+            procesos = db.session.execute(proceso_desmotado_archivo.insert().from_select(
+                columnas_proceso, select(*(proceso.c[c] for c in columnas_proceso)).where(proceso.c.carga_id.in_(ids))
+            )).rowcount
+            db.session.execute(proceso.delete().where(proceso.c.carga_id.in_(ids)))
+            db.session.execute(carga.delete().where(carga.c.id.in_(ids)))
+            incrementar_versiones([planta_id])
+            db.session.commit()
+            total_cargas += len(ids)
+            total_procesos += procesos
+            cursor = (filas[-1][1], filas[-1][0])
+            if progreso:
+                progreso(total_cargas)
+
+    campania = db.session.get(CampaniaArchivada, anio) or CampaniaArchivada(anio=anio, cargas=0, procesos=0)
+    campania.cargas += total_cargas
+    campania.procesos += total_procesos
+    campania.fecha_cierre = datetime.utcnow()
+    db.session.add(campania)
+    db.session.commit()
+    if es_sqlite(db.engine.url):
+        # Estadísticas al día para el planificador de consultas tras el borrado masivo
+        db.session.execute(db.text('PRAGMA optimize'))
+    return total_cargas, total_procesos
+
+def compactar_base():
+    """VACUUM: devuelve al sistema de archivos las páginas liberadas y desfragmenta las tablas vivas."""
+    db.session.remove()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexion:
+        conexion.exec_driver_sql('VACUUM')
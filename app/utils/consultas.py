@@ -0,0 +1,37 @@
+# C:/SGPA/app/utils/consultas.py
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class PresupuestoConsultasExcedido(Exception):
+    """Una vista ejecutó más consultas SQL que las permitidas en PRESUPUESTO_CONSULTAS."""
+
+def _contar_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.consultas_sql = g.get('consultas_sql', 0) + 1
+
+def consultas_de_la_peticion():
+    """Cantidad de consultas SQL ejecutadas hasta ahora en la petición actual."""
+    return g.get('consultas_sql', 0)
+
+def _verificar_presupuesto(response):
+    presupuesto = current_app.config.get('PRESUPUESTO_CONSULTAS', {}).get(request.endpoint)
+    consultas = consultas_de_la_peticion()
+    if presupuesto is None or consultas <= presupuesto:
+        return response
+
+    mensaje = f"{request.endpoint} ejecutó {consultas} consultas SQL (presupuesto: {presupuesto})"
+    if current_app.config.get('PRESUPUESTO_CONSULTAS_ESTRICTO', current_app.testing):
+        # En pruebas un N+1 nuevo debe fallar, no pasar desapercibido.
+        raise PresupuestoConsultasExcedido(mensaje)
+    current_app.logger.warning(mensaje)
+    return response
+
+def init_contador_consultas(app):
+    """
+    Cuenta las consultas SQL de cada petición y las compara con el presupuesto
+    configurado por endpoint en PRESUPUESTO_CONSULTAS.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _contar_consulta):
+        event.listen(Engine, 'before_cursor_execute', _contar_consulta)
+    app.after_request(_verificar_presupuesto)
@@ -0,0 +1,202 @@
+# C:/SGPA/app/utils/cubo.py
+"""
+Cubo precalculado del Reporte Comparativo de Plantas.
+
+Cada proceso de desmotado suma su lote a cubo_plantas (planta, semana,
+banda de humedad), a cubo_productores (lo mismo abierto por productor) y a
+los histogramas de rendimiento de cubo_rendimiento, en la misma transacción
+en que se registra. El reporte agrega unas pocas filas del cubo en lugar de
+recorrer todo el historial de cargas; los percentiles salen de sumar
+histogramas. Solo los recortes por productor leen cubo_productores.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, cast, func, literal, select, update
+from app import db
+from app.models.operaciones import CuboPlantas, CuboProductores, CuboRendimiento, Productor, carga_historica
+from app.models.user import Planta
+from app.utils.helpers import insertar_si_no_existe
+
+# Límites superiores de las bandas de humedad (%); la última banda no tiene límite
+LIMITES_HUMEDAD = (8.0, 10.0, 12.0, 14.0)
+BANDAS_HUMEDAD = {-1: 'Sin dato', 0: '< 8 %', 1: '8 a 10 %', 2: '10 a 12 %', 3: '12 a 14 %', 4: '≥ 14 %'}
+# Intervalos de rendimiento por unidad (0,5 %)
+INTERVALOS_POR_UNIDAD = 200
+PERCENTILES = (10, 50, 90)
+AGRUPACIONES = ('planta', 'semana', 'banda', 'productor')
+# Filas del reporte agrupado por productor (los de más kilos)
+LIMITE_PRODUCTORES = 50
+
+def banda_humedad(humedad):
+    if humedad is None:
+        return -1
+    for banda, limite in enumerate(LIMITES_HUMEDAD):
+        if humedad < limite:
+            return banda
+    return len(LIMITES_HUMEDAD)
+
+def semana_de(fecha):
+    """Lunes de la semana de 'fecha'."""
+    dia = fecha.date() if hasattr(fecha, 'date') else fecha
+    return dia - timedelta(days=dia.weekday())
+
+def intervalo_rendimiento(kilos, neto):
+    return min(INTERVALOS_POR_UNIDAD - 1, max(0, int(kilos / neto * INTERVALOS_POR_UNIDAD)))
+
+def _sumar(tabla, claves, incrementos):
+    """Suma los incrementos a la fila de 'claves', creándola si no existe (como los resúmenes diarios)."""
+    insertar_si_no_existe(db.session, tabla, **claves)
+    db.session.execute(
+        update(tabla)
+        .where(and_(*(tabla.c[col] == valor for col, valor in claves.items())))
+        .values({tabla.c[col]: tabla.c[col] + valor for col, valor in incrementos.items()})
+    )
+
+def acumular_cubo(carga, proceso):
+    """Suma al cubo el resultado del desmotado de una carga. No hace commit."""
+    if not carga.peso_neto:
+        return
+    semana, banda = semana_de(proceso.fecha_proceso or datetime.utcnow()), banda_humedad(carga.humedad)
+    kilos = {'lotes': 1, 'kilos_netos': carga.peso_neto, 'kilos_fibra': proceso.kilos_fibra,
+             'kilos_semilla': proceso.kilos_semilla}
+    celda = {'planta_id': carga.planta_id, 'semana': semana, 'banda_humedad': banda}
+    _sumar(CuboPlantas.__table__, celda, kilos)
+    _sumar(CuboProductores.__table__, dict(celda, productor_id=carga.productor_id), kilos)
+    for medida, kilos in (('fibra', proceso.kilos_fibra), ('semilla', proceso.kilos_semilla)):
+        _sumar(
+            CuboRendimiento.__table__,
+            {'planta_id': carga.planta_id, 'semana': semana, 'banda_humedad': banda, 'medida': medida,
+             'intervalo': intervalo_rendimiento(kilos, carga.peso_neto)},
+            {'lotes': 1},
+        )
+
+def reconstruir_cubo():
+    """
+    Recalcula el cubo completo desde carga_historica (campañas vivas y
+    archivadas) con INSERT ... SELECT agrupados. Retorna las filas de cubo_productores.
+    """
+    h = carga_historica.c
+    # Lunes de la semana: el próximo domingo (o el mismo día) menos seis días
+    semana = func.date(h.fecha_proceso, 'weekday 0', '-6 days', type_=db.Date)
+    banda = case(
+        (h.humedad.is_(None), -1),
+        *((h.humedad < limite, banda) for banda, limite in enumerate(LIMITES_HUMEDAD)),
+        else_=len(LIMITES_HUMEDAD),
+    )
+    procesados = and_(h.fecha_proceso.isnot(None), h.peso_neto > 0)
+    rendimiento = CuboRendimiento.__table__
+    sumas = (func.count(), func.sum(h.peso_neto), func.sum(h.kilos_fibra), func.sum(h.kilos_semilla))
+    columnas_sumas = ['lotes', 'kilos_netos', 'kilos_fibra', 'kilos_semilla']
+
+    for tabla in (CuboPlantas.__table__, CuboProductores.__table__, rendimiento):
+        db.session.execute(tabla.delete())
+    db.session.execute(CuboPlantas.__table__.insert().from_select(
+        ['planta_id', 'semana', 'banda_humedad'] + columnas_sumas,
+        select(h.planta_id, semana, banda, *sumas).where(procesados).group_by(h.planta_id, semana, banda)
+    ))
+    db.session.execute(CuboProductores.__table__.insert().from_select(
+        ['planta_id', 'semana', 'productor_id', 'banda_humedad'] + columnas_sumas,
+        select(h.planta_id, semana, h.productor_id, banda, *sumas)
+        .where(procesados).group_by(h.planta_id, semana, h.productor_id, banda)
+    ))
+    for medida, kilos in (('fibra', h.kilos_fibra), ('semilla', h.kilos_semilla)):
+        intervalo = func.min(INTERVALOS_POR_UNIDAD - 1, func.max(0, cast(kilos / h.peso_neto * INTERVALOS_POR_UNIDAD, db.Integer)))
+        db.session.execute(rendimiento.insert().from_select(
+            ['planta_id', 'semana', 'banda_humedad', 'medida', 'intervalo', 'lotes'],
+            select(h.planta_id, semana, banda, literal(medida), intervalo, func.count())
+            .where(procesados).group_by(h.planta_id, semana, banda, intervalo)
+        ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(CuboProductores).scalar()
+
+def percentiles_de_histograma(cuentas, percentiles=PERCENTILES):
+    """Percentiles (en %) a partir de {intervalo: lotes}, tomando el centro del intervalo."""
+    total = sum(cuentas.values())
+    if not total:
+        return {p: None for p in percentiles}
+    resultado, acumulado = {}, 0
+    pendientes = sorted(percentiles)
+    for intervalo in sorted(cuentas):
+        acumulado += cuentas[intervalo]
+        while pendientes and acumulado >= total * pendientes[0] / 100:
+            resultado[pendientes.pop(0)] = (intervalo + 0.5) * 100 / INTERVALOS_POR_UNIDAD
+    return resultado
+
+def _filtros(tabla, desde, hasta, planta_id, banda, productor_id=None):
+    filtros = []
+    if desde is not None:
+        filtros.append(tabla.semana >= semana_de(desde))
+    if hasta is not None:
+        filtros.append(tabla.semana <= semana_de(hasta))
+    if planta_id is not None:
+        filtros.append(tabla.planta_id == planta_id)
+    if banda is not None:
+        filtros.append(tabla.banda_humedad == banda)
+    if productor_id is not None:
+        filtros.append(tabla.productor_id == productor_id)
+    return filtros
+
+def reporte_comparativo(agrupar='planta', desde=None, hasta=None, planta_id=None, productor_id=None, banda=None):
+    """
+    Lotes, kilos y rendimientos de fibra y semilla agrupados por 'agrupar'
+    (planta, semana, banda o productor) para el recorte indicado, más una fila
+    de total. Los percentiles de rendimiento salen de los histogramas, que no
+    se abren por productor: con un productor en el recorte o en la agrupación
+    quedan vacíos.
+    """
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f'Agrupación desconocida: {agrupar}')
+    por_productor = productor_id is not None or agrupar == 'productor'
+    cubo = CuboProductores if por_productor else CuboPlantas
+    columna = {
+        'planta': cubo.planta_id, 'semana': cubo.semana, 'banda': cubo.banda_humedad,
+        'productor': CuboProductores.productor_id,
+    }[agrupar]
+    sumas = (func.sum(cubo.lotes), func.sum(cubo.kilos_netos), func.sum(cubo.kilos_fibra), func.sum(cubo.kilos_semilla))
+    filtros = _filtros(cubo, desde, hasta, planta_id, banda, productor_id)
+    consulta = db.session.query(columna, *sumas).filter(*filtros).group_by(columna)
+    if agrupar == 'productor':
+        consulta = consulta.order_by(func.sum(cubo.kilos_netos).desc()).limit(LIMITE_PRODUCTORES)
+    else:
+        consulta = consulta.order_by(columna)
+    grupos = consulta.all()
+
+    histogramas = {}
+    if not por_productor:
+        clave = {'planta': CuboRendimiento.planta_id, 'semana': CuboRendimiento.semana,
+                 'banda': CuboRendimiento.banda_humedad}[agrupar]
+        for grupo, medida, intervalo, lotes in db.session.query(
+            clave, CuboRendimiento.medida, CuboRendimiento.intervalo, func.sum(CuboRendimiento.lotes)
+        ).filter(*_filtros(CuboRendimiento, desde, hasta, planta_id, banda)).group_by(
+            clave, CuboRendimiento.medida, CuboRendimiento.intervalo
+        ):
+            for destino in (grupo, None):
+                cuentas = histogramas.setdefault((destino, medida), {})
+                cuentas[intervalo] = cuentas.get(intervalo, 0) + lotes
+
+    etiquetas = _etiquetas(agrupar, [g[0] for g in grupos])
+
+    def fila(grupo, etiqueta, lotes, netos, fibra, semilla):
+        return {
+            'grupo': grupo, 'etiqueta': etiqueta, 'lotes': lotes or 0, 'kilos_netos': netos or 0,
+            'kilos_fibra': fibra or 0, 'kilos_semilla': semilla or 0,
+            'rendimiento_fibra': fibra / netos * 100 if netos else None,
+            'rendimiento_semilla': semilla / netos * 100 if netos else None,
+            'percentiles_fibra': percentiles_de_histograma(histogramas.get((grupo, 'fibra'), {})),
+            'percentiles_semilla': percentiles_de_histograma(histogramas.get((grupo, 'semilla'), {})),
+        }
+
+    filas = [fila(g, etiquetas.get(g, g), *valores) for g, *valores in grupos]
+    total = fila(None, 'Total', *(sum(f[clave] for f in filas) for clave in ('lotes', 'kilos_netos', 'kilos_fibra', 'kilos_semilla')))
+    if agrupar == 'productor':
+        # Con el límite de productores, el total se pide aparte para no quedar incompleto
+        total.update(fila(None, 'Total', *db.session.query(*sumas).filter(*filtros).one()))
+    return filas, total
+
+def _etiquetas(agrupar, grupos):
+    if agrupar == 'planta':
+        return {p.id: f'{p.codigo} - {p.nombre}' for p in Planta.query.filter(Planta.id.in_(grupos))}
+    if agrupar == 'productor':
+        return dict(db.session.query(Productor.id, Productor.nombre_completo).filter(Productor.id.in_(grupos)))
+    if agrupar == 'banda':
+        return BANDAS_HUMEDAD
+    return {semana: f"Semana del {semana:%d/%m/%Y}" for semana in grupos}
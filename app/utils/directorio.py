@@ -0,0 +1,119 @@
+# C:/SGPA/app/utils/directorio.py
+import bisect
+import threading
+import time
+import unicodedata
+from flask import current_app
+
+def _normalizar(texto):
+    """Minúsculas y sin acentos, para comparar nombres como los escribe el balancero."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+def _solo_digitos(texto):
+    return ''.join(c for c in (texto or '') if c.isdigit())
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class _IndiceProductores:
+    """Índice inmutable de los productores activos; se reemplaza entero al invalidarse."""
+
+    def __init__(self, productores):
+        self.productores = {p.id: (p.nombre_completo, p.cuit) for p in productores}
+        self.nombres = {id: _normalizar(nombre) for id, (nombre, _) in self.productores.items()}
+        # Listas ordenadas para búsquedas por prefijo con bisect
+        self.palabras = sorted(
+            (palabra, id) for id, nombre in self.nombres.items() for palabra in set(nombre.split())
+        )
+        self.cuits = sorted((_solo_digitos(cuit), id) for id, (_, cuit) in self.productores.items())
+        self.trigramas = {}
+        for id, nombre in self.nombres.items():
+            for trigrama in _trigramas(nombre):
+                self.trigramas.setdefault(trigrama, set()).add(id)
+
+    @staticmethod
+    def _por_prefijo(lista, prefijo):
+        ids = set()
+        i = bisect.bisect_left(lista, (prefijo,))
+        while i < len(lista) and lista[i][0].startswith(prefijo):
+            ids.add(lista[i][1])
+            i += 1
+        return ids
+
+    def buscar(self, consulta, limite):
+        texto = _normalizar(consulta)
+        digitos = _solo_digitos(consulta)
+        if not texto:
+            return []
+
+        if digitos and len(digitos) == len(texto.replace('-', '').replace(' ', '')):
+            # Se escribió un CUIT (con o sin guiones)
+            ids = self._por_prefijo(self.cuits, digitos)
+        else:
+            # Cada palabra escrita debe ser prefijo de alguna palabra del nombre
+            ids = None
+            for palabra in texto.split():
+                encontrados = self._por_prefijo(self.palabras, palabra)
+                ids = encontrados if ids is None else ids & encontrados
+            if not ids and len(texto) >= 3:
+                # Sin coincidencias por prefijo: se busca el texto en cualquier parte del nombre
+                candidatos = set.intersection(*(self.trigramas.get(t, set()) for t in _trigramas(texto)))
+                ids = {id for id in candidatos if texto in self.nombres[id]}
+
+        orden = sorted(ids, key=lambda id: (not self.nombres[id].startswith(texto), self.nombres[id]))
+        return [(id, *self.productores[id]) for id in orden[:limite]]
+
+class DirectorioProductores:
+    """
+    Directorio en memoria de los productores activos para el formulario de
+    entrada. Se reconstruye al invalidarse (alta o edición de un productor) o
+    cuando vence DIRECTORIO_PRODUCTORES_TTL, para tomar cambios de otros procesos.
+    """
+
+    def __init__(self):
+        self._indice = None
+        self._construido = 0.0
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        self._indice = None
+
+    def _indice_vigente(self):
+        ttl = current_app.config.get('DIRECTORIO_PRODUCTORES_TTL', 300)
+        indice = self._indice
+        if indice is not None and time.monotonic() - self._construido < ttl:
+            return indice
+        with self._lock:
+            if self._indice is None or time.monotonic() - self._construido >= ttl:
+                from app.models.operaciones import Productor
+                productores = Productor.query.with_entities(
+                    Productor.id, Productor.nombre_completo, Productor.cuit
+                ).filter_by(activo=True).all()
+                self._indice = _IndiceProductores(productores)
+                self._construido = time.monotonic()
+            return self._indice
+
+    def buscar(self, consulta, limite=20):
+        """Retorna hasta 'limite' tuplas (id, nombre, cuit) que coinciden con la consulta."""
+        return self._indice_vigente().buscar(consulta, limite)
+
+    def obtener(self, id):
+        """
+        Retorna (id, nombre, cuit) de un productor activo, o None. Si no está en
+        el índice se busca en la base: puede haberse dado de alta en otro proceso
+        después de construido el índice, y entonces se invalida para incluirlo.
+        """
+        datos = self._indice_vigente().productores.get(id)
+        if datos:
+            return (id, *datos)
+        from app.models.operaciones import Productor
+        fila = Productor.query.with_entities(
+            Productor.id, Productor.nombre_completo, Productor.cuit
+        ).filter_by(id=id, activo=True).first()
+        if fila is None:
+            return None
+        self.invalidar()
+        return tuple(fila)
+
+directorio_productores = DirectorioProductores()
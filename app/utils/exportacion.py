@@ -0,0 +1,225 @@
+# C:/SGPA/app/utils/exportacion.py
+import csv
+import io
+import math
+import re
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+from sqlalchemy import select
+from app import db
+from app.models.operaciones import Carga, Chofer, ProcesoDesmotado, Productor, Vehiculo, carga_historica
+from app.models.user import Planta
+from app.utils.campanias import incluye_archivo
+
+# (encabezado, columna) en el orden en que se exportan
+COLUMNAS = (
+    ('Lote', Carga.lote_id),
+    ('Planta', Planta.codigo),
+    ('Fecha Entrada', Carga.fecha_entrada),
+    ('Fecha Salida', Carga.fecha_salida),
+    ('Estado', Carga.estado),
+    ('Productor', Productor.nombre_completo),
+    ('CUIT', Productor.cuit),
+    ('Chofer', Chofer.nombre_completo),
+    ('DNI Chofer', Chofer.dni),
+    ('Patente', Vehiculo.placa),
+    ('Acoplado', Carga.placa_acoplado),
+    ('Báscula', Carga.numero_bascula),
+    ('Peso Bruto (kg)', Carga.peso_bruto),
+    ('Peso Tara (kg)', Carga.peso_tara),
+    ('Peso Neto (kg)', Carga.peso_neto),
+    ('Humedad (%)', Carga.humedad),
+    ('DTV', Carga.dtv),
+    ('Fecha Proceso', ProcesoDesmotado.fecha_proceso),
+    ('Kilos Fibra', ProcesoDesmotado.kilos_fibra),
+    ('Kilos Semilla', ProcesoDesmotado.kilos_semilla),
+)
+ENCABEZADOS = [encabezado for encabezado, _ in COLUMNAS]
+
+def filas_exportacion(planta_id=None, desde=None, hasta=None, estado=None, lote=2000):
+    """
+    Genera las filas del historial de cargas (con su proceso de desmotado, si
+    lo tiene) ordenadas por fecha de entrada. 'hasta' es exclusivo.
+    Las filas se leen del cursor de a 'lote' (yield_per): la memoria no
+    depende del tamaño de la exportación. Si el rango alcanza campañas
+    archivadas se lee la vista carga_historica en lugar de las tablas vivas.
+    """
+    historico = incluye_archivo(desde)
+    tabla = carga_historica if historico else Carga.__table__
+    origen = tabla.c
+    # En la vista, las columnas de la carga y del proceso vienen de la misma fila
+    columnas = [
+        origen[columna.name] if historico and columna.table in (Carga.__table__, ProcesoDesmotado.__table__) else columna
+        for _, columna in COLUMNAS
+    ]
+    consulta = (
+        select(*columnas)
+        .select_from(tabla)
+        .join(Planta, origen.planta_id == Planta.id)
+        .join(Productor, origen.productor_id == Productor.id)
+        .join(Chofer, origen.chofer_id == Chofer.id)
+        .join(Vehiculo, origen.vehiculo_id == Vehiculo.id)
+        .order_by(origen.fecha_entrada, origen.id)
+        .execution_options(yield_per=lote)
+    )
+    if not historico:
+        consulta = consulta.outerjoin(ProcesoDesmotado, ProcesoDesmotado.carga_id == Carga.id)
+    if planta_id is not None:
+        consulta = consulta.where(origen.planta_id == planta_id)
+    if desde is not None:
+        consulta = consulta.where(origen.fecha_entrada >= desde)
+    if hasta is not None:
+        consulta = consulta.where(origen.fecha_entrada < hasta)
+    if estado:
+        consulta = consulta.where(origen.estado == estado)
+
+    resultado = db.session.execute(consulta)
+    try:
+        for fila in resultado:
+            yield tuple(fila)
+    finally:
+        resultado.close()
+
+# Primer carácter con el que Excel interpreta una celda de texto como fórmula
+_INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+def _celda_csv(valor):
+    """Los textos que Excel tomaría como fórmula se anteponen con ' (inyección CSV); los números no se tocan."""
+    if valor is None:
+        return ''
+    if isinstance(valor, str) and valor.startswith(_INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+def exportar_csv(filas, filas_por_bloque=500):
+    """
+    Genera el CSV en bloques de texto a medida que llegan las filas. Usa ';' y
+    BOM para que Excel en español lo abra con acentos y columnas correctas.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+    buffer.write('\ufeff')
+    escritor.writerow(ENCABEZADOS)
+    for numero, fila in enumerate(filas, 1):
+        escritor.writerow([_celda_csv(valor) for valor in fila])
+        if numero % filas_por_bloque == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+class _SalidaEnBloques(io.RawIOBase):
+    """Destino de escritura que acumula los bytes hasta que el generador los retira."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def retirar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+_XLSX_FIJOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Cargas" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilo 0: general; estilo 1: fecha y hora; estilo 2: encabezado en negrita
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+_EPOCA_EXCEL = datetime(1899, 12, 30)
+# Caracteres que XML 1.0 no admite ni escapados: Excel rechaza el archivo si aparecen
+_NO_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+def _celda_xlsx(valor, estilo_texto=''):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, datetime):
+        return f'<c s="1"><v>{(valor - _EPOCA_EXCEL).total_seconds() / 86400:.8f}</v></c>'
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        # NaN e infinito no son números válidos en una celda: se dejan vacías
+        return f'<c><v>{valor!r}</v></c>' if math.isfinite(valor) else '<c/>'
+    return f'<c t="inlineStr"{estilo_texto}><is><t>{escape(_NO_XML.sub("", str(valor)))}</t></is></c>'
+
+def exportar_xlsx(filas, filas_por_bloque=500):
+    """
+    Genera el XLSX en bloques de bytes a medida que llegan las filas: la hoja
+    se escribe en streaming dentro del ZIP (con descriptores de datos, sin
+    volver atrás en el archivo), con textos en línea en lugar de la tabla de
+    textos compartidos. El modo write-only de openpyxl no sirve aquí porque
+    solo entrega el archivo al guardarlo, cuando ya se escribieron todas las filas.
+    """
+    salida = _SalidaEnBloques()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+        for nombre, contenido in _XLSX_FIJOS.items():
+            archivo_zip.writestr(nombre, contenido)
+        with archivo_zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData><row>' + ''.join(_celda_xlsx(e, ' s="2"') for e in ENCABEZADOS) + '</row>'
+            ).encode('utf-8'))
+            bloque = []
+            for numero, fila in enumerate(filas, 1):
+                bloque.append('<row>' + ''.join(_celda_xlsx(valor) for valor in fila) + '</row>')
+                if numero % filas_por_bloque == 0:
+                    hoja.write(''.join(bloque).encode('utf-8'))
+                    bloque = []
+                    datos = salida.retirar()
+                    if datos:
+                        yield datos
+            hoja.write((''.join(bloque) + '</sheetData></worksheet>').encode('utf-8'))
+    yield salida.retirar()
+
+FORMATOS = {
+    # Tipos completos (con charset): la respuesta los usa como content_type, no como mimetype
+    'csv': (exportar_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (exportar_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -1,35 +1,120 @@
 # C:/SGPA/app/utils/helpers.py
-from app.models.operaciones import Carga
-from datetime import datetime
-import qrcode
+from flask import current_app
+from sqlalchemy import and_, create_engine, func, select, update
+from sqlalchemy.pool import NullPool
+from app.models.operaciones import Carga, SecuenciaLote
+from app.utils.basedatos import aplicar_pragmas, es_sqlite
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import io
 import os
+import threading
 
-def generar_numero_lote(planta_codigo):
+# Bloques de números reservados por este proceso: (planta, año) -> (siguiente, límite)
+_bloques_lote = {}
+_bloques_lote_pid = os.getpid()
+_bloques_lote_lock = threading.Lock()
+_motores_reserva = {}
+
+def _motor_reserva(db):
+    """
+    Motor sin pool para reservar bloques fuera de la transacción de la petición.
+    Usar el pool de la app podría bloquearse si todas sus conexiones están
+    tomadas por peticiones que esperan su número de lote.
+    """
+    url = db.engine.url
+    motor = _motores_reserva.get(url)
+    if motor is None:
+        pragmas = current_app.config.get('SQLITE_PRAGMAS')
+        espera = (pragmas or {}).get('busy_timeout', 5000) / 1000 if es_sqlite(url) else None
+        motor = create_engine(url, poolclass=NullPool, **({'connect_args': {'timeout': espera}} if espera else {}))
+        aplicar_pragmas(motor, pragmas)
+        _motores_reserva[url] = motor
+    return motor
+
+def insertar_si_no_existe(conn, tabla, **valores):
+    """
+    INSERT que no falla si otra transacción ya creó la misma fila.
+    Retorna la cantidad de filas insertadas (0 o 1).
+    """
+    bind = conn.get_bind() if hasattr(conn, 'get_bind') else conn
+    if bind.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return conn.execute(insert(tabla).values(**valores).on_conflict_do_nothing()).rowcount
+
+def _reservar_numeros_lote(conn, planta_codigo, anio, cantidad=1):
+    """
+    Incrementa atómicamente el contador de (planta, año) en 'cantidad' y
+    retorna el último número reservado. 'conn' puede ser la sesión o una conexión.
+    El UPDATE toma el bloqueo de escritura, por lo que dos balanceros nunca
+    obtienen el mismo número.
+    """
+    tabla = SecuenciaLote.__table__
+    filtro = and_(tabla.c.planta_codigo == planta_codigo, tabla.c.anio == anio)
+    incremento = update(tabla).where(filtro).values(ultimo_numero=tabla.c.ultimo_numero + cantidad)
+
+    if conn.execute(incremento).rowcount == 0:
+        # Primer lote del año para la planta: se parte del último lote existente
+        # (el escaneo por LIKE ocurre una sola vez por planta y año).
+        ultimo_lote = conn.execute(
+            select(func.max(Carga.lote_id)).where(Carga.lote_id.like(f'{planta_codigo}-{anio}-%'))
+        ).scalar()
+        inicial = int(ultimo_lote.split('-')[-1]) if ultimo_lote else 0
+        insertar_si_no_existe(conn, tabla, planta_codigo=planta_codigo, anio=anio, ultimo_numero=inicial)
+        conn.execute(incremento)
+
+    return conn.execute(select(tabla.c.ultimo_numero).where(filtro)).scalar_one()
+
+def generar_numero_lote(planta_codigo, bloque=None):
     """
     Genera un número de lote único y consecutivo para una planta.
     Formato: [CODIGO_PLANTA]-[AÑO]-[NUMERO_SECUENCIAL]
     Ejemplo: P01-2025-000123
+
+    Con bloque=1 (LOTE_BLOQUE_RESERVA por defecto) el número se toma dentro de la
+    transacción de la petición: si la carga no se guarda, el número no se pierde.
+    Con bloque>1 cada proceso reserva 'bloque' números en una transacción propia;
+    rinde más bajo carga pero puede dejar huecos si el proceso termina.
+    Debe llamarse antes de cualquier otra escritura de la petición.
     """
     from app import db # Importar aquí para evitar importación circular
+    global _bloques_lote_pid
     current_year = datetime.now().year
-    
-    # Buscar el último lote del año actual para la planta especificada
-    last_lote_str = db.session.query(db.func.max(Carga.lote_id)).filter(
-        Carga.lote_id.like(f'{planta_codigo}-{current_year}-%')
-    ).scalar()
-    
-    new_seq = 1
-    if last_lote_str:
-        last_seq = int(last_lote_str.split('-')[-1])
-        new_seq = last_seq + 1
-        
-    return f"{planta_codigo}-{current_year}-{new_seq:06d}"
-
-def generar_qr_code(data, filename, static_folder_path):
-    """
-    Genera un código QR y lo guarda en la carpeta de QRs.
-    Retorna la ruta relativa para usar en plantillas HTML.
-    """
+    if bloque is None:
+        bloque = current_app.config.get('LOTE_BLOQUE_RESERVA', 1)
+
+    if bloque <= 1:
+        new_seq = _reservar_numeros_lote(db.session, planta_codigo, current_year)
+        return f"{planta_codigo}-{current_year}-{new_seq:06d}"
+
+    clave = (planta_codigo, current_year)
+    with _bloques_lote_lock:
+        # Tras un fork el proceso hijo no debe reutilizar los bloques del padre.
+        if _bloques_lote_pid != os.getpid():
+            _bloques_lote.clear()
+            _bloques_lote_pid = os.getpid()
+
+        siguiente, limite = _bloques_lote.get(clave, (1, 0))
+        if siguiente > limite:
+            with _motor_reserva(db).begin() as conn:
+                limite = _reservar_numeros_lote(conn, planta_codigo, current_year, bloque)
+            siguiente = limite - bloque + 1
+        _bloques_lote[clave] = (siguiente + 1, limite)
+
+    return f"{planta_codigo}-{current_year}-{siguiente:06d}"
+
+def _hash_qr(data):
+    """Clave del QR: hash del contenido, así el mismo dato nunca se vuelve a dibujar."""
+    return hashlib.sha256(str(data).encode('utf-8')).hexdigest()[:32]
+
+def renderizar_qr_png(data):
+    """Dibuja el código QR de 'data' y retorna los bytes del PNG."""
+    # qrcode (y PIL) se importan con el primer QR, no al arrancar la app
+    import qrcode
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -39,14 +124,112 @@ def generar_qr_code(data, filename, static_folder_path):
     qr.add_data(data)
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Ruta donde se guardarán los códigos QR
-    qr_path = os.path.join(static_folder_path, 'qr_codes')
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+# Capa en memoria (LRU) delante de la carpeta static/qr_codes: hash -> bytes del PNG
+_cache_qr = OrderedDict()
+_cache_qr_lock = threading.Lock()
+
+def _cache_qr_guardar(clave, png):
+    tamano = current_app.config.get('QR_CACHE_TAMANO', 2048) if current_app else 2048
+    with _cache_qr_lock:
+        _cache_qr[clave] = png
+        _cache_qr.move_to_end(clave)
+        while len(_cache_qr) > tamano:
+            _cache_qr.popitem(last=False)
+
+def _cache_qr_obtener(clave):
+    with _cache_qr_lock:
+        png = _cache_qr.get(clave)
+        if png is not None:
+            _cache_qr.move_to_end(clave)
+        return png
+
+def _carpeta_qr(static_folder_path=None):
+    qr_path = os.path.join(static_folder_path or current_app.static_folder, 'qr_codes')
     os.makedirs(qr_path, exist_ok=True)
-    
-    # Guardar la imagen
-    img_path = os.path.join(qr_path, f"{filename}.png")
-    img.save(img_path)
-    
-    # Retornar la ruta relativa
-    return f"qr_codes/{filename}.png"
\ No newline at end of file
+    return qr_path
+
+def _escribir_qr(qr_path, clave, png):
+    """Escribe el PNG de forma atómica (dos procesos pueden generar el mismo QR)."""
+    destino = os.path.join(qr_path, f"{clave}.png")
+    temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(png)
+    os.replace(temporal, destino)
+
+def obtener_qr_png(data, static_folder_path=None):
+    """
+    Retorna los bytes del PNG del QR de 'data': primero de memoria, luego del
+    disco y solo si no existe en ninguno lo dibuja y lo guarda.
+    """
+    clave = _hash_qr(data)
+    png = _cache_qr_obtener(clave)
+    if png is not None:
+        return png
+
+    qr_path = _carpeta_qr(static_folder_path)
+    img_path = os.path.join(qr_path, f"{clave}.png")
+    try:
+        with open(img_path, 'rb') as archivo:
+            png = archivo.read()
+    except FileNotFoundError:
+        png = renderizar_qr_png(data)
+        _escribir_qr(qr_path, clave, png)
+    _cache_qr_guardar(clave, png)
+    return png
+
+def generar_qr_code(data, static_folder_path=None):
+    """
+    Genera un código QR y lo guarda en la carpeta de QRs, nombrado por el hash
+    de su contenido. Si ya existe no se vuelve a generar.
+    Retorna la ruta relativa para usar en plantillas HTML.
+    """
+    obtener_qr_png(data, static_folder_path)
+    return f"qr_codes/{_hash_qr(data)}.png"
+
+def generar_qr_masivo(datos, static_folder_path=None, procesos=None):
+    """
+    Genera los QR de una lista de datos repartiendo el dibujo entre varios
+    procesos; los que ya existen en memoria o en disco no se vuelven a dibujar.
+    Retorna {dato: ruta relativa}.
+    """
+    qr_path = _carpeta_qr(static_folder_path)
+    rutas = {dato: f"qr_codes/{_hash_qr(dato)}.png" for dato in datos}
+    faltantes = []
+    for dato in dict.fromkeys(datos):
+        clave = _hash_qr(dato)
+        if os.path.exists(os.path.join(qr_path, f"{clave}.png")):
+            continue
+        png = _cache_qr_obtener(clave)
+        if png is not None:
+            _escribir_qr(qr_path, clave, png)
+        else:
+            faltantes.append(dato)
+
+    if len(faltantes) < 20 or procesos == 1:
+        # Pocos QR: no vale la pena levantar procesos
+        imagenes = map(renderizar_qr_png, faltantes)
+        for dato, png in zip(faltantes, imagenes):
+            _escribir_qr(qr_path, _hash_qr(dato), png)
+        return rutas
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        imagenes = pool.map(renderizar_qr_png, faltantes, chunksize=max(1, len(faltantes) // 64))
+        for dato, png in zip(faltantes, imagenes):
+            _escribir_qr(qr_path, _hash_qr(dato), png)
+    return rutas
+
+def generar_qr_del_dia(fecha, planta_id=None, static_folder_path=None, procesos=None):
+    """Genera los QR de todos los lotes que ingresaron en 'fecha' (para imprimir etiquetas)."""
+    from app import db
+    inicio = datetime.combine(fecha, datetime.min.time())
+    query = db.session.query(Carga.lote_id).filter(
+        Carga.fecha_entrada >= inicio, Carga.fecha_entrada < inicio + timedelta(days=1)
+    )
+    if planta_id is not None:
+        query = query.filter(Carga.planta_id == planta_id)
+    lotes = [lote_id for (lote_id,) in query]
+    return generar_qr_masivo(lotes, static_folder_path, procesos)
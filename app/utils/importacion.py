@@ -0,0 +1,213 @@
+# C:/SGPA/app/utils/importacion.py
+import codecs
+import csv
+import io
+import itertools
+import re
+from sqlalchemy import insert, update
+from app import db
+from app.models.operaciones import Productor
+from app.utils.cache_vistas import COMUNES, incrementar_versiones
+from app.utils.directorio import _normalizar, _solo_digitos, directorio_productores
+from app.utils.sincronizacion import bandeja_activa, registrar_filas
+
+# Nombres de columna aceptados en el archivo (ya normalizados) -> campo del productor
+_ALIAS_COLUMNAS = {
+    'nombre': 'nombre_completo', 'nombre completo': 'nombre_completo', 'nombre_completo': 'nombre_completo',
+    'razon social': 'nombre_completo', 'productor': 'nombre_completo',
+    'cuit': 'cuit', 'cuit/cuil': 'cuit',
+    'renpa': 'renpa', 'nro renpa': 'renpa',
+    'telefono': 'telefono', 'tel': 'telefono', 'celular': 'telefono',
+    'email': 'email', 'e-mail': 'email', 'correo': 'email',
+}
+_PESOS_CUIT = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+_PREFIJOS_CUIT = {'20', '23', '24', '25', '26', '27', '30', '33', '34'}
+_RE_RENPA = re.compile(r'^[A-Z0-9][A-Z0-9./-]{0,19}$')
+_RE_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+class ResultadoImportacion:
+    """Totales de una importación y errores por fila (número de fila del archivo, CUIT, mensaje)."""
+
+    def __init__(self):
+        self.creados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+        self.errores = []
+
+    @property
+    def procesados(self):
+        return self.creados + self.actualizados + self.sin_cambios + len(self.errores)
+
+def formatear_cuit(digitos):
+    return f"{digitos[:2]}-{digitos[2:10]}-{digitos[10]}"
+
+def cuit_valido(digitos):
+    """Verifica largo, prefijo y dígito verificador (módulo 11) de un CUIT/CUIL."""
+    if len(digitos) != 11 or digitos[:2] not in _PREFIJOS_CUIT:
+        return False
+    resto = sum(int(d) * p for d, p in zip(digitos, _PESOS_CUIT)) % 11
+    verificador = {0: 0, 1: 9}.get(resto, 11 - resto)
+    return verificador == int(digitos[10])
+
+def _codificacion_csv(archivo, bloque=65536):
+    """
+    'utf-8-sig' si todo el archivo es UTF-8 válido y si no 'cp1252' (el CSV
+    que guarda Excel en Windows); ValueError si tampoco es Windows-1252. Lo
+    recorre en bloques, sin cargarlo entero, y lo deja al principio.
+    """
+    try:
+        for codificacion in ('utf-8-sig', 'cp1252'):
+            archivo.seek(0)
+            decodificador = codecs.getincrementaldecoder(codificacion)()
+            try:
+                while True:
+                    datos = archivo.read(bloque)
+                    decodificador.decode(datos, final=not datos)
+                    if not datos:
+                        return codificacion
+            except UnicodeDecodeError:
+                continue
+        raise ValueError('El archivo no está en UTF-8 ni en Windows-1252: guárdelo como "CSV UTF-8".')
+    finally:
+        archivo.seek(0)
+
+def leer_archivo(archivo, nombre_archivo):
+    """
+    Genera (numero_fila, dict) por cada fila de un CSV (',' o ';') o XLSX con
+    encabezados en la primera fila. El archivo se recorre sin cargarlo entero:
+    el CSV línea a línea y el XLSX en modo read-only. El CSV se lee en UTF-8
+    o, si no lo es, en Windows-1252; nunca se reemplazan caracteres inválidos.
+    """
+    if nombre_archivo.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+    else:
+        texto = io.TextIOWrapper(archivo, encoding=_codificacion_csv(archivo), newline='')
+        primera = texto.readline()
+        delimitador = ';' if primera.count(';') > primera.count(',') else ','
+        filas = csv.reader(itertools.chain([primera], texto), delimiter=delimitador)
+
+    encabezados = None
+    for numero, fila in enumerate(filas, 1):
+        if encabezados is None:
+            encabezados = [_ALIAS_COLUMNAS.get(_normalizar(str(c or ''))) for c in fila]
+            if 'cuit' not in encabezados or 'nombre_completo' not in encabezados:
+                raise ValueError('El archivo debe tener al menos las columnas "Nombre" y "CUIT".')
+            continue
+        if not any(fila):
+            continue
+        datos = {campo: str(valor).strip() for campo, valor in zip(encabezados, fila)
+                 if campo and valor is not None and str(valor).strip()}
+        yield numero, datos
+
+def _validar_lote(lote, resultado, vistos):
+    """
+    Valida un lote de filas de una sola pasada y descarta las inválidas o
+    repetidas dentro del archivo. Retorna {cuit_digitos: (numero_fila, valores)}.
+    """
+    validos = {}
+    for numero, datos in lote:
+        digitos = _solo_digitos(datos.get('cuit'))
+        # Los CUIT numéricos que vienen de Excel pueden traer '.0' al final
+        if len(digitos) == 12 and datos.get('cuit', '').endswith('.0'):
+            digitos = digitos[:11]
+        errores = []
+        nombre = datos.get('nombre_completo', '')
+        if not nombre:
+            errores.append('Falta el nombre.')
+        elif len(nombre) > 200:
+            errores.append('El nombre supera los 200 caracteres.')
+        if not cuit_valido(digitos):
+            errores.append('CUIT inválido.')
+        elif digitos in vistos:
+            errores.append(f'CUIT repetido en la fila {vistos[digitos]}.')
+        renpa = datos.get('renpa', '').upper()
+        if renpa and not _RE_RENPA.match(renpa):
+            errores.append('RENPA inválido.')
+        email = datos.get('email', '')
+        if email and (len(email) > 120 or not _RE_EMAIL.match(email)):
+            errores.append('Email inválido.')
+        if len(datos.get('telefono', '')) > 50:
+            errores.append('El teléfono supera los 50 caracteres.')
+
+        if errores:
+            resultado.errores.append((numero, datos.get('cuit', ''), ' '.join(errores)))
+            continue
+        vistos[digitos] = numero
+        validos[digitos] = (numero, {
+            'nombre_completo': nombre,
+            'cuit': formatear_cuit(digitos),
+            'renpa': renpa or None,
+            'telefono': datos.get('telefono') or None,
+            'email': email or None,
+        })
+    return validos
+
+def _existentes():
+    """CUIT (solo dígitos) -> (id, valores) de los productores cargados, con o sin guiones."""
+    filas = db.session.query(
+        Productor.id, Productor.nombre_completo, Productor.cuit,
+        Productor.renpa, Productor.telefono, Productor.email
+    )
+    return {
+        _solo_digitos(cuit): (id, {'nombre_completo': nombre, 'cuit': cuit, 'renpa': renpa,
+                                   'telefono': telefono, 'email': email})
+        for id, nombre, cuit, renpa, telefono, email in filas
+    }
+
+def importar_productores(archivo, nombre_archivo, actualizar=True, tamano_lote=1000):
+    """
+    Importa productores desde un CSV o XLSX ('archivo' abierto en binario).
+    Los que ya existen (mismo CUIT, con o sin guiones) se actualizan si
+    'actualizar' es True; el resto se inserta. Cada lote de 'tamano_lote'
+    filas se guarda en una transacción. Retorna un ResultadoImportacion.
+    """
+    resultado = ResultadoImportacion()
+    existentes = _existentes()
+    vistos = {}
+
+    def guardar(lote):
+        validos = _validar_lote(lote, resultado, vistos)
+        nuevos, cambios = [], []
+        for digitos, (numero, valores) in validos.items():
+            actual = existentes.get(digitos)
+            if actual is None:
+                nuevos.append(valores)
+            elif not actualizar:
+                resultado.errores.append((numero, valores['cuit'], 'El productor ya existe.'))
+            else:
+                id, previos = actual
+                # Se conserva el CUIT tal como está guardado y no se pisan datos con vacíos
+                valores = {**previos, **{k: v for k, v in valores.items() if v is not None}, 'cuit': previos['cuit']}
+                if valores == previos:
+                    resultado.sin_cambios += 1
+                else:
+                    cambios.append({'id': id, **valores})
+        if nuevos:
+            db.session.execute(insert(Productor), nuevos)
+        if cambios:
+            db.session.execute(update(Productor), cambios)
+        if bandeja_activa() and (nuevos or cambios):
+            # Las escrituras masivas no pasan por el flush del ORM: se anotan aparte
+            registrar_filas('productor', Productor.cuit.in_([v['cuit'] for v in nuevos + cambios]))
+        if nuevos or cambios:
+            incrementar_versiones([COMUNES])
+        db.session.commit()
+        resultado.creados += len(nuevos)
+        resultado.actualizados += len(cambios)
+        for valores in nuevos:
+            existentes[_solo_digitos(valores['cuit'])] = (None, valores)
+
+    lote = []
+    for fila in leer_archivo(archivo, nombre_archivo):
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            guardar(lote)
+            lote = []
+    if lote:
+        guardar(lote)
+
+    if resultado.creados or resultado.actualizados:
+        directorio_productores.invalidar()
+    return resultado
@@ -0,0 +1,104 @@
+# C:/SGPA/app/utils/liquidaciones.py
+"""
+Motor de liquidaciones a productores. Cada corrida calcula en una sola
+consulta agrupada sobre carga_historica (campañas vivas y archivadas) los
+lotes desmotados de cada productor en el período y la vuelca en la tabla
+liquidacion con un INSERT ... SELECT ... ON CONFLICT: no se carga ningún
+lote como objeto del ORM. Las corridas incrementales recalculan solo los
+productores con novedades desde la corrida anterior del mismo período.
+"""
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, func, literal, or_, select, update
+from app import db
+from app.models.operaciones import Liquidacion, LiquidacionCorrida, NovedadLiquidacion, carga_historica
+from app.utils.helpers import insertar_si_no_existe
+
+# Cifras de la liquidación; un recálculo solo actualiza la fila si alguna cambia
+CIFRAS = ('lotes', 'kilos_netos', 'descuento_humedad', 'kilos_liquidables', 'kilos_fibra', 'kilos_semilla')
+# Diferencia en kilos por debajo de la cual se considera que la cifra no cambió
+TOLERANCIA_KILOS = 0.005
+
+def registrar_novedad(productor_id):
+    """
+    Marca que cambiaron los lotes del productor. No hace commit: se confirma
+    con el cambio, que ya tomó el bloqueo de escritura, así la marca nunca
+    queda con una fecha anterior a una corrida que no vio el cambio.
+    """
+    tabla = NovedadLiquidacion.__table__
+    ahora = datetime.utcnow()
+    actualizar = update(tabla).where(tabla.c.productor_id == productor_id).values(fecha=ahora)
+    if db.session.execute(actualizar).rowcount == 0 and not insertar_si_no_existe(
+        db.session, tabla, productor_id=productor_id, fecha=ahora
+    ):
+        db.session.execute(actualizar)
+
+def _insert(tabla):
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(tabla)
+
+def periodo_campania(anio):
+    """(desde, hasta) de la campaña 'anio': lotes ingresados en el año calendario."""
+    return datetime(anio, 1, 1).date(), datetime(anio, 12, 31).date()
+
+def liquidar(desde, hasta, completa=False):
+    """
+    Liquida a los productores con lotes desmotados ingresados entre 'desde' y
+    'hasta' (fechas, ambas inclusive). Sin 'completa', si el período ya tuvo
+    una corrida solo se recalculan los productores con novedades posteriores.
+    Una liquidación existente solo se reescribe (y sube de versión) si
+    cambian sus cifras. Retorna la LiquidacionCorrida registrada.
+    """
+    inicio = time.perf_counter()
+    base = current_app.config.get('LIQUIDACION_HUMEDAD_BASE', 12.0)
+    anterior = db.session.query(func.max(LiquidacionCorrida.fecha)).filter_by(desde=desde, hasta=hasta).scalar()
+    completa = completa or anterior is None
+
+    # La corrida se registra antes de leer: toma el bloqueo de escritura, así
+    # ningún desmotado se confirma entre la lectura de las novedades y el cálculo.
+    corrida = LiquidacionCorrida(desde=desde, hasta=hasta, completa=completa)
+    db.session.add(corrida)
+    db.session.flush()
+    corrida.fecha = datetime.utcnow()
+
+    h = carga_historica.c
+    descuento = case((h.humedad > base, h.peso_neto * (h.humedad - base) / (100 - base)), else_=0)
+    filtros = [
+        h.fecha_entrada >= desde, h.fecha_entrada < hasta + timedelta(days=1),
+        h.fecha_proceso.isnot(None), h.peso_neto > 0,
+    ]
+    if not completa:
+        filtros.append(h.productor_id.in_(
+            select(NovedadLiquidacion.productor_id).where(NovedadLiquidacion.fecha > anterior)
+        ))
+    kilos_netos, descuento_total = func.sum(h.peso_neto), func.sum(descuento)
+    calculo = select(
+        h.productor_id, literal(desde, db.Date), literal(hasta, db.Date), literal(corrida.fecha, db.DateTime),
+        literal(1), func.count(), kilos_netos, descuento_total, kilos_netos - descuento_total,
+        func.sum(h.kilos_fibra), func.sum(h.kilos_semilla),
+    ).where(*filtros).group_by(h.productor_id)
+
+    tabla = Liquidacion.__table__
+    sentencia = _insert(tabla).from_select(
+        ['productor_id', 'desde', 'hasta', 'fecha_calculo', 'version'] + list(CIFRAS), calculo
+    )
+    nuevas = sentencia.excluded
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=['desde', 'hasta', 'productor_id'],
+        set_={**{c: nuevas[c] for c in CIFRAS}, 'fecha_calculo': nuevas.fecha_calculo, 'version': tabla.c.version + 1},
+        where=or_(tabla.c.lotes != nuevas.lotes, *(
+            func.abs(tabla.c[c] - nuevas[c]) > TOLERANCIA_KILOS for c in CIFRAS if c != 'lotes'
+        )),
+    )
+    corrida.liquidaciones = db.session.execute(sentencia).rowcount
+    corrida.segundos = time.perf_counter() - inicio
+    db.session.commit()
+    return corrida
+
+def liquidaciones_del_periodo(desde, hasta):
+    """Consulta de las liquidaciones del período, de mayor a menor kilos liquidables."""
+    return Liquidacion.query.filter_by(desde=desde, hasta=hasta).order_by(Liquidacion.kilos_liquidables.desc())
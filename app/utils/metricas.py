@@ -0,0 +1,199 @@
+# C:/SGPA/app/utils/metricas.py
+import bisect
+import hmac
+import ipaddress
+import threading
+import time
+from flask import Response, abort, current_app, g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.consultas import consultas_de_la_peticion
+
+# Límites superiores (en segundos o en cantidad) de los buckets de cada histograma
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+class Histograma:
+    """Histograma de buckets fijos al estilo Prometheus: observar es un bisect y dos sumas."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.cuentas = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+
+    def observar(self, valor):
+        self.cuentas[bisect.bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+
+class RegistroMetricas:
+    """Métricas del proceso, agrupadas por endpoint. Un lock para todo: cada observación dura microsegundos."""
+
+    # nombre -> (ayuda, buckets)
+    HISTOGRAMAS = {
+        'sgpa_peticion_segundos': ('Duración total de la petición.', BUCKETS_SEGUNDOS),
+        'sgpa_sql_consultas': ('Consultas SQL por petición.', BUCKETS_CONSULTAS),
+        'sgpa_sql_segundos': ('Tiempo en consultas SQL por petición.', BUCKETS_SEGUNDOS),
+        'sgpa_plantilla_segundos': ('Tiempo de renderizado de plantillas Jinja por petición.', BUCKETS_SEGUNDOS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {nombre: {} for nombre in self.HISTOGRAMAS}
+        self._peticiones = {}
+        self.lecturas_bascula = 0
+
+    def observar_peticion(self, endpoint, codigo, duracion, consultas, tiempo_sql, tiempo_plantillas):
+        with self._lock:
+            for nombre, valor in (
+                ('sgpa_peticion_segundos', duracion),
+                ('sgpa_sql_consultas', consultas),
+                ('sgpa_sql_segundos', tiempo_sql),
+                ('sgpa_plantilla_segundos', tiempo_plantillas),
+            ):
+                por_endpoint = self._histogramas[nombre]
+                histograma = por_endpoint.get(endpoint)
+                if histograma is None:
+                    histograma = por_endpoint[endpoint] = Histograma(self.HISTOGRAMAS[nombre][1])
+                histograma.observar(valor)
+            clave = (endpoint, codigo)
+            self._peticiones[clave] = self._peticiones.get(clave, 0) + 1
+
+    def contar_lectura_bascula(self):
+        with self._lock:
+            self.lecturas_bascula += 1
+
+    def texto_prometheus(self):
+        """Exporta las métricas en el formato de texto de Prometheus (0.0.4)."""
+        lineas = []
+        with self._lock:
+            for nombre, (ayuda, buckets) in self.HISTOGRAMAS.items():
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for endpoint, histograma in sorted(self._histogramas[nombre].items()):
+                    acumulado = 0
+                    for limite, cuenta in zip(buckets + ('+Inf',), histograma.cuentas):
+                        acumulado += cuenta
+                        lineas.append(f'{nombre}_bucket{{endpoint="{endpoint}",le="{limite}"}} {acumulado}')
+                    lineas.append(f'{nombre}_sum{{endpoint="{endpoint}"}} {histograma.suma:.6f}')
+                    lineas.append(f'{nombre}_count{{endpoint="{endpoint}"}} {acumulado}')
+            lineas.append('# HELP sgpa_peticiones_total Peticiones atendidas por endpoint y código HTTP.')
+            lineas.append('# TYPE sgpa_peticiones_total counter')
+            for (endpoint, codigo), cantidad in sorted(self._peticiones.items()):
+                lineas.append(f'sgpa_peticiones_total{{endpoint="{endpoint}",codigo="{codigo}"}} {cantidad}')
+            lineas.append('# HELP sgpa_lecturas_bascula_total Lecturas de báscula con leer_peso_bascula.')
+            lineas.append('# TYPE sgpa_lecturas_bascula_total counter')
+            lineas.append(f'sgpa_lecturas_bascula_total {self.lecturas_bascula}')
+        return '\n'.join(lineas) + '\n'
+
+registro_metricas = RegistroMetricas()
+
+def contar_lectura_bascula():
+    """Registra una lectura de báscula (en el proceso y en la petición actual)."""
+    registro_metricas.contar_lectura_bascula()
+    if has_request_context():
+        g.lecturas_bascula = g.get('lecturas_bascula', 0) + 1
+
+# --- Tiempo de SQL ---
+
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('inicio_consultas')
+    if not has_request_context() or not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    g.tiempo_sql = g.get('tiempo_sql', 0.0) + duracion
+    if current_app.config.get('METRICAS_PETICION_LENTA'):
+        sentencias = g.setdefault('sentencias_sql', [])
+        if len(sentencias) < 200:
+            sentencias.append((duracion, statement))
+
+def _error_de_consulta(contexto):
+    # Si la consulta falla no se llama a after_cursor_execute: se descarta su inicio
+    if contexto.connection is None or contexto.statement is None or not has_request_context():
+        return
+    inicios = contexto.connection.info.get('inicio_consultas')
+    if inicios:
+        inicios.pop()
+
+# --- Tiempo de plantillas ---
+
+def _antes_de_plantilla(app, template, context, **extra):
+    g.setdefault('inicio_plantillas', []).append(time.perf_counter())
+
+def _plantilla_renderizada(app, template, context, **extra):
+    inicios = g.get('inicio_plantillas')
+    if inicios:
+        g.tiempo_plantillas = g.get('tiempo_plantillas', 0.0) + time.perf_counter() - inicios.pop()
+
+# --- Middleware ---
+
+def _iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+
+def _registrar_medicion(response):
+    inicio = g.get('inicio_peticion')
+    if inicio is None or request.endpoint in (None, 'static', 'metricas'):
+        return response
+    duracion = time.perf_counter() - inicio
+    consultas = consultas_de_la_peticion()
+    tiempo_sql = g.get('tiempo_sql', 0.0)
+    tiempo_plantillas = g.get('tiempo_plantillas', 0.0)
+    registro_metricas.observar_peticion(
+        request.endpoint, response.status_code, duracion, consultas, tiempo_sql, tiempo_plantillas
+    )
+
+    umbral = current_app.config.get('METRICAS_PETICION_LENTA')
+    if umbral and duracion >= umbral:
+        sentencias = sorted(g.get('sentencias_sql', []), reverse=True)[:10]
+        detalle = ''.join(f"\n  {d * 1000:8.1f} ms  {' '.join(s.split())[:500]}" for d, s in sentencias)
+        current_app.logger.warning(
+            "Petición lenta %s %s: %.1f ms, %d consultas SQL (%.1f ms), plantillas %.1f ms, %d lecturas de báscula%s",
+            request.method, request.path, duracion * 1000, consultas, tiempo_sql * 1000,
+            tiempo_plantillas * 1000, g.get('lecturas_bascula', 0), detalle
+        )
+    return response
+
+def _desde_loopback():
+    """Petición directa desde la misma máquina (sin pasar por un proxy que agregue X-Forwarded-For)."""
+    if request.headers.get('X-Forwarded-For'):
+        return False
+    try:
+        return ipaddress.ip_address(request.remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
+def metricas():
+    """
+    Métricas del proceso en formato Prometheus. Con METRICAS_TOKEN se exige
+    "Authorization: Bearer <token>"; sin token solo se atienden peticiones
+    directas desde la misma máquina.
+    """
+    token = current_app.config.get('METRICAS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+    elif not _desde_loopback():
+        abort(403)
+    return Response(registro_metricas.texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def init_metricas(app):
+    """
+    Mide cada petición (duración, consultas y tiempo SQL, tiempo de plantillas)
+    y publica los histogramas en /metrics. Con METRICAS_PETICION_LENTA (segundos)
+    se registran en el log las peticiones lentas con sus consultas más costosas.
+    """
+    if not app.config.get('METRICAS_HABILITADAS', True):
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _antes_de_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_de_consulta)
+        event.listen(Engine, 'after_cursor_execute', _despues_de_consulta)
+        event.listen(Engine, 'handle_error', _error_de_consulta)
+    before_render_template.connect(_antes_de_plantilla, app)
+    template_rendered.connect(_plantilla_renderizada, app)
+    # Primera en ejecutarse, para medir también los demás before_request
+    app.before_request_funcs.setdefault(None, []).insert(0, _iniciar_medicion)
+    app.after_request(_registrar_medicion)
+    app.add_url_rule('/metrics', 'metricas', metricas)
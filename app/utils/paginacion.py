@@ -0,0 +1,73 @@
+# C:/SGPA/app/utils/paginacion.py
+from datetime import datetime
+from sqlalchemy import tuple_
+
+class PaginaPorClave:
+    """
+    Página obtenida por búsqueda de clave (keyset): en lugar de OFFSET/LIMIT y
+    COUNT(*) se filtra a partir de la última fila vista, por lo que la página
+    5.000 cuesta lo mismo que la primera.
+    """
+    def __init__(self, items, anterior=None, siguiente=None):
+        self.items = items
+        self.anterior = anterior
+        self.siguiente = siguiente
+
+    @property
+    def has_prev(self):
+        return self.anterior is not None
+
+    @property
+    def has_next(self):
+        return self.siguiente is not None
+
+def _codificar_cursor(fecha, id):
+    return f"{fecha.isoformat()}~{id}"
+
+def _decodificar_cursor(cursor):
+    """Convierte 'AAAA-MM-DDTHH:MM:SS~id' en (datetime, id); None si es inválido."""
+    try:
+        fecha, id = cursor.rsplit('~', 1)
+        return datetime.fromisoformat(fecha), int(id)
+    except (AttributeError, ValueError):
+        return None
+
+def paginar_por_clave(query, columna_fecha, columna_id, despues=None, antes=None, per_page=10, descendente=True):
+    """
+    Pagina 'query' ordenando por (columna_fecha, columna_id).
+    'despues' y 'antes' son los cursores recibidos en la URL: con 'despues' se
+    avanza desde la última fila de la página anterior y con 'antes' se retrocede
+    desde la primera. El índice compuesto (…, fecha, id) resuelve el filtro.
+    """
+    clave = tuple_(columna_fecha, columna_id)
+    cursor_despues = _decodificar_cursor(despues) if despues else None
+    cursor_antes = _decodificar_cursor(antes) if antes and not cursor_despues else None
+
+    # Al retroceder se recorre el índice en sentido inverso y luego se invierte el resultado.
+    retrocediendo = cursor_antes is not None
+    hacia_abajo = descendente != retrocediendo
+    orden = (columna_fecha.desc(), columna_id.desc()) if hacia_abajo else (columna_fecha.asc(), columna_id.asc())
+
+    cursor = cursor_antes or cursor_despues
+    if cursor:
+        query = query.filter(clave < cursor if hacia_abajo else clave > cursor)
+
+    filas = query.order_by(*orden).limit(per_page + 1).all()
+    hay_mas = len(filas) > per_page
+    filas = filas[:per_page]
+    if retrocediendo:
+        filas.reverse()
+
+    if not filas:
+        return PaginaPorClave([])
+
+    def cursor_de(fila):
+        return _codificar_cursor(getattr(fila, columna_fecha.key), getattr(fila, columna_id.key))
+
+    if retrocediendo:
+        anterior = cursor_de(filas[0]) if hay_mas else None
+        siguiente = cursor_de(filas[-1])
+    else:
+        anterior = cursor_de(filas[0]) if cursor else None
+        siguiente = cursor_de(filas[-1]) if hay_mas else None
+    return PaginaPorClave(filas, anterior=anterior, siguiente=siguiente)
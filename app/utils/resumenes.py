@@ -0,0 +1,155 @@
+# C:/SGPA/app/utils/resumenes.py
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, case, func, select, update
+from app import db
+from app.models.operaciones import Productor, ResumenDiarioPlanta, ResumenProductores, ProductorActivoDiario, carga_historica
+from app.utils.basedatos import es_sqlite
+from app.utils.cubo import acumular_cubo
+from app.utils.helpers import insertar_si_no_existe
+from app.utils.liquidaciones import registrar_novedad
+
+def _acumular(planta_id, fecha, **incrementos):
+    """Suma los incrementos a la fila (planta, fecha), creándola si no existe."""
+    tabla = ResumenDiarioPlanta.__table__
+    insertar_si_no_existe(db.session, tabla, planta_id=planta_id, fecha=fecha)
+    db.session.execute(
+        update(tabla)
+        .where(and_(tabla.c.planta_id == planta_id, tabla.c.fecha == fecha))
+        .values({tabla.c[col]: tabla.c[col] + valor for col, valor in incrementos.items()})
+    )
+
+def acumular_salida(carga):
+    """
+    Registra en los resúmenes la salida de una carga (peso neto, lote y productor).
+    No hace commit: se confirma junto con la salida.
+    """
+    fecha = carga.fecha_salida.date()
+    nuevo_productor = insertar_si_no_existe(
+        db.session, ProductorActivoDiario.__table__,
+        planta_id=carga.planta_id, fecha=fecha, productor_id=carga.productor_id
+    )
+    _acumular(carga.planta_id, fecha, kilos_netos=carga.peso_neto, lotes=1, productores=nuevo_productor)
+
+def acumular_proceso(carga, proceso):
+    """
+    Registra en los resúmenes y en el cubo del reporte comparativo el resultado
+    del desmotado de una carga, y marca la novedad para la liquidación del
+    productor. No hace commit: se confirma junto con el proceso.
+    """
+    fecha = (proceso.fecha_proceso or datetime.utcnow()).date()
+    _acumular(
+        carga.planta_id, fecha,
+        kilos_fibra=proceso.kilos_fibra,
+        kilos_semilla=proceso.kilos_semilla,
+        kilos_netos_procesados=carga.peso_neto,
+        lotes_procesados=1,
+    )
+    acumular_cubo(carga, proceso)
+    registrar_novedad(carga.productor_id)
+
+def kpis_corporativos(dias=30):
+    """
+    Calcula los KPIs del dashboard de Casa Central leyendo solo los resúmenes:
+    la producción de los últimos 'dias' días y el rendimiento de la campaña
+    en curso (desde el 1 de enero) en una consulta sobre a lo sumo un año de
+    filas por planta, más el contador de productores activos.
+    """
+    hoy = datetime.utcnow().date()
+    desde = hoy - timedelta(days=dias)
+    inicio_campania = date(hoy.year, 1, 1)
+    fecha = ResumenDiarioPlanta.fecha
+    en_campania = fecha >= inicio_campania
+    produccion, fibra_campania, neto_campania = db.session.query(
+        func.sum(case((fecha >= desde, ResumenDiarioPlanta.kilos_fibra), else_=0)),
+        func.sum(case((en_campania, ResumenDiarioPlanta.kilos_fibra), else_=0)),
+        func.sum(case((en_campania, ResumenDiarioPlanta.kilos_netos_procesados), else_=0)),
+    ).filter(fecha >= min(desde, inicio_campania)).one()
+    fibra_campania, neto_campania = fibra_campania or 0, neto_campania or 0
+    return {
+        'produccion_fibra': produccion or 0,
+        'rendimiento': (fibra_campania / neto_campania * 100) if neto_campania > 0 else 0,
+        'productores_activos': productores_activos(),
+    }
+
+def productores_activos():
+    """
+    Productores activos según resumen_productores (una fila). Si la fila no
+    existe todavía se cuenta una vez y se guarda; en otros motores, sin los
+    disparadores que la mantienen, se cuenta siempre.
+    """
+    contar = select(func.count()).select_from(Productor).where(Productor.activo.is_(True))
+    if not es_sqlite(db.engine.url):
+        return db.session.execute(contar).scalar()
+    activos = db.session.execute(select(ResumenProductores.activos).where(ResumenProductores.id == 1)).scalar()
+    if activos is None:
+        activos = _recontar_productores_activos(contar)
+        db.session.commit()
+    return activos
+
+def _recontar_productores_activos(contar=None):
+    """Vuelve a contar los productores activos en resumen_productores. No hace commit."""
+    contar = contar if contar is not None else select(func.count()).select_from(Productor).where(Productor.activo.is_(True))
+    tabla = ResumenProductores.__table__
+    insertar_si_no_existe(db.session, tabla, id=1, activos=0)
+    db.session.execute(update(tabla).where(tabla.c.id == 1).values(activos=contar.scalar_subquery()))
+    return db.session.execute(select(tabla.c.activos).where(tabla.c.id == 1)).scalar()
+
+def reconstruir_resumenes():
+    """
+    Recalcula todos los resúmenes desde el historial de cargas y procesos
+    (incluidas las campañas archivadas, vía carga_historica).
+    Retorna la cantidad de filas (planta, día) generadas.
+    """
+    resumen = ResumenDiarioPlanta.__table__
+    activos = ProductorActivoDiario.__table__
+    historia = carga_historica.c
+    dia_salida = func.date(historia.fecha_salida, type_=db.Date)
+    dia_proceso = func.date(historia.fecha_proceso, type_=db.Date)
+
+    db.session.execute(activos.delete())
+    db.session.execute(resumen.delete())
+
+    db.session.execute(activos.insert().from_select(
+        ['planta_id', 'fecha', 'productor_id'],
+        select(historia.planta_id, dia_salida, historia.productor_id)
+        .where(historia.fecha_salida.isnot(None)).distinct()
+    ))
+
+    filas = {}
+    def fila(planta_id, fecha):
+        return filas.setdefault((planta_id, fecha), {
+            'planta_id': planta_id, 'fecha': fecha, 'kilos_netos': 0, 'lotes': 0, 'productores': 0,
+            'kilos_fibra': 0, 'kilos_semilla': 0, 'kilos_netos_procesados': 0, 'lotes_procesados': 0,
+        })
+
+    salidas = db.session.execute(
+        select(historia.planta_id, dia_salida, func.sum(historia.peso_neto), func.count())
+        .where(historia.fecha_salida.isnot(None)).group_by(historia.planta_id, dia_salida)
+    )
+    for planta_id, fecha, kilos_netos, lotes in salidas:
+        fila(planta_id, fecha).update(kilos_netos=kilos_netos or 0, lotes=lotes)
+
+    productores = db.session.execute(
+        select(activos.c.planta_id, activos.c.fecha, func.count())
+        .group_by(activos.c.planta_id, activos.c.fecha)
+    )
+    for planta_id, fecha, cantidad in productores:
+        fila(planta_id, fecha)['productores'] = cantidad
+
+    procesos = db.session.execute(
+        select(
+            historia.planta_id, dia_proceso, func.sum(historia.kilos_fibra),
+            func.sum(historia.kilos_semilla), func.sum(historia.peso_neto), func.count()
+        ).where(historia.fecha_proceso.isnot(None)).group_by(historia.planta_id, dia_proceso)
+    )
+    for planta_id, fecha, fibra, semilla, netos, cantidad in procesos:
+        fila(planta_id, fecha).update(
+            kilos_fibra=fibra or 0, kilos_semilla=semilla or 0,
+            kilos_netos_procesados=netos or 0, lotes_procesados=cantidad
+        )
+
+    if filas:
+        db.session.execute(resumen.insert(), list(filas.values()))
+    _recontar_productores_activos()
+    db.session.commit()
+    return len(filas)
@@ -0,0 +1,224 @@
+# C:/SGPA/app/utils/romaneos.py
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from app.models.operaciones import Carga
+from app.utils.helpers import obtener_qr_png
+
+def _formatear_fecha(fecha):
+    return fecha.strftime('%d/%m/%Y %H:%M') if fecha else '-'
+
+def _formatear_kilos(valor):
+    return f"{valor:,.2f} kg".replace(',', 'X').replace('.', ',').replace('X', '.') if valor else '-'
+
+def datos_romaneo(carga):
+    """
+    Extrae de la carga todo lo que se imprime en el romaneo, como un dict de
+    textos simples que puede enviarse a otro proceso.
+    """
+    return {
+        'lote_id': carga.lote_id,
+        'planta': carga.planta.nombre if carga.planta else '',
+        'productor': carga.productor.nombre_completo,
+        'cuit': carga.productor.cuit,
+        'chofer': carga.chofer.nombre_completo,
+        'dni': carga.chofer.dni,
+        'placa': carga.vehiculo.placa,
+        'placa_acoplado': carga.placa_acoplado or '-',
+        'numero_bascula': str(carga.numero_bascula or '-'),
+        'fecha_entrada': _formatear_fecha(carga.fecha_entrada),
+        'fecha_salida': _formatear_fecha(carga.fecha_salida),
+        'peso_bruto': _formatear_kilos(carga.peso_bruto),
+        'peso_tara': _formatear_kilos(carga.peso_tara),
+        'peso_neto': _formatear_kilos(carga.peso_neto),
+        'humedad': f"{carga.humedad:.1f} %" if carga.humedad is not None else '-',
+        'dtv': carga.dtv or '-',
+        'observaciones': carga.observaciones_romaneo or '',
+        'estado': carga.estado,
+    }
+
+def clave_romaneo(datos):
+    """Hash del contenido del romaneo: si la carga cambia (ej. se registra la salida) cambia la clave."""
+    return hashlib.sha256(json.dumps(datos, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+
+def renderizar_romaneos(romaneos, ruta_fuente=None):
+    """
+    Dibuja un PDF con un romaneo por página. 'romaneos' es una lista de
+    (datos, qr_png). Se ejecuta en los procesos del pool: no usa la base de
+    datos. reportlab se importa con el primer romaneo (romaneos_pdf).
+    """
+    from app.utils.romaneos_pdf import renderizar_romaneos as renderizar
+    return renderizar(romaneos, ruta_fuente)
+
+def renderizar_parte(romaneos, ruta_fuente, static_folder):
+    """
+    Dibuja una parte de un PDF masivo en un proceso del pool: 'romaneos' es
+    una lista de datos de romaneo y los QR se leen del disco (o se dibujan)
+    acá y no en el proceso que encarga el PDF.
+    """
+    return renderizar_romaneos(
+        [(datos, obtener_qr_png(datos['lote_id'], static_folder)) for datos in romaneos], ruta_fuente
+    )
+
+# Pool de procesos para dibujar fuera del hilo de la petición (uno por proceso web)
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_pendientes = {}
+
+def _obtener_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=current_app.config.get('ROMANEO_PROCESOS', 2))
+            _pool_pid = os.getpid()
+        return _pool
+
+def _descartar_pool(pool):
+    """Descarta el pool si sigue siendo el actual: el próximo _obtener_pool crea uno nuevo."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _enviar(funcion, *args):
+    """
+    Envía la función al pool. Si un proceso del pool murió (BrokenProcessPool)
+    el pool ya no acepta tareas: se reemplaza por uno nuevo y se reintenta.
+    """
+    pool = _obtener_pool()
+    try:
+        return pool.submit(funcion, *args)
+    except BrokenProcessPool:
+        current_app.logger.warning("Pool de romaneos roto; se crea uno nuevo.")
+        _descartar_pool(pool)
+        return _obtener_pool().submit(funcion, *args)
+
+def _carpeta_romaneos():
+    carpeta = current_app.config.get('ROMANEO_CARPETA') or os.path.join(current_app.instance_path, 'romaneos')
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def _guardar(ruta, contenido):
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+def _cargar_carga(carga_id):
+    return Carga.query.options(
+        joinedload(Carga.productor), joinedload(Carga.chofer),
+        joinedload(Carga.vehiculo), joinedload(Carga.planta),
+    ).get(carga_id)
+
+def encargar_romaneo(carga):
+    """
+    Encarga el romaneo de la carga al pool y retorna (ruta, futuro). Si ya está
+    en disco el futuro es None; si ya está encargado se reutiliza el mismo futuro.
+    """
+    datos = datos_romaneo(carga)
+    ruta = os.path.join(_carpeta_romaneos(), f"{carga.lote_id}-{clave_romaneo(datos)}.pdf")
+    if os.path.exists(ruta):
+        return ruta, None
+
+    with _pool_lock:
+        futuro = _pendientes.get(ruta)
+    if futuro is not None:
+        return ruta, futuro
+
+    qr_png = obtener_qr_png(carga.lote_id)
+    pool = _obtener_pool()
+    futuro = _enviar(renderizar_romaneos, [(datos, qr_png)], current_app.config.get('ROMANEO_FUENTE'))
+
+    def _al_terminar(f):
+        with _pool_lock:
+            _pendientes.pop(ruta, None)
+        if f.cancelled():
+            return
+        if isinstance(f.exception(), BrokenProcessPool):
+            # Murió un proceso durante el dibujo: el siguiente encargo usará otro pool
+            _descartar_pool(pool)
+        elif f.exception() is None:
+            _guardar(ruta, f.result())
+
+    with _pool_lock:
+        _pendientes[ruta] = futuro
+    futuro.add_done_callback(_al_terminar)
+    return ruta, futuro
+
+def preparar_romaneo(carga_id):
+    """
+    Dibuja y guarda en disco el romaneo de la carga en el proceso actual (la
+    tarea 'romaneo' de la cola de trabajos, encargada al registrar la salida).
+    Retorna la ruta del PDF, o None si la carga no existe.
+    """
+    carga = _cargar_carga(carga_id)
+    if carga is None:
+        return None
+    datos = datos_romaneo(carga)
+    ruta = os.path.join(_carpeta_romaneos(), f"{carga.lote_id}-{clave_romaneo(datos)}.pdf")
+    if not os.path.exists(ruta):
+        pdf = renderizar_romaneos([(datos, obtener_qr_png(carga.lote_id))], current_app.config.get('ROMANEO_FUENTE'))
+        _guardar(ruta, pdf)
+    return ruta
+
+def obtener_romaneo(carga_id, timeout=30):
+    """
+    Retorna los bytes del PDF del romaneo de la carga (None si no existe).
+    Después del primer dibujo se lee directamente del disco.
+    """
+    carga = _cargar_carga(carga_id)
+    if carga is None:
+        return None
+    ruta, futuro = encargar_romaneo(carga)
+    if futuro is not None:
+        # Se espera el resultado y no el archivo: el callback puede no haber escrito aún
+        return futuro.result(timeout=timeout)
+    with open(ruta, 'rb') as archivo:
+        return archivo.read()
+
+def romaneos_por_fecha(desde, hasta, planta_id=None, timeout=300):
+    """
+    Retorna (pdf, cantidad) con los romaneos de las cargas ingresadas entre
+    'desde' y 'hasta' (datetimes, 'hasta' exclusivo), una por página; pdf es
+    None si no hay cargas. El rango no puede superar ROMANEO_RANGO_MAXIMO_DIAS
+    (ValueError). Las cargas se leen de a ROMANEO_PAGINAS_POR_PARTE, cada
+    parte se dibuja en un proceso del pool y al final se unen en orden.
+    """
+    maximo = current_app.config.get('ROMANEO_RANGO_MAXIMO_DIAS', 31)
+    if hasta - desde > timedelta(days=maximo):
+        raise ValueError(f'El rango de fechas no puede superar {maximo} días.')
+    query = Carga.query.options(
+        joinedload(Carga.productor), joinedload(Carga.chofer),
+        joinedload(Carga.vehiculo), joinedload(Carga.planta),
+    ).filter(Carga.fecha_entrada >= desde, Carga.fecha_entrada < hasta)
+    if planta_id is not None:
+        query = query.filter(Carga.planta_id == planta_id)
+
+    tamano = current_app.config.get('ROMANEO_PAGINAS_POR_PARTE', 200)
+    argumentos = (current_app.config.get('ROMANEO_FUENTE'), current_app.static_folder)
+    futuros, parte, cantidad = [], [], 0
+    for carga in query.order_by(Carga.fecha_entrada, Carga.id).yield_per(tamano):
+        parte.append(datos_romaneo(carga))
+        cantidad += 1
+        if len(parte) == tamano:
+            futuros.append(_enviar(renderizar_parte, parte, *argumentos))
+            parte = []
+    if parte:
+        futuros.append(_enviar(renderizar_parte, parte, *argumentos))
+    if not futuros:
+        return None, 0
+
+    # 'timeout' es para el PDF completo, no para cada parte
+    limite = time.monotonic() + timeout
+    partes = [futuro.result(timeout=max(limite - time.monotonic(), 0)) for futuro in futuros]
+    from app.utils.romaneos_pdf import unir_pdfs
+    return unir_pdfs(partes), cantidad
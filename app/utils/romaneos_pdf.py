@@ -0,0 +1,171 @@
+# C:/SGPA/app/utils/romaneos_pdf.py
+"""
+Dibujo del PDF de los romaneos con reportlab. Se importa recién al dibujar
+el primer romaneo (en el proceso web o en los del pool), así reportlab no
+se carga al arrancar cada worker.
+"""
+import io
+import os
+import re
+from functools import lru_cache
+from reportlab.lib.pagesizes import A5, landscape
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+PAGINA = landscape(A5)
+
+@lru_cache(maxsize=None)
+def _fuentes(ruta_fuente=None):
+    """
+    Registra la fuente del romaneo una sola vez por proceso.
+    Retorna (normal, negrita); sin ROMANEO_FUENTE se usan las fuentes base del PDF.
+    """
+    if ruta_fuente and os.path.exists(ruta_fuente):
+        pdfmetrics.registerFont(TTFont('Romaneo', ruta_fuente))
+        return 'Romaneo', 'Romaneo'
+    return 'Helvetica', 'Helvetica-Bold'
+
+# Posición de cada dato en la hoja: (etiqueta, clave, x, y) en milímetros
+_CAMPOS = (
+    ('Productor', 'productor', 12, 112), ('CUIT', 'cuit', 120, 112),
+    ('Chofer', 'chofer', 12, 102), ('DNI', 'dni', 120, 102),
+    ('Patente', 'placa', 12, 92), ('Acoplado', 'placa_acoplado', 70, 92), ('Báscula', 'numero_bascula', 120, 92),
+    ('Entrada', 'fecha_entrada', 12, 82), ('Salida', 'fecha_salida', 70, 82),
+    ('Humedad', 'humedad', 12, 72), ('DTV', 'dtv', 70, 72),
+    ('Peso Bruto', 'peso_bruto', 12, 56), ('Peso Tara', 'peso_tara', 12, 46), ('Peso Neto', 'peso_neto', 12, 36),
+)
+
+def _dibujar_plantilla(c, normal, negrita):
+    """Partes fijas del romaneo (marco, título y etiquetas); se guardan como un formulario reutilizable."""
+    ancho, alto = PAGINA
+    c.setLineWidth(1)
+    c.rect(8 * mm, 8 * mm, ancho - 16 * mm, alto - 16 * mm)
+    c.setFont(negrita, 14)
+    c.drawString(12 * mm, alto - 18 * mm, 'ROMANEO DE PESAJE - ALGODÓN EN BRUTO')
+    c.setLineWidth(0.5)
+    c.line(8 * mm, alto - 22 * mm, ancho - 8 * mm, alto - 22 * mm)
+    c.line(8 * mm, 64 * mm, 150 * mm, 64 * mm)
+    c.setFont(negrita, 8)
+    for etiqueta, _, x, y in _CAMPOS:
+        c.drawString(x * mm, (y + 4) * mm, etiqueta.upper())
+    c.setFont(normal, 7)
+    c.drawString(12 * mm, 12 * mm, 'Firma Balancero: ____________________')
+    c.drawString(90 * mm, 12 * mm, 'Firma Chofer: ____________________')
+
+def _dibujar_romaneo(c, datos, qr_png, normal, negrita):
+    ancho, alto = PAGINA
+    c.doForm('plantilla')
+    c.setFont(negrita, 12)
+    c.drawRightString(ancho - 12 * mm, alto - 18 * mm, f"Lote {datos['lote_id']}")
+    c.setFont(normal, 8)
+    c.drawString(12 * mm, alto - 27 * mm, datos['planta'])
+    c.drawRightString(ancho - 12 * mm, alto - 27 * mm, datos['estado'])
+    for _, clave, x, y in _CAMPOS:
+        es_peso = clave.startswith('peso_')
+        c.setFont(negrita if es_peso else normal, 12 if es_peso else 10)
+        c.drawString(x * mm, y * mm, datos[clave])
+    if datos['observaciones']:
+        c.setFont(normal, 8)
+        c.drawString(12 * mm, 22 * mm, f"Obs.: {datos['observaciones'][:110]}")
+    if qr_png:
+        c.drawImage(ImageReader(io.BytesIO(qr_png)), ancho - 58 * mm, 18 * mm, 46 * mm, 46 * mm)
+    c.showPage()
+
+def renderizar_romaneos(romaneos, ruta_fuente=None):
+    """
+    Dibuja un PDF con un romaneo por página. 'romaneos' es una lista de
+    (datos, qr_png). Se ejecuta en los procesos del pool: no usa la base de datos.
+    """
+    normal, negrita = _fuentes(ruta_fuente)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGINA, pageCompression=1)
+    c.setTitle('Romaneo' if len(romaneos) == 1 else 'Romaneos')
+    # La plantilla se dibuja una vez por documento y cada página la referencia
+    c.beginForm('plantilla')
+    _dibujar_plantilla(c, normal, negrita)
+    c.endForm()
+    for datos, qr_png in romaneos:
+        _dibujar_romaneo(c, datos, qr_png, normal, negrita)
+    c.save()
+    return buffer.getvalue()
+
+
+# --- Unión de PDFs ---
+
+_REFERENCIA = re.compile(rb'(\d+) 0 R\b')
+_OBJETO = re.compile(rb'\d+ 0 obj\s*(.*)endobj', re.S)
+
+def _objetos(pdf):
+    """
+    Objetos de un PDF de reportlab (tabla xref clásica, sin flujos de
+    objetos) como {número: cuerpo}, más los números de /Root e /Info.
+    """
+    inicio_xref = int(pdf[pdf.rindex(b'startxref') + 9:].split()[0])
+    lineas = pdf[inicio_xref:].split(b'trailer')[0].split()
+    # 'xref', primer número, cantidad y luego (desplazamiento, generación, n|f) por objeto
+    primero, entradas = int(lineas[1]), lineas[3:]
+    desplazamientos = {
+        primero + i: int(entradas[3 * i])
+        for i in range(len(entradas) // 3) if entradas[3 * i + 2] == b'n'
+    }
+    limites = sorted(desplazamientos.values()) + [inicio_xref]
+    fin = dict(zip(limites, limites[1:]))
+    cuerpos = {
+        numero: _OBJETO.match(pdf, inicio, fin[inicio]).group(1).rstrip()
+        for numero, inicio in desplazamientos.items()
+    }
+    trailer = pdf[inicio_xref:]
+    raiz = int(re.search(rb'/Root (\d+) 0 R', trailer).group(1))
+    info = re.search(rb'/Info (\d+) 0 R', trailer)
+    return cuerpos, raiz, int(info.group(1)) if info else None
+
+def unir_pdfs(partes):
+    """
+    Une en orden las páginas de varios PDFs dibujados por renderizar_romaneos.
+    Cada parte conserva sus recursos (fuentes, plantilla, imágenes); solo se
+    renumeran los objetos y se arma un catálogo con un único árbol de páginas.
+    """
+    if len(partes) == 1:
+        return partes[0]
+    # Los números 1 y 2 quedan para el catálogo y el árbol de páginas nuevos
+    objetos, paginas = [], []
+    for pdf in partes:
+        cuerpos, raiz, info = _objetos(pdf)
+        arbol = int(re.search(rb'/Pages (\d+) 0 R', cuerpos[raiz]).group(1))
+        hijos = re.search(rb'/Kids \[(.*?)\]', cuerpos[arbol], re.S).group(1)
+        numeros = {arbol: 2}
+        for numero in sorted(cuerpos):
+            if numero not in (raiz, arbol, info):
+                numeros[numero] = len(objetos) + len(numeros) + 2
+        def renumerar(referencia):
+            return b'%d 0 R' % numeros[int(referencia.group(1))]
+        for numero in sorted(cuerpos):
+            if numero in (raiz, arbol, info):
+                continue
+            # Solo se renumera el diccionario: el contenido de los streams no se toca
+            cuerpo = cuerpos[numero]
+            corte = cuerpo.find(b'stream')
+            if corte == -1:
+                corte = len(cuerpo)
+            objetos.append(_REFERENCIA.sub(renumerar, cuerpo[:corte]) + cuerpo[corte:])
+        paginas.extend(numeros[int(hijo)] for hijo in _REFERENCIA.findall(hijos))
+
+    cuerpos = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Count %d /Kids [ %s ] >>' % (len(paginas), b' '.join(b'%d 0 R' % n for n in paginas)),
+    ] + objetos
+    salida = io.BytesIO()
+    salida.write(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+    desplazamientos = []
+    for numero, cuerpo in enumerate(cuerpos, 1):
+        desplazamientos.append(salida.tell())
+        salida.write(b'%d 0 obj\n%s\nendobj\n' % (numero, cuerpo))
+    inicio_xref = salida.tell()
+    salida.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(cuerpos) + 1))
+    for desplazamiento in desplazamientos:
+        salida.write(b'%010d 00000 n \n' % desplazamiento)
+    salida.write(b'trailer\n<< /Root 1 0 R /Size %d >>\nstartxref\n%d\n%%%%EOF\n' % (len(cuerpos) + 1, inicio_xref))
+    return salida.getvalue()
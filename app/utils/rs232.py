@@ -1,43 +1,348 @@
 # C:/SGPA/app/utils/rs232.py
-import serial
+import os
+import re
 import time
 import random
+import logging
+import tempfile
+import threading
+from collections import deque
+from app.utils.metricas import contar_lectura_bascula
 
-def leer_peso_bascula(puerto='COM1', baudrate=9600, timeout=2, en_produccion=False):
+logger = logging.getLogger(__name__)
+
+class BasculaOcupada(RuntimeError):
+    """El puerto de la báscula ya lo tiene abierto el lector de otro proceso."""
+
+def parsear_trama(linea):
+    """
+    Interpreta una trama de la báscula, ej: "ST,GS,+002515.5 kg".
+    Retorna (peso, estable) donde 'estable' es True/False según el indicador
+    ST/US de la trama, o None si la trama no lo trae. Retorna None si la
+    trama no contiene un peso.
+    """
+    if not linea:
+        return None
+    partes = linea.replace(' ', '').split(',')
+    estable = None
+    if partes[0] in ('ST', 'US', 'OL'):
+        estable = partes[0] == 'ST'
+    for parte in partes:
+        if 'kg' in parte:
+            peso_str = parte.replace('kg', '').replace('+', '')
+            return float(peso_str), estable
+    return None
+
+def formatear_trama(peso, estable=True):
+    """Arma una trama en el formato de la báscula: "ST,GS,+002515.5 kg"."""
+    return f"{'ST' if estable else 'US'},GS,{peso:+09.1f} kg"
+
+def generar_tramas_simuladas(rng=None, pesos_reposo=None):
+    """
+    Generador infinito de tramas de una báscula de camiones: el peso sube con
+    ruido mientras el camión entra, se estabiliza, y vuelve a cero al salir.
+    Si se pasa la lista 'pesos_reposo', se le agrega el peso de cada camión.
+    """
+    rng = rng or random.Random()
+    while True:
+        objetivo = round(rng.uniform(18000.0, 32000.0), 1)
+        if pesos_reposo is not None:
+            pesos_reposo.append(objetivo)
+        for paso in range(1, 11):
+            yield formatear_trama(objetivo * paso / 10 + rng.gauss(0, 150), estable=False)
+        for _ in range(40):
+            yield formatear_trama(objetivo + rng.choice((-0.5, 0.0, 0.0, 0.5)), estable=True)
+        for paso in range(4, -1, -1):
+            yield formatear_trama(objetivo * paso / 5 + rng.gauss(0, 150), estable=False)
+        for _ in range(15):
+            yield formatear_trama(0.0, estable=True)
+
+class LectorBascula(threading.Thread):
+    """
+    Lector permanente de una báscula: mantiene el puerto abierto, interpreta las
+    tramas de forma continua y guarda las últimas lecturas en un buffer circular.
+    Una lectura se considera estable cuando la trama lo indica (ST) y las
+    últimas 'ventana' lecturas no varían más de 'tolerancia' kg.
+    """
+
+    def __init__(self, numero_bascula, puerto='COM1', baudrate=9600, en_produccion=False,
+                 ventana=5, tolerancia=20.0, capacidad=100, intervalo_simulacion=0.1):
+        super().__init__(name=f'bascula-{numero_bascula}', daemon=True)
+        self.numero_bascula = numero_bascula
+        self.puerto = puerto
+        self.baudrate = baudrate
+        self.en_produccion = en_produccion
+        self.ventana = ventana
+        self.tolerancia = tolerancia
+        self.intervalo_simulacion = intervalo_simulacion
+        # Cada lectura es (momento, peso, estable); deque con maxlen descarta las viejas.
+        self.lecturas = deque(maxlen=capacidad)
+        # Tuplas inmutables reemplazadas de una vez: leerlas no necesita lock.
+        self.ultima_lectura = None
+        self.ultima_estable = None
+        self.tramas_leidas = 0
+        self.tramas_invalidas = 0
+        # Las conexiones que transmiten el peso esperan aquí cada lectura nueva
+        # en lugar de consultar el puerto: un solo lector abastece a todas.
+        self.version = 0
+        self._novedad = threading.Condition()
+        self._detener = threading.Event()
+
+    def detener(self, esperar=True):
+        self._detener.set()
+        with self._novedad:
+            self._novedad.notify_all()
+        if esperar and self.is_alive():
+            self.join(timeout=5)
+
+    def peso_estable(self, max_antiguedad=None):
+        """Último peso estable, o None si no hay o es más viejo que 'max_antiguedad' segundos."""
+        estable = self.ultima_estable
+        if estable is None:
+            return None
+        momento, peso = estable
+        if max_antiguedad is not None and time.monotonic() - momento > max_antiguedad:
+            return None
+        return peso
+
+    def procesar_linea(self, linea):
+        """Incorpora una trama al buffer y actualiza el estado de estabilidad."""
+        try:
+            resultado = parsear_trama(linea)
+        except (ValueError, IndexError):
+            resultado = None
+        if resultado is None:
+            self.tramas_invalidas += 1
+            return None
+
+        peso, indicador = resultado
+        momento = time.monotonic()
+        recientes = [l[1] for l in list(self.lecturas)[-(self.ventana - 1):]] + [peso]
+        estable = (
+            indicador is not False
+            and len(recientes) >= self.ventana
+            and max(recientes) - min(recientes) <= self.tolerancia
+        )
+        lectura = (momento, peso, estable)
+        self.lecturas.append(lectura)
+        self.ultima_lectura = lectura
+        self.tramas_leidas += 1
+        if estable:
+            self.ultima_estable = (momento, peso)
+        with self._novedad:
+            self.version += 1
+            self._novedad.notify_all()
+        return lectura
+
+    def esperar_lectura(self, version_vista, timeout=None):
+        """
+        Bloquea hasta que haya una lectura posterior a 'version_vista' (o venza
+        el timeout) y retorna (version, ultima_lectura).
+        """
+        with self._novedad:
+            self._novedad.wait_for(
+                lambda: self.version != version_vista or self._detener.is_set(), timeout
+            )
+            return self.version, self.ultima_lectura
+
+    def _lineas(self):
+        if not self.en_produccion:
+            for linea in generar_tramas_simuladas():
+                if self._detener.wait(self.intervalo_simulacion):
+                    return
+                yield linea
+            return
+
+        import serial
+        with serial.Serial(self.puerto, self.baudrate, timeout=1) as ser:
+            while not self._detener.is_set():
+                crudo = ser.readline()
+                if crudo:
+                    yield crudo.decode('ascii', errors='ignore').strip()
+
+    def run(self):
+        # pyserial se importa en el hilo del lector, no al arrancar la app
+        import serial
+        espera = 1
+        while not self._detener.is_set():
+            try:
+                for linea in self._lineas():
+                    self.procesar_linea(linea)
+                    espera = 1
+            except serial.SerialException as e:
+                logger.error("Error de comunicación serial en %s: %s", self.puerto, e)
+                # Reintento con espera creciente mientras la báscula no responda
+                self._detener.wait(espera)
+                espera = min(espera * 2, 30)
+
+class SimuladorBasculaPty:
+    """
+    Báscula de prueba sobre un pseudo-terminal (solo POSIX): escribe tramas
+    ruidosas en el extremo maestro y expone en 'puerto' la ruta del esclavo,
+    que se abre con pyserial como si fuera un puerto real.
+    """
+
+    def __init__(self, intervalo=0.02, semilla=None):
+        import os
+        import tty
+        self._os = os
+        self.maestro, self._esclavo = os.openpty()
+        tty.setraw(self._esclavo)
+        self.puerto = os.ttyname(self._esclavo)
+        self.intervalo = intervalo
+        self.rng = random.Random(semilla)
+        self.tramas_enviadas = 0
+        self.pesos_reposo = [0.0]
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._emitir, name='simulador-bascula', daemon=True)
+
+    def _emitir(self):
+        for linea in generar_tramas_simuladas(self.rng, self.pesos_reposo):
+            if self._detener.wait(self.intervalo):
+                return
+            self._os.write(self.maestro, (linea + '\r\n').encode('ascii'))
+            self.tramas_enviadas += 1
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join(timeout=5)
+        self._os.close(self.maestro)
+        self._os.close(self._esclavo)
+
+# Lectores activos por número de báscula. Con la báscula real, un solo proceso
+# del servidor puede tener el puerto: los demás reciben BasculaOcupada.
+_lectores = {}
+_lectores_lock = threading.Lock()
+# Archivos de bloqueo de los puertos tomados por este proceso ({puerto: archivo})
+_bloqueos = {}
+
+def _ruta_bloqueo(puerto, config):
+    carpeta = config.get('BASCULAS_DIR_BLOQUEOS') or tempfile.gettempdir()
+    return os.path.join(carpeta, 'sgpa-bascula-' + re.sub(r'[^A-Za-z0-9]+', '_', puerto).strip('_') + '.lock')
+
+def _tomar_puerto(puerto, config):
+    """
+    Bloqueo exclusivo entre procesos del puerto (archivo con flock / msvcrt).
+    Retorna el archivo abierto, que retiene el bloqueo hasta cerrarse; lanza
+    BasculaOcupada si otro proceso ya tiene el puerto.
+    """
+    archivo = open(_ruta_bloqueo(puerto, config), 'a+')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        archivo.close()
+        raise BasculaOcupada(
+            f"El puerto {puerto} ya lo lee otro proceso del servidor; las rutas de "
+            f"báscula deben atenderse desde un único proceso."
+        ) from None
+    return archivo
+
+def obtener_lector(numero_bascula, config):
+    """
+    Retorna el lector de la báscula, iniciándolo la primera vez. Los puertos se
+    configuran en BASCULAS ({numero: puerto}); None si la báscula no existe.
+    Con BASCULAS_EN_PRODUCCION el primer proceso que lo inicia se queda con el
+    puerto y en los demás lanza BasculaOcupada.
+    """
+    lector = _lectores.get(numero_bascula)
+    if lector is not None and lector.is_alive():
+        return lector
+    puerto = config.get('BASCULAS', {}).get(numero_bascula)
+    if puerto is None:
+        return None
+    en_produccion = config.get('BASCULAS_EN_PRODUCCION', False)
+    with _lectores_lock:
+        lector = _lectores.get(numero_bascula)
+        if lector is None or not lector.is_alive():
+            if en_produccion and puerto not in _bloqueos:
+                try:
+                    _bloqueos[puerto] = _tomar_puerto(puerto, config)
+                except BasculaOcupada as e:
+                    logger.error("Báscula %s: %s", numero_bascula, e)
+                    raise
+            lector = LectorBascula(
+                numero_bascula, puerto,
+                baudrate=config.get('BASCULAS_BAUDRATE', 9600),
+                en_produccion=en_produccion,
+            )
+            lector.start()
+            _lectores[numero_bascula] = lector
+        return lector
+
+def peso_estable_actual(numero_bascula, config, max_antiguedad=5):
+    """Consulta inmediata del último peso estable de la báscula (sin E/S)."""
+    lector = obtener_lector(numero_bascula, config)
+    return lector.peso_estable(max_antiguedad) if lector else None
+
+def detener_lectores():
+    """Detiene todos los lectores de este proceso y libera sus puertos."""
+    with _lectores_lock:
+        for lector in _lectores.values():
+            lector.detener()
+        _lectores.clear()
+        for archivo in _bloqueos.values():
+            archivo.close()
+        _bloqueos.clear()
+
+def leer_peso_bascula(puerto='COM1', baudrate=9600, timeout=2, en_produccion=False, max_antiguedad=5, config=None):
     """
     Lee el peso de una báscula electrónica a través del puerto RS232.
     Si 'en_produccion' es False, simula la lectura para desarrollo.
+    Si ya hay un lector permanente en ese puerto, retorna su último peso
+    estable sin abrir el puerto (None si es más viejo que 'max_antiguedad'
+    segundos). En producción, si el puerto lo tiene el lector de otro proceso
+    registra el error y retorna None en lugar de disputarle el puerto.
     """
+    contar_lectura_bascula()
+    for lector in list(_lectores.values()):
+        if lector.puerto == puerto and lector.is_alive():
+            return lector.peso_estable(max_antiguedad)
+
     if not en_produccion:
-        print(f"MODO SIMULACIÓN: Leyendo peso de báscula en puerto {puerto}...")
+        logger.debug("MODO SIMULACIÓN: leyendo peso de báscula en puerto %s", puerto)
         time.sleep(1)  # Simular retardo de la comunicación
         peso_simulado = round(random.uniform(18000.0, 32000.0), 2)
-        print(f"Peso simulado obtenido: {peso_simulado} kg")
+        logger.debug("Peso simulado obtenido: %s kg", peso_simulado)
         return peso_simulado
 
+    try:
+        bloqueo = _tomar_puerto(puerto, config or {})
+    except BasculaOcupada as e:
+        logger.error("%s", e)
+        return None
+    with bloqueo:
+        return _leer_trama(puerto, baudrate, timeout)
+
+def _leer_trama(puerto, baudrate, timeout):
+    """Abre el puerto y lee una trama; el llamador ya tiene el bloqueo del puerto."""
+    import serial
     try:
         with serial.Serial(puerto, baudrate, timeout=timeout) as ser:
             # El comando a enviar depende del protocolo de la báscula.
             # Por ejemplo, podría ser un simple carácter como 'P' para 'Pedir Peso'.
-            # ser.write(b'P\r\n') 
-            
+            # ser.write(b'P\r\n')
+
             # Esperar la respuesta
             linea_de_datos = ser.readline().decode('ascii').strip()
-            
+
             # Procesar la línea de datos para extraer el peso.
             # Esto también depende del formato de respuesta de la báscula.
             # Ejemplo: "ST,GS,+002515.5 kg" -> Extraer '2515.5'
-            if linea_de_datos:
-                partes = linea_de_datos.replace(' ', '').split(',')
-                for parte in partes:
-                    if 'kg' in parte:
-                        peso_str = parte.replace('kg', '').replace('+', '')
-                        return float(peso_str)
-            return None
+            resultado = parsear_trama(linea_de_datos)
+            return resultado[0] if resultado else None
 
     except serial.SerialException as e:
-        print(f"Error de comunicación serial en {puerto}: {e}")
+        logger.error("Error de comunicación serial en %s: %s", puerto, e)
         return None
     except (ValueError, IndexError) as e:
-        print(f"Error al procesar los datos de la báscula: {e}")
+        logger.error("Error al procesar los datos de la báscula: %s", e)
         return None
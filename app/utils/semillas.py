@@ -0,0 +1,312 @@
+# C:/SGPA/app/utils/semillas.py
+"""
+Datos sintéticos a escala de producción para pruebas de carga (`flask seed`).
+
+Las cargas siguen la estacionalidad de la cosecha de algodón (pico entre abril
+y mayo, poca actividad el resto del año y menos los fines de semana), con
+pesos brutos de 18 a 32 t como el simulador de báscula, taras de 8 a 12 t,
+humedad algo mayor al final de la campaña y rindes de fibra que bajan con la
+humedad. Todo se inserta con executemany directo sobre la conexión, en
+transacciones grandes, con los ids de las cargas asignados de antemano para
+insertar sus procesos sin volver a leerlas.
+"""
+import math
+import random
+import uuid
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+from flask_security import hash_password
+from sqlalchemy import func, select
+
+from app import db
+from app.models.operaciones import (
+    Carga, Chofer, ProcesoDesmotado, Productor, Vehiculo, sql_indice_busqueda, sql_reconstruir_indice_busqueda,
+)
+from app.models.user import Planta, Role, User
+from app.utils.basedatos import es_sqlite
+from app.utils.cache_vistas import incrementar_versiones
+from app.utils.helpers import _reservar_numeros_lote
+from app.utils.importacion import formatear_cuit
+
+_PESOS_CUIT = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+_APELLIDOS = (
+    'Gómez', 'Pérez', 'Ramírez', 'Benítez', 'Acosta', 'González', 'Fernández', 'Romero', 'Sosa', 'Giménez',
+    'Martínez', 'Ortiz', 'Duarte', 'Villalba', 'Cabrera', 'Ayala', 'Ledesma', 'Franco', 'Vera', 'Medina',
+)
+_NOMBRES = (
+    'Juan', 'Carlos', 'José', 'Miguel', 'Ramón', 'Luis', 'Jorge', 'Hugo', 'Daniel', 'Oscar',
+    'María', 'Ana', 'Rosa', 'Marta', 'Silvia', 'Graciela', 'Norma', 'Claudia', 'Elena', 'Teresa',
+)
+# Día del año del pico de cosecha y su dispersión en días
+_PICO_COSECHA, _DISPERSION_COSECHA = 115, 32
+# Actividad relativa por día de la semana (lunes a domingo)
+_ACTIVIDAD_SEMANAL = (1.0, 1.0, 1.0, 1.0, 1.0, 0.65, 0.25)
+
+def cuit_sintetico(numero, prefijo='20'):
+    """CUIT con dígito verificador válido para el número de documento indicado."""
+    base = f'{prefijo}{numero:08d}'
+    resto = sum(int(d) * p for d, p in zip(base, _PESOS_CUIT)) % 11
+    return formatear_cuit(base + str({0: 0, 1: 9}.get(resto, 11 - resto)))
+
+@lru_cache(maxsize=1)
+def _textos_hora():
+    """'HH:MM:SS.000000' de cada segundo del día (mismo formato que el DateTime de SQLAlchemy en SQLite)."""
+    return tuple(f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}.000000' for s in range(86400))
+
+def _insertar(conexion, tabla, columnas, filas):
+    """INSERT de muchas filas (tuplas en el orden de 'columnas') con un único executemany."""
+    if filas:
+        marcadores = ', '.join('?' * len(columnas))
+        conexion.exec_driver_sql(f"INSERT INTO {tabla.name} ({', '.join(columnas)}) VALUES ({marcadores})", filas)
+
+def _contar(conexion, modelo):
+    return conexion.execute(select(func.count(modelo.id))).scalar()
+
+def _siguiente_id(conexion, modelo):
+    # En las tablas con AUTOINCREMENT, sqlite_sequence recuerda también los ids ya archivados
+    ultimo = conexion.execute(select(func.max(modelo.id))).scalar() or 0
+    if modelo.__table__.kwargs.get('sqlite_autoincrement'):
+        secuencia = conexion.exec_driver_sql(
+            'SELECT seq FROM sqlite_sequence WHERE name = ?', (modelo.__tablename__,)
+        ).scalar()
+        ultimo = max(ultimo, secuencia or 0)
+    return ultimo + 1
+
+def _peso_dia(dia, rng):
+    """Actividad esperada de un día: campana de la cosecha, piso fuera de temporada y fin de semana."""
+    distancia = dia.timetuple().tm_yday - _PICO_COSECHA
+    cosecha = math.exp(-0.5 * (distancia / _DISPERSION_COSECHA) ** 2)
+    return (0.02 + cosecha) * _ACTIVIDAD_SEMANAL[dia.weekday()] * rng.uniform(0.8, 1.2)
+
+def _repartir(total, pesos):
+    """Reparte 'total' en enteros proporcionales a 'pesos' (redondeo acumulado: la suma es exacta)."""
+    suma = sum(pesos)
+    resultado, acumulado, asignado = [], 0.0, 0
+    for peso in pesos:
+        acumulado += peso
+        hasta = round(total * acumulado / suma)
+        resultado.append(hasta - asignado)
+        asignado = hasta
+    return resultado
+
+def planificar_cargas(cargas, plantas, campanias, hasta, rng):
+    """
+    Cantidad de cargas por día y planta: [(día, {planta_id: cantidad})], en orden.
+    Cada campaña tiene un volumen distinto (buenos y malos años) y cada planta
+    una participación fija.
+    """
+    primer_dia = date(hasta.year - campanias + 1, 1, 1)
+    dias = [primer_dia + timedelta(days=n) for n in range((hasta.date() - primer_dia).days + 1)]
+    volumen_campania = {anio: rng.uniform(0.7, 1.3) for anio in range(primer_dia.year, hasta.year + 1)}
+    pesos = [_peso_dia(dia, rng) * volumen_campania[dia.year] for dia in dias]
+    # El último día solo cuenta la parte ya transcurrida de la jornada (6 a 21 h)
+    pesos[-1] *= min(1.0, max(0.0, (hasta.hour + hasta.minute / 60 - 6) / 15))
+    por_dia = _repartir(cargas, pesos)
+    participacion = [rng.uniform(0.5, 1.5) for _ in plantas]
+    plan = []
+    for dia, cantidad in zip(dias, por_dia):
+        if cantidad:
+            plan.append((dia, {p: n for p, n in zip(plantas, _repartir(cantidad, participacion)) if n}))
+    return plan
+
+def _usuario_semilla():
+    """Usuario que figura como balancero en las cargas generadas (uno inactivo propio si no hay ninguno)."""
+    usuario = User.query.order_by(User.id).first()
+    if usuario is None:
+        Role.insert_roles()
+        usuario = User(
+            email='semilla@sgpa.local', first_name='Datos', last_name='Sintéticos', active=False,
+            password=hash_password(uuid.uuid4().hex),
+        )
+        db.session.add(usuario)
+        db.session.commit()
+    return usuario.id
+
+def _crear_maestros(conexion, productores, choferes, vehiculos, rng):
+    """Inserta productores, choferes y vehículos; retorna el rango de ids de cada uno."""
+    rangos = {}
+    for modelo, cantidad, fila, columnas in (
+        (Productor, productores, lambda n: (
+            n, f'{rng.choice(_APELLIDOS)} {rng.choice(_NOMBRES)} (S{n})', cuit_sintetico(60000000 + n),
+            f'RP-S{n}', f'3704-{rng.randint(400000, 499999)}', 1 if rng.random() > 0.05 else 0,
+        ), ('id', 'nombre_completo', 'cuit', 'renpa', 'telefono', 'activo')),
+        (Chofer, choferes, lambda n: (
+            n, f'{rng.choice(_NOMBRES)} {rng.choice(_APELLIDOS)}', f'{60000000 + n}',
+        ), ('id', 'nombre_completo', 'dni')),
+        (Vehiculo, vehiculos, lambda n: (n, f'SG{n:06d}'), ('id', 'placa')),
+    ):
+        inicio = _siguiente_id(conexion, modelo)
+        _insertar(conexion, modelo.__table__, columnas, [fila(n) for n in range(inicio, inicio + cantidad)])
+        rangos[modelo] = (inicio, cantidad)
+    return rangos
+
+def sembrar(cargas=1000000, productores=20000, choferes=None, vehiculos=None, plantas=None,
+            campanias=3, hasta=None, semilla=1, tamano_transaccion=250000, resumenes=True, progreso=None):
+    """
+    Genera 'cargas' cargas distribuidas en las últimas 'campanias' campañas
+    hasta 'hasta' (por defecto ahora), con sus productores, choferes, vehículos
+    y resultados de desmotado. Las cargas cuya salida o proceso caería después
+    de 'hasta' quedan pendientes, como en una planta en funcionamiento.
+
+    'plantas' es la lista de códigos de planta (por defecto todas las existentes).
+    Los números de lote se reservan en secuencia_lote, así la app sigue la
+    numeración. 'progreso', si se indica, recibe (cargas_insertadas, total)
+    después de cada transacción. Retorna las filas insertadas por tabla.
+    Solo para SQLite.
+    """
+    if not es_sqlite(db.engine.url):
+        raise ValueError('El generador de datos sintéticos solo admite SQLite.')
+    rng = random.Random(semilla)
+    hasta = (hasta or datetime.utcnow()).replace(microsecond=0)
+    choferes = choferes or max(1, productores // 2)
+    vehiculos = vehiculos or choferes
+
+    Planta.insert_plantas()
+    consulta_plantas = Planta.query.order_by(Planta.id)
+    if plantas:
+        consulta_plantas = consulta_plantas.filter(Planta.codigo.in_(plantas))
+    codigos = {p.id: p.codigo for p in consulta_plantas}
+    if not codigos:
+        raise ValueError('No hay plantas para generar cargas.')
+    usuario_id = _usuario_semilla()
+    plan = planificar_cargas(cargas, list(codigos), campanias, hasta, rng)
+
+    columnas_carga = (
+        'id', 'lote_id', 'fecha_entrada', 'peso_bruto', 'peso_tara', 'peso_neto', 'fecha_salida', 'estado',
+        'numero_bascula', 'humedad', 'planta_id', 'productor_id', 'chofer_id', 'vehiculo_id',
+        'usuario_balancero_id', 'usuario_salida_id',
+    )
+    columnas_proceso = ('carga_id', 'fecha_proceso', 'kilos_fibra', 'kilos_semilla', 'usuario_id')
+    totales = {'productores': productores, 'choferes': choferes, 'vehiculos': vehiculos, 'cargas': 0, 'procesos': 0}
+
+    with db.engine.connect() as conexion:
+        # La base se puede regenerar: sin fsync por transacción mientras se siembra
+        conexion.exec_driver_sql('PRAGMA synchronous=OFF')
+        indices, busqueda = [], False
+        try:
+            rangos = _crear_maestros(conexion, productores, choferes, vehiculos, rng)
+            (productor_0, n_productores), (chofer_0, n_choferes), (vehiculo_0, n_vehiculos) = (
+                rangos[Productor], rangos[Chofer], rangos[Vehiculo]
+            )
+
+            # Números de lote de todo el período, reservados de una vez por planta y año
+            por_planta_anio = {}
+            for dia, por_planta in plan:
+                for planta_id, cantidad in por_planta.items():
+                    clave = (codigos[planta_id], dia.year)
+                    por_planta_anio[clave] = por_planta_anio.get(clave, 0) + cantidad
+            siguiente_lote = {
+                clave: _reservar_numeros_lote(conexion, *clave, cantidad) - cantidad + 1
+                for clave, cantidad in por_planta_anio.items()
+            }
+            conexion.commit()
+
+            # Con una carga grande conviene crear los índices al final (un ordenamiento) que mantenerlos fila a fila
+            indices = list(Carga.__table__.indexes) if cargas >= _contar(conexion, Carga) else []
+            for indice in indices:
+                indice.drop(conexion, checkfirst=True)
+            # Lo mismo con el índice de búsqueda: sin su disparador de alta, se llena al final
+            busqueda = bool(indices) and conexion.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'busqueda_carga_alta'"
+            ).first() is not None
+            if busqueda:
+                conexion.exec_driver_sql('DROP TRIGGER busqueda_carga_alta')
+
+            # Las fechas se manejan como segundos desde el primer día y se formatean con tablas precalculadas
+            primer_dia = plan[0][0] if plan else hasta.date()
+            textos_dia = [(primer_dia + timedelta(days=n)).isoformat() for n in range((hasta.date() - primer_dia).days + 1)]
+            horas = _textos_hora()
+            limite = int((hasta - datetime.combine(primer_dia, time())).total_seconds())
+            carga_id = primer_carga_id = _siguiente_id(conexion, Carga)
+            filas_cargas, filas_procesos = [], []
+            random_, gauss, triangular, log = rng.random, rng.gauss, rng.triangular, math.log
+            for dia, por_planta in plan:
+                base = (dia - primer_dia).days * 86400
+                hora_fin = min(21.0, (limite - base) / 3600)
+                # Humedad media algo mayor al final de la campaña (lluvias de otoño)
+                humedad_media = 9.0 + 2.0 * max(0.0, min(1.0, (dia.timetuple().tm_yday - _PICO_COSECHA) / 60))
+                for planta_id, cantidad in por_planta.items():
+                    codigo, anio = codigos[planta_id], dia.year
+                    prefijo_lote = f'{codigo}-{anio}-'
+                    numero = siguiente_lote[(codigo, anio)]
+                    siguiente_lote[(codigo, anio)] = numero + cantidad
+                    # Ingresos entre las 6 y las 21 h, más frecuentes a media mañana
+                    for entrada in sorted(base + int(triangular(6, hora_fin, min(10.5, hora_fin)) * 3600) for _ in range(cantidad)):
+                        salida = entrada + 1200 + int(random_() * 4200)
+                        bruto = int(180000 + random_() * 140000)
+                        humedad = int(min(18.0, max(5.0, gauss(humedad_media, 1.5))) * 10 + 0.5) / 10
+                        # Los productores grandes entregan mucho más que los chicos
+                        productor_id = productor_0 + int(n_productores * random_() ** 2)
+                        chofer = int(random_() * n_choferes)
+                        if salida > limite:
+                            tara, neto, texto_salida, estado = None, 0.0, None, 'Pendiente Salida'
+                        else:
+                            tara = int(80000 + random_() * 40000)
+                            neto = (bruto - tara) / 10
+                            tara /= 10
+                            texto_salida = textos_dia[salida // 86400] + ' ' + horas[salida % 86400]
+                            # Cola de desmotado: la mayoría en uno o dos días, algunos esperan más
+                            proceso = salida + 3600 + int(-log(1.0 - random_()) * 30 * 3600)
+                            if proceso > limite:
+                                estado = 'Completado'
+                            else:
+                                estado = 'Procesado'
+                                rinde = 0.31 + random_() * 0.03 - 0.004 * (humedad - 9.0)
+                                filas_procesos.append((
+                                    carga_id, textos_dia[proceso // 86400] + ' ' + horas[proceso % 86400],
+                                    int(neto * rinde * 10) / 10, int(neto * (0.565 + random_() * 0.04) * 10) / 10,
+                                    usuario_id,
+                                ))
+                        filas_cargas.append((
+                            carga_id, f'{prefijo_lote}{numero:06d}',
+                            textos_dia[entrada // 86400] + ' ' + horas[entrada % 86400], bruto / 10, tara, neto,
+                            texto_salida, estado, 1 + int(random_() * 2), humedad, planta_id, productor_id,
+                            chofer_0 + chofer, vehiculo_0 + chofer % n_vehiculos, usuario_id,
+                            usuario_id if tara else None,
+                        ))
+                        carga_id += 1
+                        numero += 1
+                if len(filas_cargas) >= tamano_transaccion:
+                    _insertar(conexion, Carga.__table__, columnas_carga, filas_cargas)
+                    _insertar(conexion, ProcesoDesmotado.__table__, columnas_proceso, filas_procesos)
+                    conexion.commit()
+                    totales['cargas'] += len(filas_cargas)
+                    totales['procesos'] += len(filas_procesos)
+                    filas_cargas, filas_procesos = [], []
+                    if progreso:
+                        progreso(totales['cargas'], cargas)
+            _insertar(conexion, Carga.__table__, columnas_carga, filas_cargas)
+            _insertar(conexion, ProcesoDesmotado.__table__, columnas_proceso, filas_procesos)
+            totales['cargas'] += len(filas_cargas)
+            totales['procesos'] += len(filas_procesos)
+            # Los productores con lotes nuevos entran en la próxima corrida incremental de liquidaciones
+            incrementar_versiones(conexion=conexion)
+            conexion.exec_driver_sql(
+                'INSERT OR REPLACE INTO novedad_liquidacion (productor_id, fecha) '
+                'SELECT DISTINCT productor_id, ? FROM carga WHERE id >= ?',
+                (datetime.utcnow().isoformat(' '), primer_carga_id),
+            )
+            conexion.commit()
+            if progreso:
+                progreso(totales['cargas'], cargas)
+        finally:
+            conexion.rollback()
+            # Índices y disparador se restauran aunque la siembra falle: sin ellos la
+            # base quedaría sin índices de carga y la búsqueda no vería las altas nuevas
+            for indice in indices:
+                indice.create(conexion, checkfirst=True)
+            if busqueda:
+                for sentencia in sql_indice_busqueda('busqueda_carga') + sql_reconstruir_indice_busqueda('busqueda_carga'):
+                    conexion.exec_driver_sql(sentencia)
+            conexion.commit()
+            sincronizacion = (current_app.config.get('SQLITE_PRAGMAS') or {}).get('synchronous', 'FULL')
+            conexion.exec_driver_sql(f'PRAGMA synchronous={sincronizacion}')
+
+    if resumenes:
+        from app.utils.cubo import reconstruir_cubo
+        from app.utils.resumenes import reconstruir_resumenes
+        totales['resumenes'] = reconstruir_resumenes()
+        totales['cubo'] = reconstruir_cubo()
+    return totales
@@ -0,0 +1,353 @@
+# C:/SGPA/app/utils/sincronizacion.py
+"""
+Sincronización de las plantas con casa central. Cada planta trabaja sobre su
+propia base y anota en registro_cambio (bandeja de salida) toda alta o
+modificación de productores, choferes, vehículos, cargas y procesos. Cuando
+hay enlace, la bandeja se envía en lotes comprimidos que casa central aplica
+de forma idempotente:
+
+- los cambios ya recibidos de una planta (secuencia <= la última) se ignoran,
+  así un lote reenviado tras un corte no duplica nada;
+- las filas se identifican por clave natural (CUIT, DNI, placa, número de
+  lote), porque los ids de cada base no coinciden;
+- ante dos cambios sobre la misma fila gana el de mayor (fecha, origen,
+  secuencia), sin importar el orden en que lleguen. Los cambios hechos
+  directamente en casa central no llevan sello.
+"""
+import gzip
+import json
+import urllib.error
+import urllib.request
+from datetime import date, datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.operaciones import (
+    Carga, Chofer, EnvioSincronizacion, OrigenSincronizacion, ProcesoDesmotado, Productor,
+    RegistroCambio, Vehiculo, VersionSincronizada,
+)
+from app.models.user import Planta, User
+from app.utils.resumenes import acumular_proceso, acumular_salida
+
+# Tablas sincronizadas, en orden de dependencia: tabla -> (modelo, columna clave, referencias).
+# Las referencias (columna -> (modelo, columna natural)) viajan por clave natural.
+ENTIDADES = {
+    'productor': (Productor, 'cuit', {}),
+    'chofer': (Chofer, 'dni', {}),
+    'vehiculo': (Vehiculo, 'placa', {}),
+    'carga': (Carga, 'lote_id', {
+        'planta_id': (Planta, 'codigo'), 'productor_id': (Productor, 'cuit'), 'chofer_id': (Chofer, 'dni'),
+        'vehiculo_id': (Vehiculo, 'placa'), 'usuario_balancero_id': (User, 'email'),
+        'usuario_salida_id': (User, 'email'),
+    }),
+    'proceso_desmotado': (ProcesoDesmotado, 'carga_id', {'carga_id': (Carga, 'lote_id'), 'usuario_id': (User, 'email')}),
+}
+_ORDEN = {tabla: orden for orden, tabla in enumerate(ENTIDADES)}
+_TABLA_DE = {modelo: tabla for tabla, (modelo, _, _) in ENTIDADES.items()}
+# Clave de session.info que suspende la bandeja (al aplicar cambios recibidos)
+_SIN_REGISTRO = 'sin_registro_cambios'
+
+# --- Bandeja de salida (planta) ---
+
+def _buscador(conexion):
+    """Función (modelo, columna natural), id -> valor natural, con caché para toda la operación."""
+    cache = {}
+
+    def buscar(referencia, id):
+        if (referencia, id) not in cache:
+            modelo, natural = referencia
+            cache[(referencia, id)] = conexion.execute(
+                select(getattr(modelo, natural)).where(modelo.id == id)
+            ).scalar()
+        return cache[(referencia, id)]
+    return buscar
+
+def _serializar(tabla, fila, buscar):
+    """(clave natural, datos) de un objeto o fila de 'tabla', con las referencias por clave natural."""
+    modelo, clave, referencias = ENTIDADES[tabla]
+    datos = {}
+    for columna in modelo.__table__.columns:
+        if columna.primary_key:
+            continue
+        valor = getattr(fila, columna.name)
+        if columna.name in referencias and valor is not None:
+            valor = buscar(referencias[columna.name], valor)
+        datos[columna.name] = valor.isoformat() if isinstance(valor, (date, datetime)) else valor
+    return datos[clave], datos
+
+def _fila_registro(tabla, operacion, fila, buscar, fecha):
+    clave, datos = _serializar(tabla, fila, buscar)
+    return {'fecha': fecha, 'tabla': tabla, 'clave': clave, 'operacion': operacion,
+            'datos': json.dumps(datos, ensure_ascii=False)}
+
+def bandeja_activa():
+    return has_app_context() and bool(current_app.config.get('SINCRONIZACION_ORIGEN'))
+
+def _registrar_cambios(session, contexto):
+    """after_flush: anota en la bandeja las altas y modificaciones de las tablas sincronizadas."""
+    if session.info.get(_SIN_REGISTRO) or not bandeja_activa():
+        return
+    cambios = [(objeto, 'insert') for objeto in session.new if type(objeto) in _TABLA_DE] + [
+        (objeto, 'update') for objeto in session.dirty
+        if type(objeto) in _TABLA_DE and session.is_modified(objeto, include_collections=False)
+    ]
+    if not cambios:
+        return
+    conexion = session.connection()
+    buscar, ahora = _buscador(conexion), datetime.utcnow()
+    # Las altas del mismo flush van en orden de dependencia (productor antes que su carga)
+    cambios.sort(key=lambda cambio: _ORDEN[_TABLA_DE[type(cambio[0])]])
+    conexion.execute(RegistroCambio.__table__.insert(), [
+        _fila_registro(_TABLA_DE[type(objeto)], operacion, objeto, buscar, ahora) for objeto, operacion in cambios
+    ])
+
+def registrar_filas(tabla, *filtros, operacion='update', tamano_lote=5000):
+    """
+    Anota en la bandeja el estado actual de las filas de 'tabla' que cumplen
+    'filtros', para las escrituras que no pasan por el ORM (importaciones
+    masivas) o para enviar por primera vez lo que ya estaba cargado. No hace
+    commit. Retorna la cantidad de filas anotadas.
+    """
+    modelo = ENTIDADES[tabla][0]
+    conexion = db.session.connection()
+    buscar, ahora, total = _buscador(conexion), datetime.utcnow(), 0
+    filas = db.session.execute(
+        select(modelo.__table__).where(*filtros).order_by(modelo.id).execution_options(yield_per=tamano_lote)
+    )
+    for particion in filas.partitions():
+        conexion.execute(RegistroCambio.__table__.insert(), [
+            _fila_registro(tabla, operacion, fila, buscar, ahora) for fila in particion
+        ])
+        total += len(particion)
+    return total
+
+def registrar_existentes():
+    """Anota como altas todas las filas actuales (primer envío de una planta). Retorna {tabla: filas}."""
+    totales = {tabla: registrar_filas(tabla, operacion='insert') for tabla in ENTIDADES}
+    db.session.commit()
+    return totales
+
+def init_sincronizacion(app):
+    """Conecta la bandeja de salida a las sesiones; solo anota si SINCRONIZACION_ORIGEN está configurado."""
+    if not event.contains(db.session, 'after_flush', _registrar_cambios):
+        event.listen(db.session, 'after_flush', _registrar_cambios)
+
+# --- Lotes comprimidos ---
+
+def comprimir_lote(origen, cambios):
+    """Lote listo para enviar: JSON comprimido con gzip."""
+    return gzip.compress(json.dumps({'origen': origen, 'cambios': cambios}, ensure_ascii=False).encode('utf-8'))
+
+def descomprimir_lote(contenido):
+    try:
+        lote = json.loads(gzip.decompress(contenido))
+    except (OSError, EOFError, ValueError) as error:
+        raise ValueError(f'Lote ilegible: {error}')
+    if not isinstance(lote, dict) or not isinstance(lote.get('origen'), str) or not lote['origen'] \
+            or not isinstance(lote.get('cambios'), list):
+        raise ValueError('Lote sin origen o sin cambios.')
+    return lote
+
+# --- Aplicación de cambios (casa central) ---
+
+def _convertir(columna, valor):
+    if valor is None:
+        return None
+    if isinstance(columna.type, db.DateTime):
+        return datetime.fromisoformat(valor)
+    if isinstance(columna.type, db.Date):
+        return date.fromisoformat(valor)
+    return valor
+
+def _validar_cambio(cambio):
+    """ValueError si al cambio le falta algo para aplicarlo: sus campos, una tabla conocida o la clave natural en los datos."""
+    if not isinstance(cambio, dict):
+        raise ValueError('Cambio mal formado: no es un objeto.')
+    faltan = [campo for campo in ('secuencia', 'fecha', 'tabla', 'clave', 'datos') if campo not in cambio]
+    if faltan:
+        raise ValueError(f"Cambio {cambio.get('secuencia')} mal formado: falta {', '.join(faltan)}.")
+    if not isinstance(cambio['secuencia'], int) or not isinstance(cambio['fecha'], str) \
+            or not isinstance(cambio['clave'], (str, int)) or not isinstance(cambio['datos'], dict):
+        raise ValueError(f"Cambio {cambio['secuencia']} mal formado: secuencia, fecha, clave o datos de tipo inválido.")
+    if cambio['tabla'] not in ENTIDADES:
+        raise ValueError(f"Tabla desconocida: {cambio['tabla']}")
+    clave = ENTIDADES[cambio['tabla']][1]
+    if cambio['datos'].get(clave) != cambio['clave']:
+        raise ValueError(f"Cambio {cambio['secuencia']} de {cambio['tabla']}: los datos no traen la clave natural {clave} = {cambio['clave']}.")
+
+def _aplicar_cambio(tabla, datos, ids):
+    """
+    Da de alta o actualiza la fila por su clave natural y lleva a los
+    resúmenes la salida o el desmotado que llegan por primera vez.
+    'ids' es la caché (modelo, columna natural, valor) -> id del lote.
+    """
+    if tabla not in ENTIDADES:
+        raise ValueError(f'Tabla desconocida: {tabla}')
+    modelo, clave, referencias = ENTIDADES[tabla]
+    valores = {}
+    for columna in modelo.__table__.columns:
+        if columna.primary_key or columna.name not in datos:
+            continue
+        valor = datos[columna.name]
+        if columna.name in referencias and valor is not None:
+            referencia, natural = referencias[columna.name]
+            if (referencia, natural, valor) not in ids:
+                ids[(referencia, natural, valor)] = db.session.query(referencia.id).filter(
+                    getattr(referencia, natural) == valor
+                ).scalar()
+            if ids[(referencia, natural, valor)] is None:
+                raise ValueError(f'{tabla} {datos.get(clave)}: no existe {referencia.__tablename__} {valor} en casa central.')
+            valor = ids[(referencia, natural, valor)]
+        valores[columna.name] = _convertir(columna, valor)
+
+    objeto = modelo.query.filter(getattr(modelo, clave) == valores[clave]).first()
+    nuevo = objeto is None
+    if nuevo:
+        objeto = modelo()
+        db.session.add(objeto)
+    tenia_salida = not nuevo and tabla == 'carga' and objeto.fecha_salida is not None
+    for nombre, valor in valores.items():
+        setattr(objeto, nombre, valor)
+
+    if tabla == 'carga' and objeto.fecha_salida is not None and not tenia_salida:
+        acumular_salida(objeto)
+    elif tabla == 'proceso_desmotado' and nuevo:
+        acumular_proceso(db.session.get(Carga, objeto.carga_id), objeto)
+
+def aplicar_lote(contenido):
+    """
+    Aplica un lote comprimido recibido de una planta, en una sola transacción.
+    Retorna {'origen', 'hasta' (última secuencia recibida de la planta),
+    'aplicados', 'descartados' (perdieron contra un cambio más nuevo),
+    'repetidos'}. Un cambio mal formado o que no se puede aplicar (por
+    ejemplo, una carga de un usuario que no existe en casa central o que
+    viola una restricción de la base) rechaza el lote entero con ValueError.
+    """
+    lote = descomprimir_lote(contenido)
+    for cambio in lote['cambios']:
+        _validar_cambio(cambio)
+    origen = lote['origen']
+    estado = db.session.get(OrigenSincronizacion, origen) or OrigenSincronizacion(origen=origen, ultima_secuencia=0)
+    db.session.add(estado)
+    resultado = {'origen': origen, 'aplicados': 0, 'descartados': 0, 'repetidos': 0}
+    ids = {}
+    # Sellos de las filas del lote, leídos de una vez
+    claves = {(c['tabla'], c['clave']) for c in lote['cambios']}
+    versiones = {
+        (v.tabla, v.clave): v for v in VersionSincronizada.query.filter(
+            tuple_(VersionSincronizada.tabla, VersionSincronizada.clave).in_(claves)
+        )
+    } if claves else {}
+    db.session.info[_SIN_REGISTRO] = True
+    try:
+        for cambio in sorted(lote['cambios'], key=lambda c: c['secuencia']):
+            if cambio['secuencia'] <= estado.ultima_secuencia:
+                resultado['repetidos'] += 1
+                continue
+            sello = (datetime.fromisoformat(cambio['fecha']), origen, cambio['secuencia'])
+            version = versiones.get((cambio['tabla'], cambio['clave']))
+            if version is not None and (version.fecha, version.origen, version.secuencia) >= sello:
+                resultado['descartados'] += 1
+            else:
+                _aplicar_cambio(cambio['tabla'], cambio['datos'], ids)
+                if version is None:
+                    version = versiones[(cambio['tabla'], cambio['clave'])] = VersionSincronizada(
+                        tabla=cambio['tabla'], clave=cambio['clave']
+                    )
+                    db.session.add(version)
+                version.fecha, version.origen, version.secuencia = sello
+                resultado['aplicados'] += 1
+            estado.ultima_secuencia = cambio['secuencia']
+        estado.fecha = datetime.utcnow()
+        resultado['hasta'] = estado.ultima_secuencia
+        db.session.commit()
+    except (KeyError, TypeError, IntegrityError) as error:
+        db.session.rollback()
+        detalle = error.orig if isinstance(error, IntegrityError) else error
+        raise ValueError(f'Cambio inválido en el lote: {type(detalle).__name__}: {detalle}') from error
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop(_SIN_REGISTRO, None)
+    return resultado
+
+# --- Envío (planta) ---
+
+def transporte_http(url, token, espera=60):
+    """Envía cada lote a casa central por HTTP (POST /sincronizacion/cambios)."""
+    def enviar(contenido):
+        peticion = urllib.request.Request(
+            url.rstrip('/') + '/sincronizacion/cambios', data=contenido, method='POST',
+            headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip',
+                     'Authorization': f'Bearer {token}'},
+        )
+        try:
+            with urllib.request.urlopen(peticion, timeout=espera) as respuesta:
+                return json.loads(respuesta.read())
+        except urllib.error.HTTPError as error:
+            detalle = error.read().decode('utf-8', 'replace')
+            try:
+                detalle = json.loads(detalle).get('error', detalle)
+            except ValueError:
+                pass
+            raise ValueError(f'Casa central rechazó el lote (HTTP {error.code}): {detalle}')
+    return enviar
+
+def transporte_local(url_base_datos):
+    """
+    Aplica cada lote directamente sobre otra base (otra app con su propio
+    motor): para pruebas con dos archivos SQLite o para llevar los cambios
+    en un archivo cuando no hay enlace.
+    """
+    from app import create_app
+    from config import Config
+    central = create_app(type('ConfigCentral', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': url_base_datos, 'SINCRONIZACION_ORIGEN': None,
+    }))
+
+    def enviar(contenido):
+        with central.app_context():
+            return aplicar_lote(contenido)
+    return enviar
+
+def cambios_pendientes(destino):
+    """Cambios de la bandeja que 'destino' todavía no confirmó."""
+    estado = db.session.get(EnvioSincronizacion, destino)
+    desde = estado.ultima_secuencia if estado else 0
+    return db.session.query(func.count(RegistroCambio.id)).filter(RegistroCambio.id > desde).scalar()
+
+def enviar_cambios(transporte, destino, tamano_lote=500, progreso=None):
+    """
+    Envía la bandeja a 'destino' desde el último cambio confirmado, de a
+    'tamano_lote' cambios por lote. Cada lote confirmado se guarda como
+    enviado; si el envío se corta, el próximo retoma desde ahí (y casa
+    central ignora lo que ya tenía). 'progreso' recibe la respuesta de cada
+    lote. Retorna la cantidad de cambios enviados.
+    """
+    origen = current_app.config.get('SINCRONIZACION_ORIGEN')
+    if not origen:
+        raise ValueError('SINCRONIZACION_ORIGEN no está configurado en esta planta.')
+    estado = db.session.get(EnvioSincronizacion, destino) or EnvioSincronizacion(destino=destino, ultima_secuencia=0)
+    enviados = 0
+    while True:
+        cambios = RegistroCambio.query.filter(RegistroCambio.id > estado.ultima_secuencia).order_by(
+            RegistroCambio.id
+        ).limit(tamano_lote).all()
+        if not cambios:
+            break
+        respuesta = transporte(comprimir_lote(origen, [
+            {'secuencia': c.id, 'fecha': c.fecha.isoformat(), 'tabla': c.tabla, 'clave': c.clave,
+             'operacion': c.operacion, 'datos': json.loads(c.datos)}
+            for c in cambios
+        ]))
+        if respuesta.get('hasta', 0) < cambios[-1].id:
+            raise ValueError(f'Casa central confirmó hasta {respuesta.get("hasta")} de {cambios[-1].id}.')
+        estado.ultima_secuencia, estado.fecha = cambios[-1].id, datetime.utcnow()
+        db.session.add(estado)
+        db.session.commit()
+        enviados += len(cambios)
+        if progreso:
+            progreso(respuesta)
+    return enviados
@@ -0,0 +1,415 @@
+# C:/SGPA/app/utils/trabajos.py
+"""
+Cola persistente de trabajos pesados fuera de la petición (tabla trabajo).
+
+Una vista encola el trabajo con encolar('tipo', {...}) y responde enseguida
+con su id; el estado se consulta en /trabajos/<id>. Como la cola está en la
+base, los trabajos sobreviven a un reinicio. La atienden hilos de cada
+proceso web (o procesos, con TRABAJOS_MODO=procesos), o solo
+"flask trabajos procesar" si TRABAJOS_EN_PROCESO_WEB=0:
+
+- un trabajador toma el trabajo disponible más antiguo con un UPDATE
+  condicionado a que siga disponible, así dos trabajadores (hilos o
+  procesos) nunca toman el mismo, y lo deja 'En curso' hasta 'vence'
+  (TRABAJOS_PLAZO). Si el proceso termina a mitad, al vencer el plazo otro
+  lo retoma, y eso cuenta como un intento;
+- si la tarea lanza una excepción se reintenta después de
+  TRABAJOS_ESPERA_REINTENTO segundos, el doble en cada intento, hasta
+  max_intentos. Un ValueError es un error en los datos y no se reintenta.
+
+Las tareas se registran con @tarea('nombre'), reciben como argumentos con
+nombre lo encolado (JSON) y lo que retornan se guarda como resultado (JSON).
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from werkzeug.utils import secure_filename
+from app import db
+from app.models.operaciones import Trabajo
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE, EN_CURSO, TERMINADO, FALLIDO = 'Pendiente', 'En curso', 'Terminado', 'Fallido'
+# Tope de la espera entre reintentos (segundos)
+ESPERA_MAXIMA = 3600
+# Filas con errores que se guardan en el resultado de una importación
+ERRORES_IMPORTACION = 500
+
+# --- Registro de tareas ---
+
+# nombre -> (función, intentos o None para TRABAJOS_INTENTOS)
+TAREAS = {}
+
+def tarea(nombre, intentos=None):
+    """Registra la función como la tarea 'nombre'; 'intentos' reemplaza TRABAJOS_INTENTOS."""
+    def registrar(funcion):
+        TAREAS[nombre] = (funcion, intentos)
+        return funcion
+    return registrar
+
+# --- Encolar y consultar ---
+
+def encolar(tipo, argumentos=None, usuario_id=None, planta_id=None, demora=0):
+    """
+    Agrega un trabajo a la cola y hace commit (junto con lo pendiente de la
+    sesión); retorna el Trabajo. 'argumentos' debe poder pasarse a JSON y
+    'demora' (segundos) posterga la primera ejecución.
+    """
+    if tipo not in TAREAS:
+        raise ValueError(f"Tarea desconocida: {tipo}")
+    ahora = datetime.utcnow()
+    trabajo = Trabajo(
+        tipo=tipo,
+        argumentos=json.dumps(argumentos or {}),
+        max_intentos=TAREAS[tipo][1] or current_app.config.get('TRABAJOS_INTENTOS', 3),
+        usuario_id=usuario_id,
+        planta_id=planta_id,
+        fecha_creacion=ahora,
+        disponible_desde=ahora + timedelta(seconds=demora),
+    )
+    db.session.add(trabajo)
+    db.session.commit()
+    _avisar_cola(current_app)
+    return trabajo
+
+def reintentar(trabajo):
+    """Vuelve a poner en la cola un trabajo fallido, con todos sus intentos. Retorna False si no había fallado."""
+    if trabajo.estado != FALLIDO:
+        return False
+    trabajo.estado = PENDIENTE
+    trabajo.intentos = 0
+    trabajo.disponible_desde = datetime.utcnow()
+    trabajo.fecha_fin = None
+    db.session.commit()
+    _avisar_cola(current_app)
+    return True
+
+def datos_trabajo(trabajo):
+    """Estado del trabajo como diccionario para las respuestas JSON."""
+    def fecha(valor):
+        return valor.isoformat() + 'Z' if valor else None
+    return {
+        'id': trabajo.id,
+        'tipo': trabajo.tipo,
+        'estado': trabajo.estado,
+        'intentos': trabajo.intentos,
+        'max_intentos': trabajo.max_intentos,
+        'fecha_creacion': fecha(trabajo.fecha_creacion),
+        'fecha_inicio': fecha(trabajo.fecha_inicio),
+        'fecha_fin': fecha(trabajo.fecha_fin),
+        'proximo_intento': fecha(trabajo.disponible_desde) if trabajo.estado == PENDIENTE else None,
+        'resultado': json.loads(trabajo.resultado) if trabajo.resultado else None,
+        'error': trabajo.error,
+    }
+
+def carpeta_trabajos():
+    """Carpeta de los archivos subidos que esperan ser procesados por un trabajo y de los que genera para descargar."""
+    carpeta = os.path.join(current_app.instance_path, 'trabajos')
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def guardar_archivo(archivo):
+    """Guarda un archivo subido (FileStorage) para procesarlo en un trabajo; retorna su ruta."""
+    ruta = os.path.join(carpeta_trabajos(), f"{uuid.uuid4().hex}-{secure_filename(archivo.filename or 'archivo')}")
+    archivo.save(ruta)
+    return ruta
+
+def purgar_trabajos(dias):
+    """
+    Borra los trabajos terminados o fallidos hace más de 'dias' días y los
+    archivos de esa antigüedad (subidos que quedaron sin procesar o generados
+    para descargar). Retorna los trabajos borrados.
+    """
+    limite = datetime.utcnow() - timedelta(days=dias)
+    borrados = Trabajo.query.filter(
+        Trabajo.estado.in_((TERMINADO, FALLIDO)), Trabajo.fecha_fin < limite
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    carpeta = carpeta_trabajos()
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        if os.path.getmtime(ruta) < limite.timestamp():
+            os.remove(ruta)
+    return borrados
+
+# --- Tomar y ejecutar ---
+
+def _disponible(ahora):
+    """Pendiente y ya disponible, o en curso con el plazo vencido (su trabajador terminó sin completarlo)."""
+    return or_(
+        and_(Trabajo.estado == PENDIENTE, Trabajo.disponible_desde <= ahora),
+        and_(Trabajo.estado == EN_CURSO, Trabajo.vence < ahora),
+    )
+
+def tomar_trabajo(trabajador, plazo):
+    """
+    Toma el próximo trabajo disponible para 'trabajador', lo confirma 'En
+    curso' por 'plazo' segundos y lo retorna (None si no hay ninguno). Los
+    retomados que ya agotaron sus intentos se marcan Fallido.
+    """
+    while True:
+        ahora = datetime.utcnow()
+        candidatos = db.session.execute(
+            select(Trabajo.id).where(_disponible(ahora)).order_by(Trabajo.disponible_desde, Trabajo.id).limit(10)
+        ).scalars().all()
+        if not candidatos:
+            return None
+        for id in candidatos:
+            # Si otro trabajador lo tomó entre el SELECT y el UPDATE, ya no está disponible
+            tomado = db.session.execute(
+                update(Trabajo).where(Trabajo.id == id, _disponible(ahora)).values(
+                    estado=EN_CURSO, trabajador=trabajador, intentos=Trabajo.intentos + 1,
+                    fecha_inicio=ahora, vence=ahora + timedelta(seconds=plazo),
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if not tomado:
+                continue
+            trabajo = db.session.get(Trabajo, id)
+            if trabajo.intentos <= trabajo.max_intentos:
+                return trabajo
+            _finalizar(trabajo, trabajador, FALLIDO, error='El trabajo no terminó en el plazo y agotó sus intentos.')
+
+def _finalizar(trabajo, trabajador, estado, resultado=None, error=None, reintentar_en=None):
+    """Anota el final de una ejecución, si el trabajo sigue siendo de 'trabajador' (no venció su plazo)."""
+    ahora = datetime.utcnow()
+    valores = {'estado': estado, 'error': error, 'vence': None}
+    if estado == PENDIENTE:
+        valores['disponible_desde'] = ahora + timedelta(seconds=reintentar_en)
+    else:
+        valores['fecha_fin'] = ahora
+        valores['resultado'] = json.dumps(resultado) if resultado is not None else None
+    actualizado = db.session.execute(
+        update(Trabajo).where(
+            Trabajo.id == trabajo.id, Trabajo.estado == EN_CURSO, Trabajo.trabajador == trabajador
+        ).values(**valores).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not actualizado:
+        logger.warning("El trabajo %s venció mientras se ejecutaba; lo retomó otro trabajador", trabajo.id)
+
+def ejecutar_trabajo(trabajo, trabajador, ejecutar=None):
+    """
+    Ejecuta la tarea del trabajo tomado y anota el resultado, el reintento o
+    la falla. 'ejecutar(tipo, argumentos)' permite correrla en otro proceso.
+    Retorna el estado final.
+    """
+    id, tipo, intentos, max_intentos = trabajo.id, trabajo.tipo, trabajo.intentos, trabajo.max_intentos
+    argumentos = json.loads(trabajo.argumentos)
+    try:
+        if tipo not in TAREAS:
+            raise ValueError(f"Tarea desconocida: {tipo}")
+        resultado = ejecutar(tipo, argumentos) if ejecutar else TAREAS[tipo][0](**argumentos)
+    except Exception as error:
+        db.session.rollback()
+        mensaje = f"{type(error).__name__}: {error}"
+        if isinstance(error, ValueError) or intentos >= max_intentos:
+            logger.exception("Trabajo %s (%s) fallido en el intento %d", id, tipo, intentos)
+            _finalizar(trabajo, trabajador, FALLIDO, error=mensaje)
+            return FALLIDO
+        espera = min(current_app.config.get('TRABAJOS_ESPERA_REINTENTO', 10) * 2 ** (intentos - 1), ESPERA_MAXIMA)
+        logger.warning("Trabajo %s (%s) falló en el intento %d; se reintenta en %d s: %s", id, tipo, intentos, espera, mensaje)
+        _finalizar(trabajo, trabajador, PENDIENTE, error=mensaje, reintentar_en=espera)
+        return PENDIENTE
+    _finalizar(trabajo, trabajador, TERMINADO, resultado=resultado)
+    return TERMINADO
+
+# --- Trabajadores ---
+
+# App de cada proceso hijo en TRABAJOS_MODO=procesos
+_app_proceso = None
+
+def _iniciar_proceso(config_class):
+    global _app_proceso
+    from app import create_app
+    _app_proceso = create_app(config_class)
+
+def _ejecutar_en_proceso(tipo, argumentos):
+    with _app_proceso.app_context():
+        return TAREAS[tipo][0](**argumentos)
+
+class ColaTrabajos:
+    """
+    Hilos que atienden la cola en este proceso. Cada hilo toma un trabajo y
+    lo ejecuta; en modo 'procesos' lo ejecuta en un ProcessPoolExecutor (para
+    tareas que ocupan la CPU), cuyos procesos crean su propia app (en Windows
+    la importan de nuevo: la clase de configuración debe poder importarse).
+    """
+
+    def __init__(self, app, hilos=None, modo=None):
+        self.app = app
+        self.hilos = hilos or app.config.get('TRABAJOS_HILOS', 2)
+        self.modo = modo or app.config.get('TRABAJOS_MODO', 'hilos')
+        if self.modo not in ('hilos', 'procesos'):
+            raise ValueError(f"TRABAJOS_MODO debe ser 'hilos' o 'procesos', no {self.modo!r}")
+        self.espera = app.config.get('TRABAJOS_ESPERA', 2)
+        self.plazo = app.config.get('TRABAJOS_PLAZO', 900)
+        self.ejecutados = 0
+        self._aviso = threading.Event()
+        self._detener = threading.Event()
+        self._hilos = []
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _crear_pool(self, procesos):
+        return ProcessPoolExecutor(
+            max_workers=procesos, initializer=_iniciar_proceso,
+            initargs=(self.app.extensions['trabajos']['config'],),
+        )
+
+    def iniciar(self):
+        if self.modo == 'procesos':
+            self._pool = self._crear_pool(self.hilos)
+        for numero in range(self.hilos):
+            hilo = threading.Thread(target=self._atender, name=f'trabajos-{numero + 1}', daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+        return self
+
+    def avisar(self):
+        """Despierta a los hilos que esperan: hay un trabajo nuevo."""
+        self._aviso.set()
+
+    def detener(self, esperar=True):
+        """Detiene los hilos al terminar su trabajo actual (los pendientes quedan en la base)."""
+        self._detener.set()
+        self._aviso.set()
+        if esperar:
+            for hilo in self._hilos:
+                hilo.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=esperar)
+
+    def _reemplazar_pool(self, pool):
+        """Reemplaza 'pool' por uno nuevo si sigue siendo el actual (otro hilo pudo haberlo hecho ya)."""
+        with self._pool_lock:
+            if self._pool is pool:
+                logger.warning("Un proceso de la cola de trabajos terminó de forma inesperada; se crea un pool nuevo")
+                self._pool = self._crear_pool(self.hilos)
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _ejecutar(self, tipo, argumentos):
+        """
+        Ejecuta la tarea en el pool. Si un proceso del pool murió
+        (BrokenProcessPool) el pool ya no acepta tareas y falla también las que
+        tenía en curso, aunque no sean la causa: se reemplaza y la tarea se
+        reintenta en un proceso propio, sin contar un intento. Si ese proceso
+        también muere la causa es la tarea, y cuenta como un intento fallido.
+        """
+        pool = self._pool
+        try:
+            return pool.submit(_ejecutar_en_proceso, tipo, argumentos).result()
+        except BrokenProcessPool:
+            self._reemplazar_pool(pool)
+        with self._crear_pool(1) as aislado:
+            return aislado.submit(_ejecutar_en_proceso, tipo, argumentos).result()
+
+    def _atender(self):
+        trabajador = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:100]
+        while not self._detener.is_set():
+            try:
+                with self.app.app_context():
+                    trabajo = tomar_trabajo(trabajador, self.plazo)
+                    if trabajo is not None:
+                        ejecutar_trabajo(trabajo, trabajador, self._ejecutar if self._pool else None)
+                        self.ejecutados += 1
+                        continue
+            except Exception:
+                logger.exception("Error al atender la cola de trabajos")
+            # Sin trabajos: se consulta de nuevo al cumplirse la espera o al encolar uno en este proceso
+            self._aviso.wait(self.espera)
+            self._aviso.clear()
+
+def iniciar_cola(app, hilos=None, modo=None):
+    """Inicia (una vez por proceso) los trabajadores de la cola de 'app' y los retorna."""
+    estado = app.extensions['trabajos']
+    with estado['lock']:
+        if estado['cola'] is None or estado['pid'] != os.getpid():
+            estado['cola'] = ColaTrabajos(app, hilos, modo).iniciar()
+            estado['pid'] = os.getpid()
+        return estado['cola']
+
+def _avisar_cola(app):
+    estado = app.extensions.get('trabajos')
+    if estado and estado['cola'] is not None and estado['pid'] == os.getpid():
+        estado['cola'].avisar()
+
+def init_trabajos(app, config_class):
+    """
+    Registra la cola en la app. Con TRABAJOS_EN_PROCESO_WEB los trabajadores
+    arrancan con la primera petición de cada proceso web (no en los comandos
+    de consola, que pueden correr antes de crear la tabla).
+    """
+    app.extensions['trabajos'] = {'config': config_class, 'cola': None, 'pid': None, 'lock': threading.Lock()}
+    if not app.config.get('TRABAJOS_EN_PROCESO_WEB', True):
+        return
+
+    @app.before_request
+    def _iniciar_trabajadores():
+        estado = app.extensions['trabajos']
+        if estado['cola'] is None or estado['pid'] != os.getpid():
+            iniciar_cola(app)
+
+# --- Tareas ---
+
+@tarea('qr_del_dia')
+def _qr_del_dia(fecha, planta_id=None):
+    """QR de los lotes ingresados el día 'fecha' (AAAA-MM-DD)."""
+    from app.utils.helpers import generar_qr_del_dia
+    rutas = generar_qr_del_dia(date.fromisoformat(fecha), planta_id, procesos=current_app.config.get('QR_PROCESOS'))
+    return {'lotes': len(rutas)}
+
+@tarea('romaneo')
+def _romaneo(carga_id):
+    """Romaneo de una carga recién salida, dibujado fuera de la petición para que esté listo al imprimirlo."""
+    from app.utils.romaneos import preparar_romaneo
+    ruta = preparar_romaneo(carga_id)
+    if ruta is None:
+        raise ValueError(f'La carga {carga_id} no existe.')
+    return {'archivo': os.path.basename(ruta)}
+
+@tarea('romaneos_rango')
+def _romaneos_rango(desde, hasta, planta_id=None):
+    """
+    Un solo PDF con los romaneos de las cargas ingresadas entre 'desde' y
+    'hasta' (AAAA-MM-DD, inclusive); se descarga de /trabajos/<id>/archivo.
+    """
+    from app.utils.romaneos import romaneos_por_fecha
+    inicio = datetime.combine(date.fromisoformat(desde), datetime.min.time())
+    fin = datetime.combine(date.fromisoformat(hasta), datetime.min.time()) + timedelta(days=1)
+    pdf, cantidad = romaneos_por_fecha(inicio, fin, planta_id)
+    if not cantidad:
+        return {'cargas': 0}
+    nombre = f"{uuid.uuid4().hex}-romaneos-{desde.replace('-', '')}-{hasta.replace('-', '')}.pdf"
+    with open(os.path.join(carpeta_trabajos(), nombre), 'wb') as archivo:
+        archivo.write(pdf)
+    return {'cargas': cantidad, 'descarga': nombre}
+
+@tarea('importar_productores')
+def _importar_productores(ruta, nombre_archivo, actualizar=True):
+    """Importación de un padrón grande subido en admin.importar_productores; el archivo se borra al terminar."""
+    from app.utils.importacion import importar_productores
+    try:
+        with open(ruta, 'rb') as archivo:
+            resultado = importar_productores(archivo, nombre_archivo, actualizar=actualizar)
+    except ValueError:
+        # Archivo inválido: no se reintenta
+        os.remove(ruta)
+        raise
+    os.remove(ruta)
+    return {
+        'creados': resultado.creados,
+        'actualizados': resultado.actualizados,
+        'sin_cambios': resultado.sin_cambios,
+        'filas_con_errores': len(resultado.errores),
+        'errores': [list(error) for error in resultado.errores[:ERRORES_IMPORTACION]],
+    }
@@ -0,0 +1 @@
+"""Scripts de estrés y rendimiento de SGPA (se ejecutan con `python -m benchmarks.<script>`)."""
@@ -0,0 +1,165 @@
+# C:/SGPA/benchmarks/arranque.py
+"""
+Benchmark del arranque de un worker de SGPA.
+
+Cada medición es un intérprete nuevo (como un worker recién lanzado) que
+importa la app, ejecuta create_app() y atiende la primera y la segunda
+petición a /login (sin base de datos: mide importaciones y plantillas). La
+primera corrida usa una carpeta vacía para el caché de bytecode de Jinja
+(plantillas compiladas desde cero) y las siguientes la encuentran llena,
+como los workers que arrancan después del primero.
+
+Además corre `python -X importtime` una vez e informa los módulos que más
+tardan en importarse (tiempo propio sumado por paquete) y si alguna dependencia pesada que solo se usa al
+pedirla (alembic, reportlab, qrcode, PIL, pyserial, openpyxl) se cargó al
+arrancar. Termina con código 1 si alguna se cargó o si la mediana supera
+--presupuesto-arranque / --presupuesto-primera (en milisegundos).
+
+Uso: python -m benchmarks.arranque --repeticiones 10 [--presupuesto-arranque 1500] [--salida r.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.vistas import _commit_actual
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencias que la app importa solo al usarlas (PDF, QR, báscula, migraciones)
+DIFERIDOS = ('alembic', 'reportlab', 'qrcode', 'PIL', 'serial', 'openpyxl')
+
+# Se ejecuta en un intérprete nuevo; imprime los tiempos en JSON
+_MEDICION = '''
+import json, sys, time
+inicio = time.perf_counter()
+from config import Config
+from app import create_app
+importado = time.perf_counter()
+
+class ConfigArranque(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + sys.argv[1]
+    PLANTILLAS_CACHE_DIR = sys.argv[2]
+
+app = create_app(ConfigArranque)
+creada = time.perf_counter()
+cliente = app.test_client()
+estados = [cliente.get('/login').status_code]
+primera = time.perf_counter()
+estados.append(cliente.get('/login').status_code)
+segunda = time.perf_counter()
+print(json.dumps({
+    'importacion_ms': (importado - inicio) * 1000,
+    'create_app_ms': (creada - importado) * 1000,
+    'arranque_ms': (creada - inicio) * 1000,
+    'primera_peticion_ms': (primera - creada) * 1000,
+    'segunda_peticion_ms': (segunda - primera) * 1000,
+    'estados': estados,
+    'modulos': len(sys.modules),
+    'diferidos_cargados': sorted(m for m in %r if m in sys.modules),
+}))
+''' % (DIFERIDOS,)
+
+def _medir(ruta_db, carpeta_cache):
+    salida = subprocess.run(
+        [sys.executable, '-c', _MEDICION, ruta_db, carpeta_cache],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+def _importtime(ruta_db, carpeta_cache, cantidad):
+    """Paquetes con mayor tiempo de importación y dependencias diferidas que se cargaron."""
+    codigo = _MEDICION.split('cliente = app.test_client()')[0]
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo, ruta_db, carpeta_cache],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    ).stderr
+    # Formato: "import time: <propio us> | <acumulado us> | <módulo con sangría>"
+    modulos = []
+    for linea in stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        modulos.append({
+            'modulo': nombre.strip(),
+            'propio_ms': int(propio) / 1000,
+            'acumulado_ms': int(acumulado) / 1000,
+        })
+    # Tiempo propio sumado por paquete (flask, sqlalchemy, app...): dónde se va el arranque
+    paquetes = {}
+    for modulo in modulos:
+        paquete = modulo['modulo'].split('.')[0]
+        paquetes[paquete] = paquetes.get(paquete, 0) + modulo['propio_ms']
+    principales = sorted(paquetes.items(), key=lambda p: p[1], reverse=True)[:cantidad]
+    return {
+        'total_ms': round(sum(paquetes.values()), 1),
+        'por_paquete': [{'paquete': nombre, 'propio_ms': round(ms, 1)} for nombre, ms in principales],
+        'diferidos_cargados': sorted(p for p in paquetes if p in DIFERIDOS),
+    }
+
+def _resumen(mediciones, clave):
+    valores = [m[clave] for m in mediciones]
+    return {
+        'mediana': round(statistics.median(valores), 1),
+        'min': round(min(valores), 1),
+        'max': round(max(valores), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=10, help='Arranques con el caché de plantillas lleno')
+    parser.add_argument('--paquetes', type=int, default=15, help='Paquetes a mostrar del desglose de importtime')
+    parser.add_argument('--presupuesto-arranque', type=float, default=1500,
+                        help='Máximo (ms) para la mediana de importar la app y create_app()')
+    parser.add_argument('--presupuesto-primera', type=float, default=100,
+                        help='Máximo (ms) para la mediana de la primera petición con el caché de plantillas lleno')
+    parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar el informe')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='sgpa-arranque-') as temporal:
+        ruta_db, carpeta_cache = os.path.join(temporal, 'sgpa.db'), os.path.join(temporal, 'plantillas')
+        # La primera corrida llena el caché de bytecode; el desglose se toma con el caché ya lleno
+        fria = _medir(ruta_db, carpeta_cache)
+        calientes = [_medir(ruta_db, carpeta_cache) for _ in range(args.repeticiones)]
+        importaciones = _importtime(ruta_db, carpeta_cache, args.paquetes)
+
+    informe = {
+        'commit': _commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeticiones': args.repeticiones,
+        'sin_cache_plantillas': {clave: round(fria[clave], 1) for clave in (
+            'arranque_ms', 'primera_peticion_ms', 'segunda_peticion_ms')},
+        'con_cache_plantillas': {clave: _resumen(calientes, clave) for clave in (
+            'importacion_ms', 'create_app_ms', 'arranque_ms', 'primera_peticion_ms', 'segunda_peticion_ms')},
+        'modulos_cargados': calientes[-1]['modulos'],
+        'diferidos_cargados': calientes[-1]['diferidos_cargados'],
+        'importtime': importaciones,
+        'errores_http': sum(1 for m in [fria, *calientes] for estado in m['estados'] if estado >= 400),
+    }
+    excedidos = []
+    for nombre, presupuesto, valor in (
+        ('arranque_ms', args.presupuesto_arranque, informe['con_cache_plantillas']['arranque_ms']['mediana']),
+        ('primera_peticion_ms', args.presupuesto_primera, informe['con_cache_plantillas']['primera_peticion_ms']['mediana']),
+    ):
+        if presupuesto is not None and valor > presupuesto:
+            excedidos.append(f'{nombre}: {valor} ms (presupuesto: {presupuesto} ms)')
+    if informe['diferidos_cargados']:
+        excedidos.append('se importaron al arrancar: ' + ', '.join(informe['diferidos_cargados']))
+    informe['presupuesto_excedido'] = excedidos
+
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+    print(texto)
+    if excedidos:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
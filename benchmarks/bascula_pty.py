@@ -0,0 +1,65 @@
+# C:/SGPA/benchmarks/bascula_pty.py
+"""
+Prueba del lector permanente de básculas contra una báscula simulada sobre un
+pseudo-terminal (pty) que emite tramas ruidosas "ST,GS,+002515.5 kg".
+
+Verifica que el lector interprete todas las tramas, que los pesos estables
+coincidan con los pesos de reposo del simulador y mide la latencia de la
+consulta del peso estable.
+
+Uso (solo POSIX): python -m benchmarks.bascula_pty --segundos 5
+"""
+import argparse
+import json
+import time
+
+from app.utils.rs232 import LectorBascula, SimuladorBasculaPty
+from benchmarks.comun import percentil
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--intervalo', type=float, default=0.005, help='Segundos entre tramas del simulador')
+    parser.add_argument('--consultas', type=int, default=100000)
+    args = parser.parse_args()
+
+    simulador = SimuladorBasculaPty(intervalo=args.intervalo, semilla=42).iniciar()
+    lector = LectorBascula(1, simulador.puerto, en_produccion=True)
+    lector.start()
+    time.sleep(args.segundos)
+
+    tiempos = []
+    for _ in range(args.consultas):
+        inicio = time.perf_counter()
+        lector.peso_estable()
+        tiempos.append(time.perf_counter() - inicio)
+
+    lector.detener()
+    simulador.detener()
+
+    # Todo peso estable debe corresponder a un reposo del simulador (ruido de ±0,5 kg)
+    estables = [peso for _, peso, estable in lector.lecturas if estable]
+    fuera_de_reposo = [
+        peso for peso in estables
+        if min(abs(peso - reposo) for reposo in simulador.pesos_reposo) > 0.5
+    ]
+    informe = {
+        'puerto': simulador.puerto,
+        'tramas_enviadas': simulador.tramas_enviadas,
+        'tramas_leidas': lector.tramas_leidas,
+        'tramas_invalidas': lector.tramas_invalidas,
+        'lecturas_estables_en_buffer': len(estables),
+        'estables_fuera_de_reposo': len(fuera_de_reposo),
+        'ultimo_peso_estable': lector.peso_estable(),
+        'consulta_peso_estable_us': {
+            'p50': round(percentil(tiempos, 50) * 1e6, 3),
+            'p99': round(percentil(tiempos, 99) * 1e6, 3),
+        },
+    }
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+    if (informe['tramas_invalidas'] or fuera_de_reposo
+            or informe['tramas_leidas'] < informe['tramas_enviadas'] * 0.95):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
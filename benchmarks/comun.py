@@ -0,0 +1,62 @@
+# C:/SGPA/benchmarks/comun.py
+"""Utilidades compartidas por los benchmarks: una app aislada sobre una base temporal."""
+import os
+import tempfile
+
+from config import Config
+from app import create_app, db, security
+from app.models.user import Role, Planta
+
+PASSWORD_BENCHMARK = 'benchmark'
+
+class ConfigBenchmark(Config):
+    """Configuración para benchmarks: sin CSRF y con contraseñas sin hash."""
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SECURITY_PASSWORD_HASH = 'plaintext'
+
+def crear_app_benchmark(ruta_db=None, **config):
+    """
+    Crea la app con create_app() contra una base SQLite propia (temporal si no se
+    indica ruta), con las tablas, roles y plantas iniciales.
+    """
+    if ruta_db is None:
+        fd, ruta_db = tempfile.mkstemp(prefix='sgpa-bench-', suffix='.db')
+        os.close(fd)
+    config.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + ruta_db)
+    config_class = type('ConfigBenchmarkLocal', (ConfigBenchmark,), config)
+
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+        Role.insert_roles()
+        Planta.insert_plantas()
+    app.config['RUTA_DB_BENCHMARK'] = ruta_db
+    return app
+
+def crear_usuario(app, email, rol, planta_codigo='P01'):
+    """Crea un usuario con el rol indicado y retorna su id."""
+    with app.app_context():
+        planta = Planta.query.filter_by(codigo=planta_codigo).first() if planta_codigo else None
+        usuario = security.datastore.create_user(
+            email=email, password=PASSWORD_BENCHMARK, first_name='Bench', last_name=rol,
+            planta=planta, roles=[rol]
+        )
+        db.session.commit()
+        return usuario.id
+
+def cliente_autenticado(app, email):
+    """Retorna un cliente de pruebas de Flask con la sesión iniciada."""
+    cliente = app.test_client()
+    respuesta = cliente.post('/login', data={'email': email, 'password': PASSWORD_BENCHMARK})
+    if respuesta.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión como {email} (HTTP {respuesta.status_code})')
+    return cliente
+
+def percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
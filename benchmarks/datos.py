@@ -0,0 +1,37 @@
+# C:/SGPA/benchmarks/datos.py
+"""Base de datos sintética para los benchmarks: el generador de `flask seed` (app/utils/semillas.py) a menor escala."""
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.models.user import Planta
+from app.utils.semillas import _PICO_COSECHA, sembrar
+
+def _pico_de_cosecha():
+    """
+    Las 15 h del pico de cosecha más reciente. Sembrando hasta ese momento hay
+    cargas en balanza y lotes esperando el desmotado, como en plena campaña,
+    sea cual sea el día en que corre el benchmark.
+    """
+    hoy = date.today()
+    pico = date(hoy.year, 1, 1) + timedelta(days=_PICO_COSECHA - 1)
+    if pico > hoy:
+        pico = date(hoy.year - 1, 1, 1) + timedelta(days=_PICO_COSECHA - 1)
+    return datetime.combine(pico, datetime.min.time()) + timedelta(hours=15)
+
+def poblar(app, plantas=2, productores=2000, cargas=50000, semilla=1):
+    """
+    Llena la base de la app con sembrar(): 'plantas' plantas (las que falten
+    después de P01 y P02 se crean), 'productores' con un chofer y un vehículo
+    cada cuatro, y 'cargas' cargas de la campaña hasta el pico de cosecha.
+    Retorna las filas generadas por tabla.
+    """
+    with app.app_context():
+        for numero in range(Planta.query.count() + 1, plantas + 1):
+            db.session.add(Planta(nombre=f'Planta Benchmark {numero}', codigo=f'P{numero:02d}'))
+        db.session.commit()
+        codigos = [p.codigo for p in Planta.query.order_by(Planta.id).limit(plantas)]
+        totales = sembrar(
+            cargas=cargas, productores=productores, choferes=max(1, productores // 4), plantas=codigos,
+            campanias=1, hasta=_pico_de_cosecha(), semilla=semilla,
+        )
+        return {'plantas': len(codigos), **totales}
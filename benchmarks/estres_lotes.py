@@ -0,0 +1,140 @@
+# C:/SGPA/benchmarks/estres_lotes.py
+"""
+Prueba de estrés de la numeración de lotes.
+
+Lanza cientos de envíos concurrentes de recepcion.nueva_carga y verifica que los
+lotes asignados sean consecutivos, sin huecos ni duplicados. Luego mide la
+latencia de generar_numero_lote a medida que crece la tabla carga.
+
+Uso: python -m benchmarks.estres_lotes --envios 300 --hilos 32 [--bloque 50]
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import db
+from app.models.operaciones import Carga, Productor, Chofer, Vehiculo
+from app.models.user import Planta, User
+from app.utils.helpers import generar_numero_lote
+from benchmarks.comun import crear_app_benchmark, crear_usuario, cliente_autenticado, percentil
+
+def _enviar_cargas(app, emails, envios, hilos, productor_id):
+    """Envía 'envios' formularios de entrada repartidos entre 'hilos' balanceros."""
+    clientes = [cliente_autenticado(app, email) for email in emails]
+    latencias = []
+
+    def enviar(i):
+        cliente = clientes[i % len(clientes)]
+        inicio = time.perf_counter()
+        respuesta = cliente.post('/recepcion/nueva_carga', data={
+            'productor': productor_id,
+            'chofer_nombre': f'Chofer {i}',
+            'chofer_dni': f'{30000000 + i}',
+            'vehiculo_placa': f'AB{i:03d}CD',
+            'peso_bruto': round(random.uniform(18000.0, 32000.0), 2),
+            'numero_bascula': 1,
+        })
+        latencias.append(time.perf_counter() - inicio)
+        return respuesta.status_code
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        estados = list(pool.map(enviar, range(envios)))
+    return estados, latencias
+
+def _verificar_secuencia(app, envios):
+    """Comprueba que los lotes del año sean exactamente 1..envios."""
+    anio = datetime.now().year
+    with app.app_context():
+        lotes = [l for (l,) in db.session.query(Carga.lote_id).filter(Carga.lote_id.like(f'P01-{anio}-%'))]
+    numeros = sorted(int(l.split('-')[-1]) for l in lotes)
+    return {
+        'lotes': len(lotes),
+        'duplicados': len(numeros) - len(set(numeros)),
+        'huecos': sorted(set(range(1, envios + 1)) - set(numeros))[:20],
+        'ok': numeros == list(range(1, envios + 1)),
+    }
+
+def _latencia_por_tamano(app, tamanos, muestras):
+    """Mide generar_numero_lote con la tabla carga precargada a distintos tamaños."""
+    anio = datetime.now().year
+    resultados = []
+    with app.app_context():
+        planta = Planta.query.filter_by(codigo='P02').first()
+        usuario = User.query.first()
+        productor = Productor.query.first()
+        chofer = Chofer.query.first()
+        vehiculo = Vehiculo.query.first()
+        insertadas = 0
+        for tamano in tamanos:
+            filas = [{
+                'lote_id': f'P02-{anio - 1}-{n:06d}', 'peso_bruto': 25000.0, 'planta_id': planta.id,
+                'productor_id': productor.id, 'chofer_id': chofer.id, 'vehiculo_id': vehiculo.id,
+                'usuario_balancero_id': usuario.id, 'fecha_entrada': datetime.utcnow(),
+            } for n in range(insertadas + 1, tamano + 1)]
+            if filas:
+                db.session.execute(Carga.__table__.insert(), filas)
+                db.session.commit()
+            insertadas = max(insertadas, tamano)
+
+            tiempos = []
+            for _ in range(muestras):
+                inicio = time.perf_counter()
+                generar_numero_lote('P02')
+                db.session.commit()
+                tiempos.append(time.perf_counter() - inicio)
+            resultados.append({
+                'filas_carga': db.session.query(Carga).count(),
+                'p50_ms': round(percentil(tiempos, 50) * 1000, 3),
+                'p95_ms': round(percentil(tiempos, 95) * 1000, 3),
+            })
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--envios', type=int, default=300)
+    parser.add_argument('--hilos', type=int, default=32)
+    parser.add_argument('--balanceros', type=int, default=8)
+    parser.add_argument('--bloque', type=int, default=1, help='LOTE_BLOQUE_RESERVA de la app')
+    parser.add_argument('--tamanos', default='0,10000,100000', help='Filas previas en carga para medir la latencia')
+    parser.add_argument('--muestras', type=int, default=200)
+    args = parser.parse_args()
+
+    app = crear_app_benchmark(LOTE_BLOQUE_RESERVA=args.bloque)
+    emails = [f'balancero{i}@sgpa-bench.com' for i in range(args.balanceros)]
+    for email in emails:
+        crear_usuario(app, email, 'Balancero')
+    with app.app_context():
+        productor = Productor(nombre_completo='Productor Benchmark', cuit='20-12345678-9')
+        db.session.add(productor)
+        db.session.commit()
+        productor_id = productor.id
+
+    inicio = time.perf_counter()
+    estados, latencias = _enviar_cargas(app, emails, args.envios, args.hilos, productor_id)
+    duracion = time.perf_counter() - inicio
+
+    informe = {
+        'envios': args.envios,
+        'hilos': args.hilos,
+        'bloque': args.bloque,
+        'duracion_s': round(duracion, 3),
+        'errores_http': sum(1 for e in estados if e != 302),
+        'latencia_envio_ms': {
+            'p50': round(percentil(latencias, 50) * 1000, 2),
+            'p95': round(percentil(latencias, 95) * 1000, 2),
+            'p99': round(percentil(latencias, 99) * 1000, 2),
+        },
+        'secuencia': _verificar_secuencia(app, args.envios),
+        'latencia_por_tamano': _latencia_por_tamano(
+            app, [int(t) for t in args.tamanos.split(',')], args.muestras
+        ),
+    }
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+    if not informe['secuencia']['ok'] or informe['errores_http']:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
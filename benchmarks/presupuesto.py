@@ -0,0 +1,121 @@
+# C:/SGPA/benchmarks/presupuesto.py
+"""
+Verificación del presupuesto de consultas SQL por vista (PRESUPUESTO_CONSULTAS).
+
+Puebla una base sintética y recorre con la app en modo estricto (TESTING) las
+vistas que tienen presupuesto: dashboard, historial de cargas, lotes
+pendientes y productores, en la primera página y en una profunda, sin caché
+de fragmentos para que cada petición consulte la base. Después simula un N+1
+en el historial de cargas y en los lotes pendientes (las relaciones que la
+vista carga con joinedload pasan a cargarse fila por fila) y comprueba que el
+guardián lo corta con PresupuestoConsultasExcedido.
+
+Termina con código 1 si alguna vista excede su presupuesto o si la regresión
+simulada no lo excede.
+
+Uso: python -m benchmarks.presupuesto [--cargas 2000] [--productores 200] [--salida r.json]
+"""
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy.orm import lazyload
+
+from app.routes import desmotado, recepcion
+from app.utils.consultas import PresupuestoConsultasExcedido
+from benchmarks.comun import crear_app_benchmark, crear_usuario, cliente_autenticado
+from benchmarks.datos import poblar
+from benchmarks.vistas import _commit_actual, _contar_consultas, _preparar_escenarios
+
+# Vista con joinedload -> (escenario de vistas.py que la recorre, módulo donde se simula el N+1)
+REGRESIONES = {
+    'recepcion.listar_cargas': ('recepcion.listar_cargas (primera)', recepcion),
+    'desmotado.lotes_pendientes': ('desmotado.lotes_pendientes (primera)', desmotado),
+}
+
+@contextmanager
+def _sin_joinedload(modulo):
+    """Dentro del bloque, el joinedload de las vistas de 'modulo' se comporta como lazyload (N+1)."""
+    original = modulo.joinedload
+    modulo.joinedload = lazyload
+    try:
+        yield
+    finally:
+        modulo.joinedload = original
+
+def _pedir(cliente, consultas, peticion):
+    """Hace la petición y retorna (código HTTP, consultas SQL, mensaje si excedió el presupuesto)."""
+    metodo, url, datos = peticion(0)
+    consultas.clear()
+    try:
+        respuesta = cliente.open(url, method=metodo, data=datos)
+    except PresupuestoConsultasExcedido as error:
+        return None, None, str(error)
+    return respuesta.status_code, sum(consultas), None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plantas', type=int, default=2)
+    parser.add_argument('--productores', type=int, default=200)
+    parser.add_argument('--cargas', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--db', default=None, help='Archivo SQLite a usar (por defecto uno temporal)')
+    parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar el informe')
+    args = parser.parse_args()
+
+    # Estricto (TESTING) y sin caché de fragmentos: cada petición ejecuta sus consultas
+    app = crear_app_benchmark(args.db, CACHE_VISTAS_HABILITADO=False, METRICAS_PETICION_LENTA=None)
+    consultas = _contar_consultas(app)
+    crear_usuario(app, 'central@sgpa-bench.com', 'CasaCentral', planta_codigo=None)
+    crear_usuario(app, 'balancero@sgpa-bench.com', 'Balancero')
+    crear_usuario(app, 'admin@sgpa-bench.com', 'AdminPlanta')
+    datos = poblar(app, args.plantas, args.productores, args.cargas, args.semilla)
+
+    presupuestos = app.config['PRESUPUESTO_CONSULTAS']
+    escenarios = {
+        nombre: escenario for nombre, escenario in _preparar_escenarios(app, int(args.cargas / args.plantas * 0.9)).items()
+        if nombre.split(' ')[0] in presupuestos and escenario[1](0)[0] == 'GET'
+    }
+    clientes = {
+        'central': cliente_autenticado(app, 'central@sgpa-bench.com'),
+        'balancero': cliente_autenticado(app, 'balancero@sgpa-bench.com'),
+        'admin': cliente_autenticado(app, 'admin@sgpa-bench.com'),
+    }
+
+    fallas, vistas, regresiones = [], {}, {}
+    for nombre, (usuario, peticion) in escenarios.items():
+        estado, cantidad, excedido = _pedir(clientes[usuario], consultas, peticion)
+        vistas[nombre] = {'http': estado, 'consultas': cantidad, 'presupuesto': presupuestos[nombre.split(' ')[0]]}
+        if excedido:
+            fallas.append(excedido)
+        elif estado >= 400:
+            fallas.append(f'{nombre}: HTTP {estado}')
+
+    for endpoint, (nombre, modulo) in REGRESIONES.items():
+        usuario, peticion = escenarios[nombre]
+        with _sin_joinedload(modulo):
+            estado, cantidad, excedido = _pedir(clientes[usuario], consultas, peticion)
+        regresiones[endpoint] = {'detectada': excedido is not None, 'mensaje': excedido, 'consultas': cantidad}
+        if excedido is None:
+            fallas.append(f'{endpoint}: el N+1 simulado ejecutó {cantidad} consultas y no excedió el presupuesto')
+
+    informe = {
+        'commit': _commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'datos': datos,
+        'vistas': vistas,
+        'regresiones_n_mas_1': regresiones,
+        'fallas': fallas,
+    }
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+    print(texto)
+    if fallas:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# C:/SGPA/benchmarks/sqlite_concurrencia.py
+"""
+Lecturas y escrituras concurrentes sobre SQLite, con y sin el perfil de la app.
+
+Varios procesos (como los workers de un servidor) con varios hilos cada uno
+insertan cargas y leen el listado de cargas sobre la misma base durante un
+tiempo fijo. Se informan operaciones por segundo, latencias y errores
+"database is locked" sin el perfil (journal DELETE, pool y espera por defecto)
+y con SQLITE_PRAGMAS y el pool de config.Config.
+
+Uso: python -m benchmarks.sqlite_concurrencia --procesos 4 --escritores 4 --lectores 8 --duracion 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.operaciones import Carga, Productor, Chofer, Vehiculo
+from app.models.user import User
+from benchmarks.comun import crear_app_benchmark, crear_usuario, percentil
+
+# Configuración "antes": PRAGMA de SQLite por defecto y el pool por defecto de SQLAlchemy
+SIN_PERFIL = {'SQLITE_PRAGMAS': {}, 'SQLITE_POOL_TAMANO': 5, 'SQLITE_POOL_EXTRA': 10}
+
+def _preparar(ruta_db, config):
+    app = crear_app_benchmark(ruta_db, **config)
+    crear_usuario(app, 'balancero@sgpa-bench.com', 'Balancero')
+    with app.app_context():
+        db.session.add_all([
+            Productor(nombre_completo='Productor Benchmark', cuit='20-12345678-9'),
+            Chofer(nombre_completo='Chofer Benchmark', dni='30000000'),
+            Vehiculo(placa='AB123CD'),
+        ])
+        db.session.commit()
+
+def _trabajar(args):
+    """Corre escritores y lectores en un proceso; retorna sus contadores."""
+    ruta_db, config, indice, escritores, lectores, duracion = args
+    app = crear_app_benchmark(ruta_db, **config)
+    with app.app_context():
+        ids = {
+            'planta_id': 1,
+            'productor_id': Productor.query.first().id,
+            'chofer_id': Chofer.query.first().id,
+            'vehiculo_id': Vehiculo.query.first().id,
+            'usuario_balancero_id': User.query.first().id,
+        }
+    fin = time.monotonic() + duracion
+    resultados = {'escrituras': [], 'lecturas': [], 'bloqueos': 0}
+    lock = threading.Lock()
+
+    def escribir(hilo):
+        contador = 0
+        with app.app_context():
+            while time.monotonic() < fin:
+                contador += 1
+                inicio = time.perf_counter()
+                try:
+                    db.session.add(Carga(
+                        lote_id=f'B{indice:02d}{hilo:02d}-{contador:07d}', peso_bruto=random.uniform(18000, 32000),
+                        fecha_entrada=datetime.utcnow(), **ids
+                    ))
+                    db.session.commit()
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        resultados['bloqueos'] += 1
+                    continue
+                with lock:
+                    resultados['escrituras'].append(time.perf_counter() - inicio)
+            db.session.remove()
+
+    def leer():
+        with app.app_context():
+            while time.monotonic() < fin:
+                inicio = time.perf_counter()
+                try:
+                    Carga.query.options(joinedload(Carga.productor)).filter_by(planta_id=1).order_by(
+                        Carga.fecha_entrada.desc(), Carga.id.desc()
+                    ).limit(10).all()
+                    db.session.query(db.func.count(Carga.id)).filter_by(estado='Pendiente Salida').scalar()
+                    db.session.commit()
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        resultados['bloqueos'] += 1
+                    continue
+                with lock:
+                    resultados['lecturas'].append(time.perf_counter() - inicio)
+            db.session.remove()
+
+    hilos = [threading.Thread(target=escribir, args=(i,)) for i in range(escritores)]
+    hilos += [threading.Thread(target=leer) for _ in range(lectores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+def _medir(nombre, config, args):
+    fd, ruta_db = tempfile.mkstemp(prefix='sgpa-bench-', suffix='.db')
+    os.close(fd)
+    _preparar(ruta_db, config)
+
+    trabajos = [(ruta_db, config, i, args.escritores, args.lectores, args.duracion) for i in range(args.procesos)]
+    with multiprocessing.Pool(args.procesos) as pool:
+        partes = pool.map(_trabajar, trabajos)
+
+    escrituras = [t for p in partes for t in p['escrituras']]
+    lecturas = [t for p in partes for t in p['lecturas']]
+    return {
+        'perfil': nombre,
+        'escrituras_por_s': round(len(escrituras) / args.duracion, 1),
+        'lecturas_por_s': round(len(lecturas) / args.duracion, 1),
+        'escritura_ms': {'p50': round(percentil(escrituras, 50) * 1000, 2), 'p99': round(percentil(escrituras, 99) * 1000, 2)},
+        'lectura_ms': {'p50': round(percentil(lecturas, 50) * 1000, 2), 'p99': round(percentil(lecturas, 99) * 1000, 2)},
+        'database_is_locked': sum(p['bloqueos'] for p in partes),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procesos', type=int, default=4)
+    parser.add_argument('--escritores', type=int, default=4, help='Hilos que insertan cargas, por proceso')
+    parser.add_argument('--lectores', type=int, default=8, help='Hilos que leen el listado, por proceso')
+    parser.add_argument('--duracion', type=float, default=10.0, help='Segundos de cada medición')
+    args = parser.parse_args()
+
+    informe = {
+        'procesos': args.procesos,
+        'escritores_por_proceso': args.escritores,
+        'lectores_por_proceso': args.lectores,
+        'resultados': [
+            _medir('sin perfil', SIN_PERFIL, args),
+            _medir('perfil SGPA', {}, args),
+        ],
+    }
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+# C:/SGPA/benchmarks/vistas.py
+"""
+Benchmark de las vistas principales de SGPA.
+
+Crea la app con create_app() sobre una base sintética del tamaño indicado y
+recorre las vistas reales con el cliente de pruebas de Flask: entrada, salida,
+proceso de desmotado, listados en páginas profundas, typeahead y dashboards.
+Informa latencias p50/p95/p99 y consultas SQL por petición en JSON, para
+comparar entre commits (--comparar con el JSON de otra corrida).
+
+Por defecto la caché de vistas (ETag y fragmentos) está desactivada: cada
+petición repetida ejecuta sus consultas y renderiza, que es lo que se quiere
+medir. Con --cache-vistas se activa y los listados y dashboards miden
+aciertos de la caché; solo conviene comparar corridas con la misma opción.
+
+Uso: python -m benchmarks.vistas --cargas 50000 --productores 2000 --iteraciones 200 [--cache-vistas] [--salida r.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+from app import db
+from app.models.operaciones import Carga, Productor
+from app.models.user import Planta
+from app.utils.consultas import consultas_de_la_peticion
+from app.utils.paginacion import _codificar_cursor
+from benchmarks.comun import crear_app_benchmark, crear_usuario, cliente_autenticado, percentil
+from benchmarks.datos import poblar
+
+# Apellidos que usa el generador de datos sintéticos, para la búsqueda de productores
+APELLIDOS_BUSQUEDA = ('gomez', 'perez', 'ramirez', 'benitez', 'acosta', 'sosa', 'romero')
+
+def _cursor_en(query, columna_fecha, profundidad, descendente=True):
+    """Cursor de la fila en la posición 'profundidad' del orden del listado (para páginas profundas)."""
+    orden = (columna_fecha.desc(), Carga.id.desc()) if descendente else (columna_fecha.asc(), Carga.id.asc())
+    fila = query.with_entities(columna_fecha, Carga.id).order_by(*orden).offset(profundidad).first()
+    return _codificar_cursor(*fila) if fila else None
+
+def _preparar_escenarios(app, profundidad):
+    """Arma los escenarios: nombre -> (usuario, función que recibe la iteración y retorna (método, url, datos))."""
+    with app.app_context():
+        p01 = Planta.query.filter_by(codigo='P01').first().id
+        de_p01 = Carga.query.filter(Carga.planta_id == p01)
+        pendientes_proceso = [id for (id,) in de_p01.filter(
+            Carga.estado == 'Completado', ~Carga.proceso_desmotado.has()
+        ).with_entities(Carga.id)]
+        productor_id = Productor.query.filter_by(activo=True).first().id
+        cursor_cargas = _cursor_en(de_p01, Carga.fecha_entrada, profundidad)
+        cursor_pendientes = _cursor_en(
+            de_p01.filter(Carga.estado == 'Completado', ~Carga.proceso_desmotado.has()),
+            Carga.fecha_salida, min(profundidad, max(len(pendientes_proceso) - 20, 0)), descendente=False
+        )
+        pagina_productores = max(1, Productor.query.count() // 10 - 1)
+
+    def siguiente(ids):
+        return lambda i: ids[i % len(ids)] if ids else 0
+
+    def salida(i):
+        # Se busca al armar cada petición: los datos sembrados tienen pocas cargas en balanza
+        # y las que ingresa el escenario de nueva_carga (que corre antes) también sirven
+        with app.app_context():
+            return db.session.query(Carga.id).filter(
+                Carga.planta_id == p01, Carga.estado == 'Pendiente Salida'
+            ).order_by(Carga.id).limit(1).scalar() or 0
+
+    proceso = siguiente(pendientes_proceso)
+    return {
+        'main.index (CasaCentral)': ('central', lambda i: ('GET', '/', None)),
+        'main.index (operario)': ('balancero', lambda i: ('GET', '/', None)),
+        'main.reporte_comparativo (plantas)': ('central', lambda i: ('GET', '/reportes/comparativo', None)),
+        'main.reporte_comparativo (semanas, P01)': ('central', lambda i: ('GET', f'/reportes/comparativo?agrupar=semana&planta={p01}', None)),
+        'main.reporte_comparativo (productores)': ('central', lambda i: ('GET', '/reportes/comparativo?agrupar=productor', None)),
+        'recepcion.nueva_carga GET': ('balancero', lambda i: ('GET', '/recepcion/nueva_carga', None)),
+        'recepcion.nueva_carga POST': ('balancero', lambda i: ('POST', '/recepcion/nueva_carga', {
+            'productor': productor_id, 'chofer_nombre': f'Chofer Bench {i}', 'chofer_dni': f'{40000000 + i}',
+            'vehiculo_placa': f'BN{i:05d}', 'peso_bruto': 25000 + i, 'numero_bascula': 1, 'humedad': 9.5,
+        })),
+        'recepcion.buscar_productores': ('balancero', lambda i: ('GET', f'/recepcion/productores/buscar?q={APELLIDOS_BUSQUEDA[i % len(APELLIDOS_BUSQUEDA)]}', None)),
+        'recepcion.registrar_salida POST': ('admin', lambda i: ('POST', f'/recepcion/registrar_salida/{salida(i)}', {'peso_tara': 9000})),
+        'desmotado.registrar_proceso POST': ('admin', lambda i: ('POST', f'/desmotado/procesar/{proceso(i)}', {
+            'kilos_fibra': 5000, 'kilos_semilla': 9000,
+        })),
+        'recepcion.listar_cargas (primera)': ('admin', lambda i: ('GET', '/recepcion/', None)),
+        'recepcion.listar_cargas (profunda)': ('admin', lambda i: ('GET', f'/recepcion/?despues={cursor_cargas}', None)),
+        'desmotado.lotes_pendientes (primera)': ('admin', lambda i: ('GET', '/desmotado/pendientes', None)),
+        'desmotado.lotes_pendientes (profunda)': ('admin', lambda i: ('GET', f'/desmotado/pendientes?despues={cursor_pendientes}', None)),
+        'admin.listar_productores (primera)': ('admin', lambda i: ('GET', '/admin/productores', None)),
+        'admin.listar_productores (profunda)': ('admin', lambda i: ('GET', f'/admin/productores?page={pagina_productores}', None)),
+    }
+
+def _contar_consultas(app):
+    """Lista que recibe las consultas SQL de cada petición (se registra antes de la primera)."""
+    consultas = []
+
+    @app.after_request
+    def _registrar_consultas(response):
+        consultas.append(consultas_de_la_peticion())
+        return response
+
+    return consultas
+
+def _medir(clientes, consultas, escenarios, iteraciones, calentamiento):
+    resultados = {}
+    for nombre, (usuario, peticion) in escenarios.items():
+        cliente = clientes[usuario]
+        tiempos, por_peticion, errores = [], [], 0
+        for i in range(calentamiento + iteraciones):
+            metodo, url, datos = peticion(i)
+            consultas.clear()
+            inicio = time.perf_counter()
+            respuesta = cliente.open(url, method=metodo, data=datos)
+            duracion = time.perf_counter() - inicio
+            if respuesta.status_code >= 400:
+                errores += 1
+            if i >= calentamiento:
+                tiempos.append(duracion)
+                por_peticion.append(sum(consultas))
+        resultados[nombre] = {
+            'n': iteraciones,
+            'p50_ms': round(percentil(tiempos, 50) * 1000, 2),
+            'p95_ms': round(percentil(tiempos, 95) * 1000, 2),
+            'p99_ms': round(percentil(tiempos, 99) * 1000, 2),
+            'consultas_media': round(sum(por_peticion) / len(por_peticion), 2) if por_peticion else 0,
+            'consultas_max': max(por_peticion, default=0),
+            'errores_http': errores,
+        }
+    return resultados
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _comparar(resultados, ruta_anterior):
+    """Relación p95 actual / anterior por escenario (>1 es más lento)."""
+    with open(ruta_anterior, encoding='utf-8') as archivo:
+        anterior = json.load(archivo)['escenarios']
+    return {
+        nombre: {
+            'p95_ms_anterior': anterior[nombre]['p95_ms'],
+            'p95_ms_actual': datos['p95_ms'],
+            'relacion_p95': round(datos['p95_ms'] / anterior[nombre]['p95_ms'], 3) if anterior[nombre]['p95_ms'] else None,
+            'consultas_anterior': anterior[nombre]['consultas_media'],
+            'consultas_actual': datos['consultas_media'],
+        }
+        for nombre, datos in resultados.items() if nombre in anterior
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plantas', type=int, default=2)
+    parser.add_argument('--productores', type=int, default=2000)
+    parser.add_argument('--cargas', type=int, default=50000)
+    parser.add_argument('--iteraciones', type=int, default=200, help='Peticiones medidas por escenario')
+    parser.add_argument('--calentamiento', type=int, default=10, help='Peticiones previas no medidas')
+    parser.add_argument('--profundidad', type=int, default=None, help='Filas a saltar en las páginas profundas (por defecto 90%% de las cargas de P01)')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--db', default=None, help='Archivo SQLite a usar (por defecto uno temporal)')
+    parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar el informe')
+    parser.add_argument('--comparar', default=None, help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--cache-vistas', action='store_true',
+                        help='Medir con la caché de vistas activa (aciertos de fragmentos en los listados)')
+    args = parser.parse_args()
+
+    # Sin presupuesto estricto: un exceso de consultas se informa, no corta el benchmark
+    app = crear_app_benchmark(args.db, PRESUPUESTO_CONSULTAS_ESTRICTO=False, METRICAS_PETICION_LENTA=None,
+                              CACHE_VISTAS_HABILITADO=args.cache_vistas)
+    consultas = _contar_consultas(app)
+    crear_usuario(app, 'central@sgpa-bench.com', 'CasaCentral', planta_codigo=None)
+    crear_usuario(app, 'balancero@sgpa-bench.com', 'Balancero')
+    crear_usuario(app, 'admin@sgpa-bench.com', 'AdminPlanta')
+
+    inicio = time.perf_counter()
+    datos = poblar(app, args.plantas, args.productores, args.cargas, args.semilla)
+    datos['segundos_carga'] = round(time.perf_counter() - inicio, 2)
+
+    profundidad = args.profundidad if args.profundidad is not None else int(args.cargas / args.plantas * 0.9)
+    escenarios = _preparar_escenarios(app, profundidad)
+    clientes = {
+        'central': cliente_autenticado(app, 'central@sgpa-bench.com'),
+        'balancero': cliente_autenticado(app, 'balancero@sgpa-bench.com'),
+        'admin': cliente_autenticado(app, 'admin@sgpa-bench.com'),
+    }
+    resultados = _medir(clientes, consultas, escenarios, args.iteraciones, args.calentamiento)
+
+    informe = {
+        'commit': _commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'datos': {**datos, 'profundidad': profundidad, 'cache_vistas': args.cache_vistas},
+        'escenarios': resultados,
+    }
+    if args.comparar:
+        informe['comparacion'] = _comparar(resultados, args.comparar)
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+    print(texto)
+
+if __name__ == '__main__':
+    main()
@@ -23,6 +23,111 @@ class Config:
         'sqlite:///' + os.path.join(instance_path, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Nivel de log (DEBUG, INFO, WARNING...); por defecto DEBUG en modo debug e INFO en otro caso
+    LOG_LEVEL = os.environ.get('LOG_LEVEL')
+
+    # PRAGMA aplicados a cada conexión SQLite. WAL permite leer mientras otro
+    # escribe; busy_timeout (ms) hace esperar el lock en lugar de fallar con
+    # "database is locked". SQLITE_PRAGMAS={} deja la configuración de SQLite.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,       # 64 MB de caché de páginas
+        'mmap_size': 268435456,     # 256 MB leídos por mmap
+        'temp_store': 'MEMORY',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 30000)),
+        'foreign_keys': 'ON',
+    }
+    # Conexiones por proceso: cubren los hilos del servidor más los trabajos en segundo plano
+    SQLITE_POOL_TAMANO = int(os.environ.get('SQLITE_POOL_TAMANO', 10))
+    SQLITE_POOL_EXTRA = int(os.environ.get('SQLITE_POOL_EXTRA', 20))
+
+    # Números de lote reservados de una vez por cada proceso (1 = sin huecos)
+    LOTE_BLOQUE_RESERVA = int(os.environ.get('LOTE_BLOQUE_RESERVA', 1))
+
+    # --- Básculas RS232 ---
+    # Puerto de cada báscula por número, ej: BASCULAS="1:COM1,2:COM2"
+    BASCULAS = {
+        int(numero): puerto
+        for numero, puerto in (b.split(':', 1) for b in os.environ.get('BASCULAS', '1:COM1').split(',') if b)
+    }
+    BASCULAS_BAUDRATE = int(os.environ.get('BASCULAS_BAUDRATE', 9600))
+    # Sin báscula conectada se simulan las tramas (desarrollo)
+    BASCULAS_EN_PRODUCCION = os.environ.get('BASCULAS_EN_PRODUCCION', '0') == '1'
+    # Con la báscula real el puerto lo abre un único proceso (bloqueo por archivo en
+    # esta carpeta; por defecto la temporal del sistema): en los demás las rutas de
+    # báscula responden 409. Con varios workers, enviar /recepcion/bascula/ a uno solo.
+    BASCULAS_DIR_BLOQUEOS = os.environ.get('BASCULAS_DIR_BLOQUEOS')
+    # Transmisión SSE: segundos mínimos entre envíos y duración de cada conexión
+    BASCULAS_SSE_INTERVALO = float(os.environ.get('BASCULAS_SSE_INTERVALO', 0.25))
+    BASCULAS_SSE_DURACION = int(os.environ.get('BASCULAS_SSE_DURACION', 300))
+
+    # Segundos que un proceso conserva el directorio de productores en memoria
+    DIRECTORIO_PRODUCTORES_TTL = int(os.environ.get('DIRECTORIO_PRODUCTORES_TTL', 300))
+
+    # Códigos QR: cuántas imágenes conservar en memoria y procesos para la generación masiva
+    QR_CACHE_TAMANO = int(os.environ.get('QR_CACHE_TAMANO', 2048))
+    QR_PROCESOS = int(os.environ.get('QR_PROCESOS', 0)) or None
+
+    # Romaneos en PDF: procesos que los dibujan, fuente TTF opcional y carpeta donde se guardan
+    ROMANEO_PROCESOS = int(os.environ.get('ROMANEO_PROCESOS', 2))
+    ROMANEO_FUENTE = os.environ.get('ROMANEO_FUENTE')
+    ROMANEO_CARPETA = os.environ.get('ROMANEO_CARPETA')
+    # Romaneos de un rango de fechas (en la cola): días como máximo y páginas por parte dibujada en el pool
+    ROMANEO_RANGO_MAXIMO_DIAS = int(os.environ.get('ROMANEO_RANGO_MAXIMO_DIAS', 31))
+    ROMANEO_PAGINAS_POR_PARTE = int(os.environ.get('ROMANEO_PAGINAS_POR_PARTE', 200))
+
+    # Métricas en /metrics (formato Prometheus); con METRICAS_TOKEN se exige "Authorization: Bearer <token>",
+    # sin él solo responde a peticiones directas desde la misma máquina (no a las que llegan por un proxy)
+    METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', '1') == '1'
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    # Segundos a partir de los cuales una petición se registra en el log con sus consultas SQL (vacío = no registrar)
+    METRICAS_PETICION_LENTA = float(os.environ['METRICAS_PETICION_LENTA']) if os.environ.get('METRICAS_PETICION_LENTA') else None
+
+    # Caché de bytecode de las plantillas Jinja (por defecto en instance/cache_plantillas)
+    PLANTILLAS_CACHE_BYTECODE = os.environ.get('PLANTILLAS_CACHE_BYTECODE', '1') == '1'
+    PLANTILLAS_CACHE_DIR = os.environ.get('PLANTILLAS_CACHE_DIR')
+
+    # Máximo de consultas SQL por vista; en pruebas (TESTING) excederlo es un error
+    PRESUPUESTO_CONSULTAS = {
+        'main.index': 8,
+        'recepcion.listar_cargas': 6,
+        'desmotado.lotes_pendientes': 6,
+        'admin.listar_productores': 6,
+    }
+
+    # Respuestas condicionales (ETag/304) y caché en memoria de los fragmentos de listados y dashboards
+    CACHE_VISTAS_HABILITADO = os.environ.get('CACHE_VISTAS_HABILITADO', '1') == '1'
+    # Máximo de fragmentos renderizados en memoria por proceso (0 = sin caché de fragmentos)
+    CACHE_FRAGMENTOS_MAXIMO = int(os.environ.get('CACHE_FRAGMENTOS_MAXIMO', 1000))
+
+    # Liquidaciones: humedad base (%) sobre la que se descuentan kilos por humedad
+    LIQUIDACION_HUMEDAD_BASE = float(os.environ.get('LIQUIDACION_HUMEDAD_BASE', 12.0))
+
+    # Sincronización planta -> casa central. En cada planta SINCRONIZACION_ORIGEN es
+    # su código (activa la bandeja de salida) y SINCRONIZACION_URL la dirección de
+    # casa central; el token debe coincidir en ambos lados (sin token, casa central
+    # no recibe cambios).
+    SINCRONIZACION_ORIGEN = os.environ.get('SINCRONIZACION_ORIGEN')
+    SINCRONIZACION_URL = os.environ.get('SINCRONIZACION_URL')
+    SINCRONIZACION_TOKEN = os.environ.get('SINCRONIZACION_TOKEN')
+    SINCRONIZACION_LOTE = int(os.environ.get('SINCRONIZACION_LOTE', 500))
+
+    # Cola de trabajos en segundo plano (app/utils/trabajos.py). Cada proceso web
+    # atiende la cola con TRABAJOS_HILOS hilos (o procesos, con TRABAJOS_MODO=procesos)
+    # salvo TRABAJOS_EN_PROCESO_WEB=0, en cuyo caso la atiende "flask trabajos procesar".
+    TRABAJOS_EN_PROCESO_WEB = os.environ.get('TRABAJOS_EN_PROCESO_WEB', '1') == '1'
+    TRABAJOS_MODO = os.environ.get('TRABAJOS_MODO', 'hilos')
+    TRABAJOS_HILOS = int(os.environ.get('TRABAJOS_HILOS', 2))
+    # Segundos entre consultas a la cola y plazo de un trabajo en curso antes de que otro lo retome
+    TRABAJOS_ESPERA = float(os.environ.get('TRABAJOS_ESPERA', 2))
+    TRABAJOS_PLAZO = int(os.environ.get('TRABAJOS_PLAZO', 900))
+    # Intentos por trabajo y espera (s) antes del primer reintento; se duplica en cada uno
+    TRABAJOS_INTENTOS = int(os.environ.get('TRABAJOS_INTENTOS', 3))
+    TRABAJOS_ESPERA_REINTENTO = int(os.environ.get('TRABAJOS_ESPERA_REINTENTO', 10))
+    # Las importaciones de productores de más de estos bytes se procesan en la cola
+    TRABAJOS_IMPORTACION_BYTES = int(os.environ.get('TRABAJOS_IMPORTACION_BYTES', 1000000))
+
     # --- Configuración de Flask-Security-Too ---
     SECURITY_PASSWORD_SALT = os.environ.get('SECURITY_PASSWORD_SALT') or 'un-salt-muy-seguro-para-las-passwords'
     SECURITY_PASSWORD_HASH = 'bcrypt'
@@ -0,0 +1,37 @@
+"""Tabla secuencia_lote para numerar lotes sin escanear carga
+
+Revision ID: 3b7e2c9a41f0
+Revises: d6159e3f8d56
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2c9a41f0'
+down_revision = 'd6159e3f8d56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('secuencia_lote',
+    sa.Column('planta_codigo', sa.String(length=3), nullable=False),
+    sa.Column('anio', sa.Integer(), nullable=False),
+    sa.Column('ultimo_numero', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('planta_codigo', 'anio')
+    )
+    # Inicializar los contadores con el último lote existente de cada planta y año
+    # (formato P01-2025-000123).
+    op.execute(
+        "INSERT INTO secuencia_lote (planta_codigo, anio, ultimo_numero) "
+        "SELECT substr(lote_id, 1, 3), CAST(substr(lote_id, 5, 4) AS INTEGER), "
+        "MAX(CAST(substr(lote_id, 10) AS INTEGER)) "
+        "FROM carga GROUP BY substr(lote_id, 1, 3), substr(lote_id, 5, 4)"
+    )
+
+
+def downgrade():
+    op.drop_table('secuencia_lote')
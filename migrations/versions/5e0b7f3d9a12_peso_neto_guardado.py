@@ -0,0 +1,36 @@
+"""Columna peso_neto guardada e indexada en carga
+
+Revision ID: 5e0b7f3d9a12
+Revises: c42a9e1b7d03
+Create Date: 2026-10-18 12:02:09.318845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b7f3d9a12'
+down_revision = 'c42a9e1b7d03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('peso_neto', sa.Float(), server_default='0', nullable=False))
+
+    # Completar el peso neto de las cargas que ya tienen tara registrada
+    op.execute(
+        "UPDATE carga SET peso_neto = peso_bruto - peso_tara "
+        "WHERE peso_tara IS NOT NULL AND peso_tara <> 0"
+    )
+
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.create_index('ix_carga_planta_productor_peso_neto', ['planta_id', 'productor_id', 'peso_neto'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.drop_index('ix_carga_planta_productor_peso_neto')
+        batch_op.drop_column('peso_neto')
@@ -0,0 +1,94 @@
+"""Tablas de archivo de campañas cerradas y vista carga_historica
+
+Revision ID: 7a2d9c4e1b58
+Revises: 5e0b7f3d9a12
+Create Date: 2026-10-18 17:20:41.502113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2d9c4e1b58'
+down_revision = '5e0b7f3d9a12'
+branch_labels = None
+depends_on = None
+
+_COLUMNAS_CARGA = (
+    "c.id, c.lote_id, c.fecha_entrada, c.peso_bruto, c.peso_tara, c.peso_neto, c.fecha_salida, "
+    "c.estado, c.numero_bascula, c.placa_acoplado, c.dtv, c.humedad, c.observaciones_romaneo, "
+    "c.planta_id, c.productor_id, c.chofer_id, c.vehiculo_id, c.usuario_balancero_id, "
+    "c.usuario_salida_id, p.fecha_proceso, p.kilos_fibra, p.kilos_semilla"
+)
+
+
+def upgrade():
+    op.create_table('carga_archivo',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lote_id', sa.String(length=20), nullable=False),
+    sa.Column('fecha_entrada', sa.DateTime(), nullable=True),
+    sa.Column('peso_bruto', sa.Float(), nullable=False),
+    sa.Column('peso_tara', sa.Float(), nullable=True),
+    sa.Column('peso_neto', sa.Float(), nullable=False),
+    sa.Column('fecha_salida', sa.DateTime(), nullable=True),
+    sa.Column('estado', sa.String(length=50), nullable=True),
+    sa.Column('numero_bascula', sa.Integer(), nullable=True),
+    sa.Column('placa_acoplado', sa.String(length=10), nullable=True),
+    sa.Column('dtv', sa.String(length=50), nullable=True),
+    sa.Column('humedad', sa.Float(), nullable=True),
+    sa.Column('observaciones_romaneo', sa.Text(), nullable=True),
+    sa.Column('planta_id', sa.Integer(), nullable=False),
+    sa.Column('productor_id', sa.Integer(), nullable=False),
+    sa.Column('chofer_id', sa.Integer(), nullable=False),
+    sa.Column('vehiculo_id', sa.Integer(), nullable=False),
+    sa.Column('usuario_balancero_id', sa.Integer(), nullable=False),
+    sa.Column('usuario_salida_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('carga_archivo', schema=None) as batch_op:
+        batch_op.create_index('ix_carga_archivo_lote_id', ['lote_id'], unique=True)
+        batch_op.create_index('ix_carga_archivo_planta_fecha_entrada', ['planta_id', 'fecha_entrada', 'id'], unique=False)
+
+    op.create_table('proceso_desmotado_archivo',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('carga_id', sa.Integer(), nullable=False),
+    sa.Column('fecha_proceso', sa.DateTime(), nullable=True),
+    sa.Column('kilos_fibra', sa.Float(), nullable=False),
+    sa.Column('kilos_semilla', sa.Float(), nullable=False),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('proceso_desmotado_archivo', schema=None) as batch_op:
+        batch_op.create_index('ix_proceso_desmotado_archivo_carga_id', ['carga_id'], unique=True)
+
+    op.create_table('campania_archivada',
+    sa.Column('anio', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('fecha_cierre', sa.DateTime(), nullable=False),
+    sa.Column('cargas', sa.Integer(), nullable=False),
+    sa.Column('procesos', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('anio')
+    )
+
+    # Historial completo: cada parte hace su propio join con los procesos
+    op.execute(
+        f"CREATE VIEW carga_historica AS "
+        f"SELECT {_COLUMNAS_CARGA}, 0 AS archivada "
+        f"FROM carga c LEFT JOIN proceso_desmotado p ON p.carga_id = c.id "
+        f"UNION ALL "
+        f"SELECT {_COLUMNAS_CARGA}, 1 AS archivada "
+        f"FROM carga_archivo c LEFT JOIN proceso_desmotado_archivo p ON p.carga_id = c.id"
+    )
+
+
+def downgrade():
+    op.execute("DROP VIEW IF EXISTS carga_historica")
+    op.drop_table('campania_archivada')
+    with op.batch_alter_table('proceso_desmotado_archivo', schema=None) as batch_op:
+        batch_op.drop_index('ix_proceso_desmotado_archivo_carga_id')
+    op.drop_table('proceso_desmotado_archivo')
+    with op.batch_alter_table('carga_archivo', schema=None) as batch_op:
+        batch_op.drop_index('ix_carga_archivo_planta_fecha_entrada')
+        batch_op.drop_index('ix_carga_archivo_lote_id')
+    op.drop_table('carga_archivo')
@@ -0,0 +1,54 @@
+"""Resúmenes diarios por planta para los KPIs del dashboard
+
+Revision ID: 8f1d4a6c2e57
+Revises: 3b7e2c9a41f0
+Create Date: 2026-10-18 10:05:17.224390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f1d4a6c2e57'
+down_revision = '3b7e2c9a41f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resumen_diario_planta',
+    sa.Column('planta_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('kilos_netos', sa.Float(), nullable=False),
+    sa.Column('lotes', sa.Integer(), nullable=False),
+    sa.Column('productores', sa.Integer(), nullable=False),
+    sa.Column('kilos_fibra', sa.Float(), nullable=False),
+    sa.Column('kilos_semilla', sa.Float(), nullable=False),
+    sa.Column('kilos_netos_procesados', sa.Float(), nullable=False),
+    sa.Column('lotes_procesados', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['planta_id'], ['planta.id'], ),
+    sa.PrimaryKeyConstraint('planta_id', 'fecha')
+    )
+    op.create_table('productor_activo_diario',
+    sa.Column('planta_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('productor_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['planta_id'], ['planta.id'], ),
+    sa.ForeignKeyConstraint(['productor_id'], ['productor.id'], ),
+    sa.PrimaryKeyConstraint('planta_id', 'fecha', 'productor_id')
+    )
+
+    # registrar_proceso ya guardaba 'observaciones', pero la columna no existía.
+    inspector = sa.inspect(op.get_bind())
+    if 'proceso_desmotado' in inspector.get_table_names():
+        columnas = [c['name'] for c in inspector.get_columns('proceso_desmotado')]
+        if 'observaciones' not in columnas:
+            with op.batch_alter_table('proceso_desmotado', schema=None) as batch_op:
+                batch_op.add_column(sa.Column('observaciones', sa.Text(), nullable=True))
+    # Los resúmenes se llenan con: flask resumenes reconstruir
+
+
+def downgrade():
+    op.drop_table('productor_activo_diario')
+    op.drop_table('resumen_diario_planta')
@@ -0,0 +1,90 @@
+"""Cubo precalculado del Reporte Comparativo de Plantas
+
+Revision ID: 9c3e5f7a2b14
+Revises: 7a2d9c4e1b58
+Create Date: 2026-10-18 17:48:12.730264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5f7a2b14'
+down_revision = '7a2d9c4e1b58'
+branch_labels = None
+depends_on = None
+
+# Expresiones de SQLite equivalentes a semana_de() y banda_humedad() de app/utils/cubo.py
+_SEMANA = "date(fecha_proceso, 'weekday 0', '-6 days')"
+_BANDA = (
+    "CASE WHEN humedad IS NULL THEN -1 WHEN humedad < 8 THEN 0 WHEN humedad < 10 THEN 1 "
+    "WHEN humedad < 12 THEN 2 WHEN humedad < 14 THEN 3 ELSE 4 END"
+)
+_PROCESADOS = "fecha_proceso IS NOT NULL AND peso_neto > 0"
+
+
+def upgrade():
+    op.create_table('cubo_plantas',
+    sa.Column('planta_id', sa.Integer(), nullable=False),
+    sa.Column('semana', sa.Date(), nullable=False),
+    sa.Column('banda_humedad', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('lotes', sa.Integer(), nullable=False),
+    sa.Column('kilos_netos', sa.Float(), nullable=False),
+    sa.Column('kilos_fibra', sa.Float(), nullable=False),
+    sa.Column('kilos_semilla', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['planta_id'], ['planta.id'], ),
+    sa.PrimaryKeyConstraint('planta_id', 'semana', 'banda_humedad')
+    )
+    op.create_table('cubo_productores',
+    sa.Column('planta_id', sa.Integer(), nullable=False),
+    sa.Column('semana', sa.Date(), nullable=False),
+    sa.Column('productor_id', sa.Integer(), nullable=False),
+    sa.Column('banda_humedad', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('lotes', sa.Integer(), nullable=False),
+    sa.Column('kilos_netos', sa.Float(), nullable=False),
+    sa.Column('kilos_fibra', sa.Float(), nullable=False),
+    sa.Column('kilos_semilla', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['planta_id'], ['planta.id'], ),
+    sa.ForeignKeyConstraint(['productor_id'], ['productor.id'], ),
+    sa.PrimaryKeyConstraint('planta_id', 'semana', 'productor_id', 'banda_humedad')
+    )
+    with op.batch_alter_table('cubo_productores', schema=None) as batch_op:
+        batch_op.create_index('ix_cubo_productores_productor_semana', ['productor_id', 'semana'], unique=False)
+
+    op.create_table('cubo_rendimiento',
+    sa.Column('planta_id', sa.Integer(), nullable=False),
+    sa.Column('semana', sa.Date(), nullable=False),
+    sa.Column('banda_humedad', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('medida', sa.String(length=10), nullable=False),
+    sa.Column('intervalo', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('lotes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['planta_id'], ['planta.id'], ),
+    sa.PrimaryKeyConstraint('planta_id', 'semana', 'banda_humedad', 'medida', 'intervalo')
+    )
+
+    # Carga inicial desde el historial completo
+    sumas = "count(*), sum(peso_neto), sum(kilos_fibra), sum(kilos_semilla)"
+    op.execute(
+        f"INSERT INTO cubo_plantas (planta_id, semana, banda_humedad, lotes, kilos_netos, kilos_fibra, kilos_semilla) "
+        f"SELECT planta_id, {_SEMANA}, {_BANDA}, {sumas} FROM carga_historica WHERE {_PROCESADOS} GROUP BY 1, 2, 3"
+    )
+    op.execute(
+        f"INSERT INTO cubo_productores (planta_id, semana, productor_id, banda_humedad, lotes, kilos_netos, kilos_fibra, kilos_semilla) "
+        f"SELECT planta_id, {_SEMANA}, productor_id, {_BANDA}, {sumas} FROM carga_historica WHERE {_PROCESADOS} GROUP BY 1, 2, 3, 4"
+    )
+    for medida in ('fibra', 'semilla'):
+        op.execute(
+            f"INSERT INTO cubo_rendimiento (planta_id, semana, banda_humedad, medida, intervalo, lotes) "
+            f"SELECT planta_id, {_SEMANA}, {_BANDA}, '{medida}', "
+            f"min(199, max(0, CAST(kilos_{medida} / peso_neto * 200 AS INTEGER))), count(*) "
+            f"FROM carga_historica WHERE {_PROCESADOS} GROUP BY 1, 2, 3, 5"
+        )
+
+
+def downgrade():
+    op.drop_table('cubo_rendimiento')
+    with op.batch_alter_table('cubo_productores', schema=None) as batch_op:
+        batch_op.drop_index('ix_cubo_productores_productor_semana')
+    op.drop_table('cubo_productores')
+    op.drop_table('cubo_plantas')
@@ -0,0 +1,49 @@
+"""Cola persistente de trabajos en segundo plano
+
+Revision ID: a8d5e2f61c39
+Revises: f1c94d2b7a06
+Create Date: 2026-10-18 21:34:18.207615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d5e2f61c39'
+down_revision = 'f1c94d2b7a06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trabajo',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('argumentos', sa.Text(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('intentos', sa.Integer(), nullable=False),
+    sa.Column('max_intentos', sa.Integer(), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+    sa.Column('disponible_desde', sa.DateTime(), nullable=False),
+    sa.Column('fecha_inicio', sa.DateTime(), nullable=True),
+    sa.Column('fecha_fin', sa.DateTime(), nullable=True),
+    sa.Column('trabajador', sa.String(length=100), nullable=True),
+    sa.Column('vence', sa.DateTime(), nullable=True),
+    sa.Column('resultado', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('planta_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['planta_id'], ['planta.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('trabajo', schema=None) as batch_op:
+        batch_op.create_index('ix_trabajo_estado_disponible', ['estado', 'disponible_desde'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trabajo', schema=None) as batch_op:
+        batch_op.drop_index('ix_trabajo_estado_disponible')
+
+    op.drop_table('trabajo')
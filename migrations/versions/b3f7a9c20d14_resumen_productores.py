@@ -0,0 +1,48 @@
+"""Contador de productores activos para el dashboard de Casa Central
+
+Revision ID: b3f7a9c20d14
+Revises: a8d5e2f61c39
+Create Date: 2026-10-18 22:41:07.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7a9c20d14'
+down_revision = 'a8d5e2f61c39'
+branch_labels = None
+depends_on = None
+
+# Copia de SQL_RESUMEN_PRODUCTORES de app/models/operaciones.py al momento de esta revisión
+_SUMAR_ACTIVOS = "UPDATE resumen_productores SET activos = activos + ({}) WHERE id = 1;"
+DISPARADORES = {
+    'resumen_productores_alta': f"AFTER INSERT ON productor WHEN new.activo BEGIN {_SUMAR_ACTIVOS.format(1)} END",
+    'resumen_productores_baja': f"AFTER DELETE ON productor WHEN old.activo BEGIN {_SUMAR_ACTIVOS.format(-1)} END",
+    'resumen_productores_cambio': (
+        "AFTER UPDATE OF activo ON productor WHEN old.activo IS NOT new.activo "
+        f"BEGIN {_SUMAR_ACTIVOS.format('CASE WHEN new.activo THEN 1 ELSE -1 END')} END"
+    ),
+}
+
+
+def upgrade():
+    op.create_table('resumen_productores',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('activos', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO resumen_productores (id, activos) SELECT 1, count(*) FROM productor WHERE activo")
+
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for nombre, cuerpo in DISPARADORES.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for nombre in DISPARADORES:
+            op.execute(f'DROP TRIGGER IF EXISTS {nombre}')
+    op.drop_table('resumen_productores')
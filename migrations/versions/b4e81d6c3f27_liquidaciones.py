@@ -0,0 +1,63 @@
+"""Liquidaciones a productores, corridas del motor y novedades por productor
+
+Revision ID: b4e81d6c3f27
+Revises: 9c3e5f7a2b14
+Create Date: 2026-10-18 18:21:37.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e81d6c3f27'
+down_revision = '9c3e5f7a2b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('liquidacion',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('productor_id', sa.Integer(), nullable=False),
+    sa.Column('desde', sa.Date(), nullable=False),
+    sa.Column('hasta', sa.Date(), nullable=False),
+    sa.Column('fecha_calculo', sa.DateTime(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('lotes', sa.Integer(), nullable=False),
+    sa.Column('kilos_netos', sa.Float(), nullable=False),
+    sa.Column('descuento_humedad', sa.Float(), nullable=False),
+    sa.Column('kilos_liquidables', sa.Float(), nullable=False),
+    sa.Column('kilos_fibra', sa.Float(), nullable=False),
+    sa.Column('kilos_semilla', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['productor_id'], ['productor.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('desde', 'hasta', 'productor_id', name='uq_liquidacion_periodo_productor')
+    )
+    op.create_table('liquidacion_corrida',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('desde', sa.Date(), nullable=False),
+    sa.Column('hasta', sa.Date(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('completa', sa.Boolean(), nullable=False),
+    sa.Column('liquidaciones', sa.Integer(), nullable=False),
+    sa.Column('segundos', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('liquidacion_corrida', schema=None) as batch_op:
+        batch_op.create_index('ix_liquidacion_corrida_periodo', ['desde', 'hasta', 'fecha'], unique=False)
+
+    op.create_table('novedad_liquidacion',
+    sa.Column('productor_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['productor_id'], ['productor.id'], ),
+    sa.PrimaryKeyConstraint('productor_id')
+    )
+
+
+def downgrade():
+    op.drop_table('novedad_liquidacion')
+    with op.batch_alter_table('liquidacion_corrida', schema=None) as batch_op:
+        batch_op.drop_index('ix_liquidacion_corrida_periodo')
+    op.drop_table('liquidacion_corrida')
+    op.drop_table('liquidacion')
@@ -0,0 +1,30 @@
+"""Índices compuestos para la paginación por cursor de cargas y lotes pendientes
+
+Revision ID: c42a9e1b7d03
+Revises: 8f1d4a6c2e57
+Create Date: 2026-10-18 11:20:48.671532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c42a9e1b7d03'
+down_revision = '8f1d4a6c2e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.create_index('ix_carga_planta_fecha_entrada', ['planta_id', 'fecha_entrada', 'id'], unique=False)
+        batch_op.create_index('ix_carga_estado_fecha_salida', ['estado', 'fecha_salida', 'id'], unique=False)
+        batch_op.create_index('ix_carga_planta_estado_fecha_salida', ['planta_id', 'estado', 'fecha_salida', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.drop_index('ix_carga_planta_estado_fecha_salida')
+        batch_op.drop_index('ix_carga_estado_fecha_salida')
+        batch_op.drop_index('ix_carga_planta_fecha_entrada')
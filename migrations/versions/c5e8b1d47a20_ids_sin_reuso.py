@@ -0,0 +1,71 @@
+"""AUTOINCREMENT en carga y proceso_desmotado: los ids archivados no se reusan
+
+Revision ID: c5e8b1d47a20
+Revises: b3f7a9c20d14
+Create Date: 2026-10-18 23:05:52.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8b1d47a20'
+down_revision = 'b3f7a9c20d14'
+branch_labels = None
+depends_on = None
+
+# Tabla viva -> tabla de archivo con los ids ya usados
+TABLAS = {'carga': 'carga_archivo', 'proceso_desmotado': 'proceso_desmotado_archivo'}
+
+
+def _reconstruir(autoincremento):
+    """
+    Reconstruye carga y proceso_desmotado (SQLite no permite agregar ni quitar
+    AUTOINCREMENT con ALTER TABLE). Las migraciones corren con foreign_keys=ON
+    dentro de una transacción, donde el PRAGMA no se puede apagar: los procesos
+    se apartan en una tabla temporal para que borrar la carga vieja no viole la
+    clave foránea, y se vuelven a insertar al final con sus mismos ids. La vista
+    carga_historica y los disparadores de búsqueda de la carga se guardan y se
+    vuelven a crear tal como estaban.
+    """
+    conexion = op.get_bind()
+    guardados = conexion.exec_driver_sql(
+        "SELECT type, name, sql FROM sqlite_master WHERE (type = 'view' AND name = 'carga_historica') "
+        "OR (type = 'trigger' AND tbl_name IN ('carga', 'proceso_desmotado'))"
+    ).all()
+    for tipo, nombre, _ in guardados:
+        op.execute(f'DROP {tipo.upper()} IF EXISTS {nombre}')
+
+    op.execute('CREATE TEMP TABLE _procesos_apartados AS SELECT * FROM proceso_desmotado')
+    op.execute('DELETE FROM proceso_desmotado')
+    opciones = {'sqlite_autoincrement': True} if autoincremento else {}
+    for tabla in ('carga', 'proceso_desmotado'):
+        with op.batch_alter_table(tabla, recreate='always', table_kwargs=opciones):
+            pass
+    op.execute('INSERT INTO proceso_desmotado SELECT * FROM _procesos_apartados')
+    op.execute('DROP TABLE _procesos_apartados')
+
+    if autoincremento:
+        # La secuencia arranca después del mayor id usado, vivo o archivado
+        for tabla, archivo in TABLAS.items():
+            op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{tabla}'")
+            op.execute(
+                f"INSERT INTO sqlite_sequence (name, seq) SELECT '{tabla}', max("
+                f"(SELECT coalesce(max(id), 0) FROM {tabla}), (SELECT coalesce(max(id), 0) FROM {archivo}))"
+            )
+
+    # La vista primero: los disparadores no dependen de ella
+    for tipo, _, sql in sorted(guardados, key=lambda g: g[0] != 'view'):
+        op.execute(sql)
+
+
+def upgrade():
+    # En otros motores los ids salen de secuencias, que no se reusan
+    if op.get_bind().dialect.name == 'sqlite':
+        _reconstruir(autoincremento=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        _reconstruir(autoincremento=False)
@@ -0,0 +1,55 @@
+"""Bandeja de salida de las plantas y control de sincronización en casa central
+
+Revision ID: d2a6f0c8e391
+Revises: b4e81d6c3f27
+Create Date: 2026-10-18 18:52:06.413957
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a6f0c8e391'
+down_revision = 'b4e81d6c3f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('registro_cambio',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('tabla', sa.String(length=30), nullable=False),
+    sa.Column('clave', sa.String(length=50), nullable=False),
+    sa.Column('operacion', sa.String(length=10), nullable=False),
+    sa.Column('datos', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sincronizacion_envio',
+    sa.Column('destino', sa.String(length=255), nullable=False),
+    sa.Column('ultima_secuencia', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('destino')
+    )
+    op.create_table('sincronizacion_origen',
+    sa.Column('origen', sa.String(length=20), nullable=False),
+    sa.Column('ultima_secuencia', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('origen')
+    )
+    op.create_table('sincronizacion_version',
+    sa.Column('tabla', sa.String(length=30), nullable=False),
+    sa.Column('clave', sa.String(length=50), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('origen', sa.String(length=20), nullable=False),
+    sa.Column('secuencia', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tabla', 'clave')
+    )
+
+
+def downgrade():
+    op.drop_table('sincronizacion_version')
+    op.drop_table('sincronizacion_origen')
+    op.drop_table('sincronizacion_envio')
+    op.drop_table('registro_cambio')
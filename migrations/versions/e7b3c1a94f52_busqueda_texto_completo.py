@@ -0,0 +1,82 @@
+"""Índices de búsqueda FTS5 de cargas, productores, choferes y vehículos
+
+Revision ID: e7b3c1a94f52
+Revises: d2a6f0c8e391
+Create Date: 2026-10-18 19:34:51.207715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c1a94f52'
+down_revision = 'd2a6f0c8e391'
+branch_labels = None
+depends_on = None
+
+# Copia de INDICES_BUSQUEDA de app/models/operaciones.py al momento de esta revisión
+_ACENTOS = (('á', 'a'), ('é', 'e'), ('í', 'i'), ('ó', 'o'), ('ú', 'u'), ('ü', 'u'), ('ñ', 'n'),
+            ('Á', 'A'), ('É', 'E'), ('Í', 'I'), ('Ó', 'O'), ('Ú', 'U'), ('Ü', 'U'), ('Ñ', 'N'))
+
+
+def _sin_acentos(expresion):
+    for acentuada, simple in _ACENTOS:
+        expresion = f"replace({expresion}, '{acentuada}', '{simple}')"
+    return expresion
+
+
+def _compacto(expresion):
+    return f"replace(replace(replace({expresion}, '-', ''), ' ', ''), '.', '')"
+
+
+INDICES = {
+    'busqueda_carga': ('carga', {
+        'lote': ('lote_id', _compacto), 'dtv': ('dtv', _compacto), 'acoplado': ('placa_acoplado', _compacto),
+    }),
+    'busqueda_productor': ('productor', {'nombre': ('nombre_completo', _sin_acentos), 'cuit': ('cuit', _compacto)}),
+    'busqueda_chofer': ('chofer', {'nombre': ('nombre_completo', _sin_acentos), 'dni': ('dni', _compacto)}),
+    'busqueda_vehiculo': ('vehiculo', {'placa': ('placa', _compacto)}),
+}
+
+
+def _valores(columnas, fila):
+    return ', '.join(normalizar(f'{fila}.{origen}') for origen, normalizar in columnas.values())
+
+
+def upgrade():
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.create_index('ix_carga_productor_id', ['productor_id'], unique=False)
+        batch_op.create_index('ix_carga_chofer_id', ['chofer_id'], unique=False)
+        batch_op.create_index('ix_carga_vehiculo_id', ['vehiculo_id'], unique=False)
+
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for indice, (tabla, columnas) in INDICES.items():
+        nombres = ', '.join(columnas)
+        origenes = [origen for origen, _ in columnas.values()]
+        alta = f"INSERT INTO {indice}(rowid, {nombres}) VALUES (new.id, {_valores(columnas, 'new')});"
+        baja = f"INSERT INTO {indice}({indice}, rowid, {nombres}) VALUES ('delete', old.id, {_valores(columnas, 'old')});"
+        cambio = ' OR '.join(f'old.{origen} IS NOT new.{origen}' for origen in origenes)
+        op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5({nombres}, content='', tokenize='trigram')")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {indice}_alta AFTER INSERT ON {tabla} BEGIN {alta} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {indice}_baja AFTER DELETE ON {tabla} BEGIN {baja} END")
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {indice}_cambio AFTER UPDATE OF {', '.join(origenes)} ON {tabla} "
+            f"WHEN {cambio} BEGIN {baja} {alta} END"
+        )
+        op.execute(f"INSERT INTO {indice}(rowid, {nombres}) SELECT id, {_valores(columnas, tabla)} FROM {tabla}")
+        op.execute(f"INSERT INTO {indice}({indice}) VALUES ('optimize')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for indice in INDICES:
+            for disparador in ('alta', 'baja', 'cambio'):
+                op.execute(f'DROP TRIGGER IF EXISTS {indice}_{disparador}')
+            op.execute(f'DROP TABLE IF EXISTS {indice}')
+
+    with op.batch_alter_table('carga', schema=None) as batch_op:
+        batch_op.drop_index('ix_carga_vehiculo_id')
+        batch_op.drop_index('ix_carga_chofer_id')
+        batch_op.drop_index('ix_carga_productor_id')
@@ -0,0 +1,29 @@
+"""Versión de los datos por planta para ETag y caché de fragmentos
+
+Revision ID: f1c94d2b7a06
+Revises: e7b3c1a94f52
+Create Date: 2026-10-18 20:12:40.581203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c94d2b7a06'
+down_revision = 'e7b3c1a94f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('version_datos',
+    sa.Column('planta_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('planta_id')
+    )
+
+
+def downgrade():
+    op.drop_table('version_datos')